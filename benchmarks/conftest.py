@@ -0,0 +1,111 @@
+import datetime
+import importlib.util
+import os
+
+import matplotlib
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+
+matplotlib.use('Agg')  # Use non-interactive backend for benchmarking
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (number of tickers, number of years) for the price based benchmarks
+PRICE_SIZES = [(5, 1), (25, 2), (100, 3)]
+
+# (number of ledger rows, number of securities) for the ledger based benchmarks
+LEDGER_SIZES = [(1_000, 10), (10_000, 50), (50_000, 200)]
+
+
+def size_id(size):
+    return "x".join(str(n) for n in size)
+
+
+def load_ledger_module():
+    """
+    Load the ledger module (test.py in the repository root).
+
+    It can't be imported as `test` because the test/ package shadows it.
+    """
+    spec = importlib.util.spec_from_file_location("ledger", os.path.join(ROOT_DIR, "test.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_price_frame(rng: np.random.Generator, years: int, start: str = "2020-01-01") -> pd.DataFrame:
+    """Generate a yfinance-shaped daily price history (business days, geometric random walk)."""
+    dates = pd.bdate_range(start=start, periods=252 * years)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(dates))))
+    return pd.DataFrame(
+        {
+            'Date': dates.strftime('%Y-%m-%d'),
+            'Open': (close * 0.995).round(2),
+            'High': (close * 1.01).round(2),
+            'Low': (close * 0.99).round(2),
+            'Close': close.round(2),
+            'Volume': rng.integers(100_000, 10_000_000, len(dates)),
+            'Dividends': 0.0,
+            'Stock Splits': 0.0,
+        }
+    )
+
+
+def write_price_files(folder: str, n_tickers: int, years: int, seed: int = 42) -> tuple[dict[str, str], dict[str, str]]:
+    """Write one price CSV per synthetic ticker and return (file_paths, descriptions) as used by calculate_weekly_data."""
+    rng = np.random.default_rng(seed)
+    file_paths, descriptions = {}, {}
+    for i in range(n_tickers):
+        ticker = f"T{i:04d}"
+        file_path = os.path.join(folder, f"{ticker}.csv")
+        make_price_frame(rng, years).to_csv(file_path, index=False)
+        file_paths[ticker] = file_path
+        descriptions[ticker] = f"Synthetic Asset {i}"
+    return file_paths, descriptions
+
+
+def make_content(n_tickers: int, n_periods: int, datatype: str = "return", seed: int = 42) -> dict:
+    """Generate a Content payload with n_tickers rows and n_periods time columns."""
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0, 3, (n_tickers, n_periods)) if datatype == "return" else rng.uniform(10, 500, (n_tickers, n_periods))
+    time = [(datetime.date(2024, 1, 1) + datetime.timedelta(weeks=i)).strftime('%m-%d') for i in range(n_periods)]
+    data = [
+        {"id": f"T{i:04d}", "description": f"Synthetic Asset {i}", "timeseries": [round(float(v), 2) for v in row], "total": round(float(row.sum()), 2)}
+        for i, row in enumerate(values)
+    ]
+    return {"metadata": {"name": "Synthetic Asset Returns", "datatype": datatype, "time": time}, "data": data}
+
+
+def make_ledger(n_rows: int, n_securities: int, account_name: str = "Bench IRA", years: int = 5, seed: int = 42) -> pl.DataFrame:
+    """Generate a transactions ledger shaped like the 'Transactions-Schwab' sheet for a single account."""
+    rng = np.random.default_rng(seed)
+    start = datetime.date(2020, 1, 1)
+    offsets = np.sort(rng.integers(0, 365 * years, n_rows))
+    securities = np.array(["Cash"] + [f"S{i:04d}" for i in range(n_securities - 1)])
+    qty = rng.integers(1, 100, n_rows).astype(float) * rng.choice([1.0, 1.0, -0.5], n_rows)
+    price = rng.uniform(10, 500, n_rows).round(2)
+    return pl.DataFrame(
+        {
+            "Account Name": [account_name] * n_rows,
+            "Security": securities[rng.integers(0, n_securities, n_rows)],
+            "Entry Date": [(start + datetime.timedelta(days=int(d))).isoformat() for d in offsets],
+            "Qty": qty,
+            "Cost per share": price,
+            "Txn MV": (qty * price).round(2),
+        }
+    )
+
+
+def write_ledger_prices(folder: str, securities: list[str], years: int = 5, seed: int = 42) -> None:
+    """Write a price CSV for every non-cash security in a synthetic ledger."""
+    rng = np.random.default_rng(seed)
+    for sec in securities:
+        if sec != "Cash":
+            make_price_frame(rng, years).to_csv(os.path.join(folder, f"{sec}.csv"), index=False)
+
+
+@pytest.fixture(scope="session")
+def ledger():
+    return load_ledger_module()
@@ -0,0 +1,48 @@
+import datetime
+
+import numpy as np
+import polars as pl
+import pytest
+
+import util_performance
+from benchmarks.conftest import LEDGER_SIZES, make_ledger, size_id, write_ledger_prices
+
+
+@pytest.mark.parametrize("years", [1, 5, 20])
+def test_bench_get_monthly_prices(benchmark, ledger, years):
+    dates = pl.date_range(datetime.date(2000, 1, 1), datetime.date(2000 + years, 1, 1), "1d", eager=True)
+    price_df = pl.DataFrame({"_Date": dates, "_Price": np.linspace(10, 100, len(dates))})
+    months = [datetime.date(2000 + i // 12, i % 12 + 1, 1).strftime("%b-%y") for i in range(12 * years)]
+
+    monthly = benchmark(ledger.get_monthly_prices, price_df, months)
+
+    assert monthly.height == len(months)
+
+
+@pytest.mark.parametrize("size", LEDGER_SIZES, ids=size_id)
+def test_bench_compute_eom_position(benchmark, ledger, tmp_path, size):
+    n_rows, n_securities = size
+    transactions_df = make_ledger(n_rows, n_securities)
+    write_ledger_prices(str(tmp_path), transactions_df["Security"].unique().to_list())
+
+    kwargs = {"start_month": "2020-01-01", "end_month": "Dec-24", "price_dir": str(tmp_path)}
+
+    eom_df = benchmark.pedantic(ledger.compute_eom_position, args=(transactions_df, "Bench IRA"), kwargs=kwargs, rounds=3, iterations=1)
+
+    assert "Total" in eom_df.columns
+
+
+@pytest.mark.parametrize("n_accounts", [10, 100, 500])
+def test_bench_compute_performance(benchmark, n_accounts):
+    rng = np.random.default_rng(42)
+    months = [datetime.date(2000 + i // 12, i % 12 + 1, 1).strftime("%Y-%m") for i in range(12 * 25)]
+    accounts = [f"Account {i}" for i in range(n_accounts)]
+    growth = np.cumprod(1 + rng.normal(0.006, 0.04, (n_accounts, len(months))), axis=1)
+    flows = np.where(rng.random((n_accounts, len(months))) < 0.1, rng.normal(0, 200, (n_accounts, len(months))), 0.0)
+    long = {"Account Name": np.repeat(accounts, len(months)), "_MonthSort": months * n_accounts}
+    values_df = pl.DataFrame({**long, "Value": (10_000 * growth + np.cumsum(flows, axis=1)).ravel()})
+    flows_df = pl.DataFrame({**long, "Flow": flows.ravel()})
+
+    performance = benchmark(util_performance.compute_performance, values_df, flows_df)
+
+    assert performance.height == n_accounts
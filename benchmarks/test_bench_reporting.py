@@ -0,0 +1,118 @@
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+import util_data
+from class_definition import ColumnarContent
+from util_report import ReportJob, render_reports
+from util_ui import PDF, create_table, transform_data
+from util_validate import PriceValidator, validate_prices
+from benchmarks.conftest import PRICE_SIZES, make_content, size_id, write_price_files
+
+# (number of tickers, number of periods) for the table based benchmarks
+TABLE_SIZES = [(10, 16), (50, 52), (300, 104)]
+
+
+@pytest.mark.parametrize("size", PRICE_SIZES, ids=size_id)
+def test_bench_calculate_weekly_data(benchmark, tmp_path, size):
+    n_tickers, years = size
+    file_paths, descriptions = write_price_files(str(tmp_path), n_tickers, years)
+
+    content_changes, content_prices = benchmark.pedantic(util_data.calculate_weekly_data, args=(file_paths, descriptions), rounds=3, iterations=1)
+
+    assert len(content_changes["data"]) == n_tickers
+    assert len(content_prices["data"]) == n_tickers
+
+
+@pytest.mark.parametrize("size", PRICE_SIZES, ids=size_id)
+def test_bench_validate_prices(benchmark, tmp_path, size):
+    file_paths, _ = write_price_files(str(tmp_path), *size)
+    long_df = util_data._read_close_frame(file_paths)
+
+    issues = benchmark(validate_prices, long_df)
+
+    assert issues.empty
+
+
+@pytest.mark.parametrize("validated", [False, True], ids=["plain", "validated"])
+@pytest.mark.parametrize("size", PRICE_SIZES, ids=size_id)
+def test_bench_period_contents_validation(benchmark, tmp_path, size, validated):
+    # The validated/plain pair of a size is the overhead of the validation stage on the batch path
+    file_paths, descriptions = write_price_files(str(tmp_path), *size)
+
+    def run():
+        return util_data.calculate_period_contents(file_paths, descriptions, ('W', 'M'), validator=PriceValidator() if validated else None)
+
+    contents = benchmark.pedantic(run, rounds=3, iterations=1)
+
+    assert len(contents['W'][0].ids) == size[0]
+
+
+@pytest.mark.parametrize("size", TABLE_SIZES, ids=size_id)
+def test_bench_transform_data(benchmark, size):
+    content = make_content(*size)
+
+    df = benchmark(transform_data, content)
+
+    assert df.shape == (size[0], size[1] + 3)
+
+
+@pytest.mark.parametrize("size", TABLE_SIZES, ids=size_id)
+def test_bench_create_table_and_output(benchmark, tmp_path, size):
+    contents = [make_content(*size, datatype="return"), make_content(*size, datatype="price")]
+    dfs = [transform_data(content) for content in contents]
+    output_path = os.path.join(tmp_path, "bench.pdf")
+
+    def render():
+        pdf = PDF(orientation="L")
+        pdf.add_page()
+        current_y = pdf.get_y()
+        for df, content in zip(dfs, contents):
+            current_y = create_table(pdf, df, content, current_y, content["metadata"]["datatype"] == "price")
+            pdf.ln(5)
+        pdf.output(output_path)
+
+    benchmark.pedantic(render, rounds=3, iterations=1)
+
+    assert os.path.getsize(output_path) > 0
+
+
+@pytest.mark.parametrize("sparklines", [False, True], ids=["numbers", "sparklines"])
+def test_bench_create_table_sparklines(benchmark, sparklines):
+    content = make_content(500, 52, datatype="return")
+    df = transform_data(content)
+
+    def render():
+        pdf = PDF(orientation="L")
+        pdf.add_page()
+        return create_table(pdf, df, content, pdf.get_y(), sparklines=sparklines)
+
+    assert benchmark.pedantic(render, rounds=3, iterations=1) > 0
+
+
+@pytest.mark.parametrize("years", [10, 40, 75])
+def test_bench_create_dual_axis_plot(benchmark, years):
+    rng = np.random.default_rng(seed=42)
+    dates = pd.date_range(start='1950-01-01', periods=12 * years, freq='MS')
+    df1 = pd.DataFrame({'observation_date': dates, 'UNRATE': rng.uniform(3, 10, len(dates))})
+    df2 = pd.DataFrame({'observation_date': dates, 'GDP': np.cumsum(rng.uniform(0, 100, len(dates)))})
+    recession_df = pd.DataFrame({'Start': ['1953-07-01', '1973-11-01', '2008-01-01'], 'End': ['1954-05-01', '1975-03-01', '2009-06-01']})
+
+    def plot():
+        fig, _, _ = util_data.create_dual_axis_plot(df1, df2, 'observation_date', 'UNRATE', 'GDP', 'Bench', 'Unemployment', 'GDP', recession_df.copy())
+        plt.close(fig)
+
+    benchmark.pedantic(plot, rounds=3, iterations=1)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2, 4])
+def test_bench_render_reports(benchmark, tmp_path, max_workers):
+    contents = [ColumnarContent.from_content(make_content(50, 52, datatype)) for datatype in ("return", "price")]
+    jobs = [ReportJob(contents, os.path.join(tmp_path, f"report_{i}.pdf")) for i in range(16)]
+
+    outputs = benchmark.pedantic(render_reports, args=(jobs,), kwargs={"max_workers": max_workers}, rounds=3, iterations=1)
+
+    assert len(outputs) == len(jobs)
@@ -1,4 +1,7 @@
-from typing import TypedDict, List
+from typing import Any, Dict, TypedDict, List, Optional, Sequence
+import math
+
+import numpy as np
 
 
 class AssetData(TypedDict):
@@ -17,3 +20,82 @@ class ContentMetadata(TypedDict):
 class Content(TypedDict):
     metadata: ContentMetadata
     data: List[AssetData]
+
+
+class ColumnarContent:
+    """
+    Array-backed equivalent of Content: one row per asset, one column per time period.
+
+    All timeseries live in a single 2-D float64 array. Rows shorter than `time` are padded with NaN
+    and their real length is kept in `lengths`, so converting to and from Content is lossless.
+    `totals` is None when the source Content has no 'total' field (e.g. testdata1.json).
+    """
+
+    __slots__ = ("name", "datatype", "time", "ids", "descriptions", "values", "lengths", "totals")
+
+    def __init__(
+        self,
+        name: str,
+        datatype: str,
+        time: Sequence[str],
+        ids: Sequence[str],
+        descriptions: Sequence[str],
+        values: np.ndarray,
+        lengths: Optional[np.ndarray] = None,
+        totals: Optional[np.ndarray] = None,
+    ):
+        self.name = name
+        self.datatype = datatype
+        self.time = list(time)
+        self.ids = list(ids)
+        self.descriptions = list(descriptions)
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(self.ids), len(self.time))
+        self.lengths = np.full(len(self.ids), len(self.time), dtype=np.int64) if lengths is None else np.asarray(lengths, dtype=np.int64)
+        self.totals = None if totals is None else np.asarray(totals, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __repr__(self) -> str:
+        return f"ColumnarContent(name={self.name!r}, datatype={self.datatype!r}, shape={self.values.shape})"
+
+    @classmethod
+    def from_content(cls, content: Content) -> "ColumnarContent":
+        """Build from the JSON/TypedDict representation; missing (None) values become NaN."""
+        metadata = content["metadata"]
+        data = content["data"]
+        time = metadata["time"]
+        values = np.full((len(data), len(time)), np.nan)
+        lengths = np.zeros(len(data), dtype=np.int64)
+        for i, item in enumerate(data):
+            timeseries = item["timeseries"]
+            lengths[i] = len(timeseries)
+            values[i, : len(timeseries)] = [np.nan if value is None else value for value in timeseries]
+        has_total = bool(data) and "total" in data[0]
+        totals = np.array([item["total"] for item in data], dtype=np.float64) if has_total else None
+        return cls(
+            metadata["name"],
+            metadata.get("datatype", "return"),
+            time,
+            [item["id"] for item in data],
+            [item["description"] for item in data],
+            values,
+            lengths,
+            totals,
+        )
+
+    def row(self, i: int) -> AssetData:
+        """Return asset `i` in the JSON/TypedDict representation (NaN becomes None)."""
+        values: np.ndarray = self.values[i, : self.lengths[i]]
+        timeseries: List[Optional[float]] = [None if math.isnan(value) else float(value) for value in values]
+        item: Dict[str, Any] = {"id": self.ids[i], "description": self.descriptions[i], "timeseries": timeseries}
+        if self.totals is not None:
+            item["total"] = float(self.totals[i])
+        return item  # type: ignore[return-value]
+
+    def to_content(self) -> Content:
+        """Convert to the JSON/TypedDict representation."""
+        return {
+            "metadata": {"name": self.name, "datatype": self.datatype, "time": list(self.time)},
+            "data": [self.row(i) for i in range(len(self.ids))],
+        }
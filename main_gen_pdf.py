@@ -1,14 +1,51 @@
 import util_data
+import util_analytics
+import util_pipeline
 import json
 import os
-from util_ui import load_content, transform_data
-from util_ui import PDF, create_table
+from class_definition import ColumnarContent
+from util_ui import load_content
+from util_ui import PDF, render_tables
 import argparse
+from typing import Dict
+from util_cache import WeeklyCache
+from util_catalog import PriceCatalog
+from util_profile import stage, start_profiling, finish_profiling
+from util_validate import PriceValidator
+from util_fx import FxConverter, download_fx_rates
+
+
+def non_negative_int(value: str) -> int:
+    """argparse type of counts such as --top-k: an integer >= 0"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an integer, got '{value}'")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {number}")
+    return number
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Generate PDF report of asset returns')
     parser.add_argument('--use-live-data', action='store_true', help='Use live data instead of baseline data')
+    parser.add_argument('--periods', default='W', help="Comma separated aggregation windows to report, any of W, M, Q, Y (default: W)")
+    parser.add_argument('--analytics', action='store_true', help='Append risk metrics and return correlation tables computed from the weekly prices')
+    parser.add_argument(
+        '--benchmark', default='SPY', help='Market the Beta of --analytics is measured against; loaded separately when it is not one of the tickers (default: SPY)'
+    )
+    parser.add_argument('--total-return', action='store_true', help='Report returns with dividends reinvested instead of price-only returns')
+    parser.add_argument('--base-currency', default='USD', help='Currency to report prices and returns in (default: USD)')
+    parser.add_argument('--quarantine', action='store_true', help='Leave duplicate dates, non-positive closes and single-day spikes out of the aggregates')
+    parser.add_argument('--top-k', type=non_negative_int, default=1, help='Tickers listed per period in the Highest and Lowest Return rows of the return tables (default: 1)')
+    parser.add_argument('--rank-shading', action='store_true', help='Shade return cells by their percentile within the period instead of by sign')
+    parser.add_argument('--sparklines', action='store_true', help='Add a Trend column drawing each row of the return and price tables as a small line')
+    parser.add_argument('--no-cache', action='store_true', help='Recompute every weekly aggregate instead of reusing cached results')
+    parser.add_argument('--profile', action='store_true', help='Print a per-stage timing / rows / peak memory breakdown')
+    parser.add_argument('--profile-output', help='Also dump cProfile statistics (pstats format) to this file')
     args = parser.parse_args()
+    if args.profile:
+        start_profiling(use_cprofile=bool(args.profile_output))
 
     start = "2023-08-01"
     end = "2025-08-01"
@@ -40,41 +77,92 @@ if __name__ == "__main__":
         # "BTC": "Bitcoin",
     }
 
-    # Only download data if using live data
-    if args.use_live_data:
-        for ticker in tickers:
-            util_data.download_ticker_data(ticker, start, end)
+    # Quote currency of the tickers not listed in USD (ADRs such as YPF and BYDDY trade in USD), e.g. "1211.HK": "HKD"
+    currencies: Dict[str, str] = {}
 
     # Parse stock data and get both weekly changes and closing prices
     finance_data_path = util_data.get_finance_data_path()
-    file_paths = {ticker: os.path.join(finance_data_path, "asset_prices", f"{ticker}.csv") for ticker in tickers}
+    catalog = PriceCatalog(util_data.get_price_dir())
+    file_paths = catalog.file_paths(tickers)
     descriptions = tickers
+    freqs = [freq.strip().upper() for freq in args.periods.split(',') if freq.strip()]
+    all_freqs = ['W'] + [freq for freq in freqs if freq != 'W']
+    validator = PriceValidator(quarantine=args.quarantine)
+    # Beta needs the benchmark's prices even when it is not one of the reported tickers
+    benchmark_paths = catalog.file_paths([args.benchmark]) if args.analytics and args.benchmark not in tickers else {}
+    if benchmark_paths and args.use_live_data:
+        util_data.download_ticker_data(args.benchmark, start, end, auto_adjust=not args.total_return)
+    quote_currencies = {ticker: currencies.get(ticker, 'USD') for ticker in [*tickers, *benchmark_paths]}
+    fx = None
+    if set(quote_currencies.values()) != {args.base_currency}:
+        if args.use_live_data:
+            download_fx_rates(quote_currencies.values(), args.base_currency, start, end)
+        try:
+            fx = FxConverter.from_catalog(catalog, quote_currencies, args.base_currency)
+        except FileNotFoundError as e:
+            raise SystemExit(f"{e} (run with --use-live-data to download)")
+
+    cache = None if args.no_cache else WeeklyCache(os.path.join(finance_data_path, "cache", "weekly"))
 
-    content_changes, content_prices = util_data.calculate_weekly_data(file_paths, descriptions)
+    def check_coverage():
+        catalog.refresh(tickers)
+        missing, stale = catalog.check(tickers, as_of=end)
+        if missing:
+            raise SystemExit(f"No usable price file for: {', '.join(missing)} (run with --use-live-data to download)")
+        if stale:
+            print(f"Warning: prices end before {end} for: {', '.join(stale)}")
+
+    if args.use_live_data:
+        # Downloads overlap with parsing and aggregation of the tickers already downloaded
+        period_contents = util_pipeline.run_period_pipeline(
+            file_paths, descriptions, start, end, all_freqs, args.total_return, validator=validator, fx=fx, cache=cache
+        )
+        check_coverage()
+    else:
+        check_coverage()
+        period_contents = util_data.calculate_period_contents(file_paths, descriptions, all_freqs, cache, args.total_return, validator, fx)
+    issue_report = validator.report()
+    if issue_report:
+        print(issue_report)
+    content_changes, content_prices = period_contents['W']
+    benchmark_prices = None
+    if benchmark_paths:
+        if os.path.exists(benchmark_paths[args.benchmark]):
+            benchmark_contents = util_data.calculate_period_contents(benchmark_paths, {args.benchmark: args.benchmark}, ['W'], cache, args.total_return, fx=fx)
+            benchmark_prices = benchmark_contents['W'][1]
+        else:
+            print(f"Warning: no price file for the benchmark {args.benchmark}; the risk metrics are reported without Beta")
 
     # Save weekly changes to testdata2.json
     with open("testdata2.json", "w") as f:
-        json.dump(content_changes, f, indent=4)
+        json.dump(content_changes.to_content(), f, indent=4)
 
     # Save weekly closing prices to testdata3.json
     with open("testdata3.json", "w") as f:
-        json.dump(content_prices, f, indent=4)
+        json.dump(content_prices.to_content(), f, indent=4)
 
     # Load data from JSON files dynamically
     json_files = sorted([f for f in os.listdir('.') if f.startswith('testdata') and f.endswith('.json')], key=lambda x: int(''.join(filter(str.isdigit, x))))
-    contents = [load_content(json_file) for json_file in json_files]
 
-    dfs = [transform_data(content) for content in contents]
+    def report_contents():
+        """Produce the tables one at a time so each can be released once it is written"""
+        for json_file in json_files:
+            yield ColumnarContent.from_content(load_content(json_file))
+        # Other aggregation windows come from the same data load and are appended after the JSON tables
+        for freq in freqs:
+            if freq != 'W':
+                yield from period_contents[freq]
+        if args.analytics:
+            yield util_analytics.risk_metrics(content_prices, args.benchmark, benchmark=benchmark_prices)
+            yield util_analytics.correlation_content(content_prices)
 
     pdf = PDF(orientation="L")
     pdf.add_page()
+    render_tables(pdf, report_contents(), summary_rows=args.top_k, rank_shading=args.rank_shading, sparklines=args.sparklines)
 
-    current_y = pdf.get_y()
-
-    for i, (df, content) in enumerate(zip(dfs, contents)):
-        current_y = create_table(pdf, df, content, current_y, content["metadata"].get("datatype") == "price")
-        if i < len(dfs) - 1:
-            pdf.ln(5)  # Add spacing between tables
-
-    pdf.output("asset_returns.pdf")
+    with stage("pdf_output"):
+        pdf.output("asset_returns.pdf")
     print(f"PDF has been generated as 'asset_returns.pdf' using {'live' if args.use_live_data else 'baseline'} data")
+
+    if args.profile:
+        print(finish_profiling(args.profile_output))
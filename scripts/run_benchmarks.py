@@ -0,0 +1,35 @@
+import argparse
+import sys
+
+import pytest
+
+BENCHMARK_STORAGE = './.benchmarks'
+BENCHMARK_JSON = './bench_output.json'
+
+
+def run_benchmarks(mode: str, threshold: int) -> int:
+    """
+    Run the benchmark suite under ./benchmarks.
+
+    Args:
+        mode (str): 'save' stores the run as a new baseline, 'compare' also compares against the latest saved run
+        threshold (int): Allowed regression of the median, in percent, before 'compare' fails
+
+    Returns:
+        int: The pytest exit code
+    """
+    args = ['benchmarks', '--no-cov', '--benchmark-only', f'--benchmark-storage={BENCHMARK_STORAGE}', f'--benchmark-json={BENCHMARK_JSON}']
+    if mode == 'save':
+        args.append('--benchmark-autosave')
+    else:
+        args.extend(['--benchmark-compare', f'--benchmark-compare-fail=median:{threshold}%', '--benchmark-group-by=func'])
+    return pytest.main(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run the performance benchmarks for the reporting pipeline')
+    parser.add_argument('mode', choices=['save', 'compare'], help='save a new baseline, or compare against the latest saved baseline')
+    parser.add_argument('--threshold', type=int, default=15, help='fail compare mode when a median regresses by more than this percentage')
+    args = parser.parse_args()
+
+    sys.exit(run_benchmarks(args.mode, args.threshold))
@@ -1,9 +1,11 @@
 import polars as pl
 from typing import Optional
 import datetime
-from dateutil.relativedelta import relativedelta  # type: ignore
 import os
 from functools import reduce
+import argparse
+from util_catalog import PriceCatalog
+from util_profile import profiled, record_rows, start_profiling, finish_profiling
 
 
 def add_total_column(out_df):
@@ -23,27 +25,49 @@ def add_total_column(out_df):
     return out_df.with_columns([total_sum.alias('Total')])
 
 
-def load_security_prices(qty_pivot, price_dir):
+@profiled("load_prices")
+def load_security_prices(qty_pivot, catalog, fx=None):
     """
     Helper to load price data for each security (except Cash) and return a dict of DataFrames keyed by security.
+    File locations and date/price columns come from the price catalog, so only the two needed columns are read.
+    With an FxConverter, each month-end price is converted to its base currency at the month-end rate.
     """
     price_dfs = {}
     for sec in qty_pivot.columns:
         if sec in ("Month", "Cash"):
             continue
-        price_path = os.path.join(price_dir, f"{sec}.csv")
-        if os.path.exists(price_path):
-            price_df = pl.read_csv(price_path)
-            date_col = find_date_col(price_df)
-            price_col = find_price_col(price_df)
-            if date_col and price_col:
-                price_df = price_df.with_columns(
-                    [pl.col(date_col).str.strptime(pl.Date, "%Y-%m-%d", strict=False).alias("_Date"), pl.col(price_col).cast(pl.Float64).alias("_Price")]
-                )
-                price_dfs[sec] = get_monthly_prices(price_df, qty_pivot["Month"].to_list())
+        entry = catalog.lookup(sec)
+        if entry and entry["date_col"] and entry["price_col"]:
+            date_col, price_col = entry["date_col"], entry["price_col"]
+            price_df = pl.read_csv(entry["path"], columns=[date_col, price_col], schema_overrides={date_col: pl.Utf8})
+            record_rows(price_df.height)
+            price_df = price_df.with_columns(
+                [pl.col(date_col).str.slice(0, 10).str.strptime(pl.Date, "%Y-%m-%d", strict=False).alias("_Date"), pl.col(price_col).cast(pl.Float64).alias("_Price")]
+            )
+            monthly = get_monthly_prices(price_df, qty_pivot["Month"].to_list())
+            if fx is not None:
+                month_end = pl.col("Month").str.strptime(pl.Date, "%b-%y").dt.month_end().alias("_Date")
+                monthly = fx.convert_prices(monthly.with_columns(month_end), sec).drop("_Date")
+            price_dfs[sec] = monthly
     return price_dfs
 
 
+def report_price_coverage(catalog, securities, as_of):
+    """
+    Refresh the catalog for the given securities and print those without prices or with prices ending before as_of.
+    Returns the (missing, stale) lists.
+    """
+    securities = [sec for sec in securities if sec != "Cash"]
+    catalog.refresh(securities)
+    missing, stale = catalog.check(securities, as_of=as_of)
+    if missing:
+        print(f"No usable price file in {catalog.price_dir} for: {', '.join(sorted(missing))}")
+    if stale:
+        ends = [f"{sec} ({catalog.lookup(sec)['end']})" for sec in sorted(stale)]
+        print(f"Prices ending before {as_of} for: {', '.join(ends)}")
+    return missing, stale
+
+
 def get_all_months_tuples(start_month, end_month, min_month_sort, max_month_sort):
     """
     Helper to compute the list of (Month, _MonthSort) tuples for the full range.
@@ -73,20 +97,6 @@ def get_all_months_tuples(start_month, end_month, min_month_sort, max_month_sort
         return month_range(str(min_month_sort), str(max_month_sort))
 
 
-def find_date_col(price_df):
-    for c in price_df.columns:
-        if c.lower() in ("date", "asofdate", "as_of_date"):
-            return c
-    return None
-
-
-def find_price_col(price_df):
-    for c in price_df.columns:
-        if c.lower() in ("close", "adj close", "price"):
-            return c
-    return None
-
-
 def parse_investment_ledger():
     """Parse the investment ledger Excel file and print the first 10 rows."""
     # Path to the Excel file
@@ -163,6 +173,8 @@ def parse_month_str(month_str):
 
 
 def month_range(start, end):
+    from dateutil.relativedelta import relativedelta  # type: ignore
+
     months = []
     # Ensure start and end are strings
     start_str = str(start)
@@ -175,16 +187,41 @@ def month_range(start, end):
     return months
 
 
-def compute_monthly_positions(transactions_df, account_name):
-    # Ensure correct dtypes
-    df = transactions_df.with_columns([pl.col("Entry Date").cast(pl.Utf8).str.strptime(pl.Date, "%Y-%m-%d", strict=False), pl.col("Qty").cast(pl.Float64)])
+def _monthly_positions_query(transactions: pl.LazyFrame, account_name: Optional[str], splits: Optional[pl.DataFrame] = None) -> pl.LazyFrame:
+    """Month-end quantity per (account, security) as a lazy query, shared by the in-memory and the streaming entry points."""
+    # Only the columns the positions need are read from a scanned file
+    df = transactions.select(["Account Name", "Security", "Entry Date", "Qty"])
 
-    # Filter by account name
-    df = df.filter(pl.col("Account Name") == account_name)
+    # Filter by account name first, so the streaming engine drops other accounts' rows as they are read
+    if account_name is not None:
+        df = df.filter(pl.col("Account Name") == account_name)
+
+    # Ensure correct dtypes
+    df = df.with_columns([pl.col("Entry Date").cast(pl.Utf8).str.strptime(pl.Date, "%Y-%m-%d", strict=False), pl.col("Qty").cast(pl.Float64)])
 
     # Filter out rows without Entry Date or Qty
     df = df.filter(pl.col("Entry Date").is_not_null() & pl.col("Qty").is_not_null())
 
+    # Restate quantities in today's shares, like the split-adjusted prices: each quantity is multiplied by the
+    # factor of the first split after its entry date (a trade on the ex-date is already in post-split shares).
+    # Rows are first summed per (account, security, month), keeping single days only in the months a security
+    # split, so the as-of join and the sort it needs run on that reduced frame rather than on every ledger row.
+    # A month without a split shares one factor, found from its first day. Both sides of the join are sorted by
+    # date, which polars cannot verify per security
+    if splits is not None and splits.height:
+        split_months = splits.select(["Security", pl.col("Split Date").dt.truncate("1mo").alias("_Month")]).unique().with_columns(pl.lit(True).alias("_SplitMonth"))
+        df = (
+            df.with_columns(pl.col("Entry Date").dt.truncate("1mo").alias("_Month"))
+            .join(split_months.lazy(), on=["Security", "_Month"], how="left")
+            .with_columns(pl.when(pl.col("_SplitMonth")).then(pl.col("Entry Date")).otherwise(pl.col("_Month")).alias("Entry Date"))
+            .group_by(["Account Name", "Security", "Entry Date"])
+            .agg(pl.col("Qty").sum())
+            .sort("Entry Date")
+            .join_asof(splits.lazy(), left_on="Entry Date", right_on="Split Date", by="Security", strategy="forward", allow_exact_matches=False, check_sortedness=False)
+            .with_columns((pl.col("Qty") * pl.col("Split Factor").fill_null(1.0)).alias("Qty"))
+            .drop(["Split Date", "Split Factor"], strict=False)
+        )
+
     # Add a 'Month' column (Mon-YY, e.g., Aug-23)
     df = df.with_columns([pl.col("Entry Date").dt.strftime("%b-%y").alias("Month"), pl.col("Entry Date").dt.strftime("%Y-%m").alias("_MonthSort")])
 
@@ -196,21 +233,78 @@ def compute_monthly_positions(transactions_df, account_name):
     )
 
     # Compute cumulative sum for each Account/Security
-    result = monthly.with_columns([pl.col("Monthly Qty").cum_sum().over(["Account Name", "Security"]).alias("End of Month Qty")])
+    return monthly.with_columns([pl.col("Monthly Qty").cum_sum().over(["Account Name", "Security"]).alias("End of Month Qty")])
+
+
+def compute_monthly_positions(transactions_df, account_name, splits=None):
+    return _monthly_positions_query(transactions_df.lazy(), account_name, splits).collect()
+
+
+@profiled("scan_positions")
+def scan_monthly_positions(source: str, account_name: Optional[str] = None, splits: Optional[pl.DataFrame] = None) -> pl.DataFrame:
+    """
+    Month-end positions of a ledger export too large to load, in bounded memory.
+
+    The file is scanned with polars' streaming engine: rows are filtered, parsed and summed per
+    (account, security, month) batch by batch, so memory grows with the number of distinct
+    (account, security, month) groups rather than with the number of ledger rows.
+
+    Args:
+        source: CSV or Parquet file with at least 'Account Name', 'Security', 'Entry Date' and 'Qty'
+        account_name: Only this account (default: every account)
+        splits: Corporate-actions table of util_positions.split_factors, to restate quantities in today's shares
+    Returns:
+        DataFrame with the columns of compute_monthly_positions
+    """
+    if source.lower().endswith((".parquet", ".pq")):
+        transactions = pl.scan_parquet(source)
+    else:
+        # Read every column as text like the Excel ledger's mixed columns, and cast only what is needed
+        transactions = pl.scan_csv(source, infer_schema=False)
+    result = _monthly_positions_query(transactions, account_name, splits).collect(engine="streaming")
+    record_rows(result.height)
     return result
 
 
-def compute_eom_position(transactions_df: pl.DataFrame, account_name: str, start_month: str = "2023-08-01", end_month: Optional[str] = None) -> pl.DataFrame:
+@profiled("eom_position")
+def compute_eom_position(
+    transactions_df: pl.DataFrame,
+    account_name: str,
+    start_month: str = "2023-08-01",
+    end_month: Optional[str] = None,
+    price_dir: Optional[str] = None,
+    fx=None,
+    split_adjust: bool = False,
+) -> pl.DataFrame:
     """
     Compute end-of-month position for each holding in the account.
     Args:
         transactions_df: DataFrame containing transaction data (must include columns: 'Account Name', 'Security', 'Entry Date', 'Qty')
         account_name: The account name to filter on
         start_month: The starting month in YYYY-MM-DD format (default: '2023-08-01')
+        price_dir: Directory holding <security>.csv price files (default: the asset_prices folder of the finance data path)
+        fx: Optional FxConverter; prices and MVs are then reported in fx.base (Cash is assumed to be in fx.base)
+        split_adjust: Restate quantities in today's shares using the splits in the price files, so they match
+            the split-adjusted prices. Off by default: ledgers that record splits as transactions already hold
+            post-split quantities and would be adjusted twice
     Returns:
         DataFrame with columns: ['Account Name', 'Security', 'Month', 'End of Month Qty']
     """
-    result = compute_monthly_positions(transactions_df, account_name)
+    record_rows(transactions_df.height)
+    if price_dir is None:
+        from util_data import get_price_dir  # pandas based; only needed to resolve the configured default
+
+        price_dir = get_price_dir()
+    catalog = PriceCatalog(price_dir)
+    # The splits are looked up before the positions are summed, so the query runs once, split-adjusted or not
+    splits = None
+    if split_adjust:
+        held = [sec for sec in transactions_df.filter(pl.col("Account Name") == account_name)["Security"].drop_nulls().unique().to_list() if sec != "Cash"]
+        from util_positions import split_factors  # numpy based; only needed to split-adjust
+
+        catalog.refresh(held)
+        splits = split_factors(catalog, held)
+    result = compute_monthly_positions(transactions_df, account_name, splits)
     # Get all months from the earliest transaction to the latest, but only show months >= start_month
     min_month_sort = str(result["_MonthSort"].min())
     max_month_sort = str(result["_MonthSort"].max())
@@ -222,6 +316,13 @@ def compute_eom_position(transactions_df: pl.DataFrame, account_name: str, start
     # Get all securities for this account
     all_securities = result["Security"].unique().to_list()
 
+    # Report securities without prices or with stale prices before building the positions
+    from dateutil.relativedelta import relativedelta  # type: ignore
+
+    last_month = datetime.datetime.strptime(max_month_sort, "%Y-%m") if end_month is None else parse_month_str(end_month)
+    as_of = min((last_month + relativedelta(months=1) - datetime.timedelta(days=1)).date(), datetime.date.today())
+    report_price_coverage(catalog, all_securities, as_of.isoformat())
+
     # Create a DataFrame with all combinations of Security and Month (Mon-YY) and _MonthSort
     combos = pl.DataFrame(
         {
@@ -268,9 +369,7 @@ def compute_eom_position(transactions_df: pl.DataFrame, account_name: str, start
     qty_pivot = qty_pivot.drop("_MonthSort")
 
     # Load price data for each security (except Cash)
-
-    price_dir = r"C:\Users\yexin\OneDrive\PDAJ\Yexin\Finance\Data\asset_prices"
-    price_dfs = load_security_prices(qty_pivot, price_dir)
+    price_dfs = load_security_prices(qty_pivot, catalog, fx)
     # For each security, add price and MV columns
     out_df = qty_pivot
     new_cols = ["Month"]
@@ -298,13 +397,41 @@ def compute_eom_position(transactions_df: pl.DataFrame, account_name: str, start
 
 
 if __name__ == "__main__":
-    df = parse_investment_ledger()
+    parser = argparse.ArgumentParser(description='Compute end-of-month positions from the investment ledger')
+    parser.add_argument('--profile', action='store_true', help='Print a per-stage timing / rows / peak memory breakdown')
+    parser.add_argument('--profile-output', help='Also dump cProfile statistics (pstats format) to this file')
+    parser.add_argument('--scan', help='Stream month-end quantities from a large CSV/Parquet ledger export instead of the workbook')
+    parser.add_argument('--account', help='With --scan, only this account (default: every account)')
+    parser.add_argument(
+        '--split-adjust', action='store_true', help='Restate quantities in today\'s shares using the splits in the price files (only for ledgers that do not book splits)'
+    )
+    args = parser.parse_args()
+    if args.profile:
+        start_profiling(use_cprofile=bool(args.profile_output))
+
+    if args.scan:
+        splits = None
+        if args.split_adjust:
+            from util_data import get_price_dir
+            from util_positions import split_factors
+
+            catalog = PriceCatalog(get_price_dir())
+            catalog.refresh()
+            splits = split_factors(catalog, list(catalog.entries))
+        positions = scan_monthly_positions(args.scan, args.account, splits)
+        output_path = "eom_quantities.parquet"
+        positions.write_parquet(output_path)
+        print(f"{positions.height} month-end positions written to: {output_path}")
+    df = None if args.scan else parse_investment_ledger()
     if df is not None:
         print("\nEnd-of-month positions for account 'Hong Bo IRA':")
-        eom_df_hongbo = compute_eom_position(df, account_name="Hong Bo IRA", start_month="2023-08-01", end_month="Jul-25")
+        eom_df_hongbo = compute_eom_position(df, account_name="Hong Bo IRA", start_month="2023-08-01", end_month="Jul-25", split_adjust=args.split_adjust)
         with pl.Config(tbl_rows=-1, tbl_cols=-1, tbl_width_chars=2000, tbl_hide_column_data_types=True):
             print(eom_df_hongbo)
         # Write the output to an Excel file
         output_path = "eom_positions_hongboira.xlsx"
         eom_df_hongbo.write_excel(output_path)
         print(f"\nExcel file written to: {output_path}")
+
+    if args.profile:
+        print(finish_profiling(args.profile_output))
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import util_analytics
+from class_definition import ColumnarContent
+from util_ui import PDF, render_tables
+
+
+def make_prices(n_assets=4, n_periods=60, seed=3):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.002, 0.02, n_periods - 1)
+    returns = np.array([0.5 * (i + 1) * market + rng.normal(0, 0.01, n_periods - 1) for i in range(n_assets)])
+    prices = 100 * np.cumprod(np.column_stack([np.ones(n_assets), 1 + returns]), axis=1)
+    prices[-1, :10] = np.nan  # late listing
+    ids = [f"A{i}" for i in range(n_assets - 1)] + ["SPY"]
+    time = [f"2024-{i:02d}" for i in range(n_periods)]
+    return ColumnarContent("Weekly Asset Prices", "price", time, ids, [f"Asset {i}" for i in range(n_assets)], prices)
+
+
+def test_metrics_match_pandas_reference():
+    content = make_prices()
+    frame = pd.DataFrame(content.values.T, columns=content.ids)
+    returns = frame.pct_change(fill_method=None)
+
+    metrics = util_analytics.risk_metrics(content, benchmark_id="SPY", periods_per_year=52)
+
+    assert metrics.time == util_analytics.RISK_METRICS
+    np.testing.assert_allclose(metrics.values[:, 0], (returns.std() * np.sqrt(52) * 100).round(2), atol=0.011)
+    np.testing.assert_allclose(metrics.values[:, 1], ((frame / frame.cummax() - 1).min() * 100).round(2), atol=0.011)
+    np.testing.assert_allclose(metrics.values[:, 2], (returns.mean() / returns.std() * np.sqrt(52)).round(2), atol=0.011)
+    expected_beta = [returns[c].cov(returns["SPY"]) / returns["SPY"][returns[c].notna()].var() for c in content.ids]
+    np.testing.assert_allclose(metrics.values[:, 3], np.round(expected_beta, 2), atol=0.011)
+    assert metrics.values[-1, 3] == 1.0
+
+
+def test_correlation_and_rolling_volatility_match_pandas():
+    content = make_prices()
+    returns = pd.DataFrame(content.values.T, columns=content.ids).pct_change(fill_method=None)
+
+    correlations = util_analytics.correlation_content(content)
+    rolling = util_analytics.rolling_volatility_content(content, window=13)
+
+    assert correlations.time == content.ids
+    np.testing.assert_allclose(correlations.values, returns.corr().round(2).to_numpy(), atol=0.011)
+    expected_rolling = (returns.iloc[1:].rolling(13, min_periods=2).std() * np.sqrt(52) * 100).round(2).iloc[12:].to_numpy().T
+    np.testing.assert_allclose(rolling.values, expected_rolling, atol=0.011)
+    assert rolling.values.shape == (4, 60 - 13)
+
+
+def test_missing_benchmark_and_flat_prices():
+    content = ColumnarContent("Prices", "price", ["1", "2", "3"], ["FLAT"], ["Flat"], np.array([[10.0, 10.0, 10.0]]))
+
+    metrics = util_analytics.risk_metrics(content)
+
+    assert metrics.values[0, 0] == 0 and metrics.values[0, 1] == 0
+    assert np.isnan(metrics.values[0, 2])
+    # No prices of the benchmark: no Beta column rather than a column of NaN
+    assert metrics.time == ["Volatility", "Max Drawdown", "Sharpe"]
+
+
+def test_beta_against_a_separately_loaded_benchmark():
+    content = make_prices()
+    assets = ColumnarContent(content.name, content.datatype, content.time, content.ids[:-1], content.descriptions[:-1], content.values[:-1])
+    # The benchmark's own table has an earlier period and is matched to the assets by label
+    benchmark = ColumnarContent(
+        "SPY prices", "price", ["2023-99"] + content.time, ["SPY"], ["S&P 500"], np.concatenate([[[90.0]], content.values[-1:]], axis=1)
+    )
+
+    metrics = util_analytics.risk_metrics(assets, benchmark=benchmark)
+
+    assert metrics.time == util_analytics.RISK_METRICS
+    np.testing.assert_array_equal(metrics.values, util_analytics.risk_metrics(content).values[:-1])
+
+
+@pytest.mark.parametrize("n_assets", [2000])
+def test_scales_to_thousands_of_assets(n_assets):
+    import time
+
+    content = make_prices(n_assets=n_assets, n_periods=104)
+    start = time.perf_counter()
+    util_analytics.risk_metrics(content)
+    util_analytics.correlation_content(content)
+    util_analytics.rolling_volatility_content(content)
+    assert time.perf_counter() - start < 5  # well under a second on a workstation; generous for CI
+
+
+def test_analytics_tables_render(tmp_path):
+    content = make_prices()
+    pdf = PDF(orientation="L")
+    pdf.add_page()
+
+    render_tables(pdf, [util_analytics.risk_metrics(content), util_analytics.correlation_content(content)])
+    pdf.output(str(tmp_path / "analytics.pdf"))
@@ -0,0 +1,101 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import util_cache
+from util_cache import WeeklyCache
+from util_data import calculate_weekly_data
+
+
+def write_prices(path, start, periods=20, base=100.0):
+    dates = pd.date_range(start=start, periods=periods, freq='B')
+    pd.DataFrame({'Date': dates, 'Close': np.linspace(base, base + 10, periods)}).to_csv(path, index=False)
+
+
+def test_rerun_with_unchanged_files_skips_parsing(tmp_path, mocker):
+    file_paths = {"AAPL": str(tmp_path / "AAPL.csv"), "MSFT": str(tmp_path / "MSFT.csv")}
+    descriptions = {"AAPL": "Apple Inc.", "MSFT": "Microsoft Corporation"}
+    write_prices(file_paths["AAPL"], '2023-01-02')
+    write_prices(file_paths["MSFT"], '2023-01-02', base=200.0)
+    cache = WeeklyCache(str(tmp_path / "cache"))
+
+    first = calculate_weekly_data(file_paths, descriptions, cache)
+    assert cache.misses == 2
+
+    read_csv = mocker.patch('pandas.read_csv', side_effect=AssertionError("should not parse"))
+    second = calculate_weekly_data(file_paths, descriptions, cache)
+
+    assert read_csv.call_count == 0
+    assert cache.hits == 2
+    assert second == first
+
+
+def test_changed_file_is_recomputed_and_merged(tmp_path):
+    file_paths = {"AAPL": str(tmp_path / "AAPL.csv"), "MSFT": str(tmp_path / "MSFT.csv")}
+    descriptions = {"AAPL": "Apple Inc.", "MSFT": "Microsoft Corporation"}
+    write_prices(file_paths["AAPL"], '2023-01-02')
+    write_prices(file_paths["MSFT"], '2023-01-02', base=200.0)
+    cache = WeeklyCache(str(tmp_path / "cache"))
+    calculate_weekly_data(file_paths, descriptions, cache)
+
+    write_prices(file_paths["MSFT"], '2023-01-02', periods=30, base=300.0)
+    content_changes, content_prices = calculate_weekly_data(file_paths, descriptions, cache)
+
+    assert cache.hits == 1  # AAPL reused, MSFT recomputed
+    assert content_prices == calculate_weekly_data(file_paths, descriptions)[1]
+    assert content_prices["data"][1]["timeseries"][0] > 300.0
+
+
+def test_lru_eviction(tmp_path):
+    cache = WeeklyCache(str(tmp_path / "cache"), max_entries=2)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    time.sleep(0.01)
+    assert cache.get("a") == [1]  # "a" becomes most recently used
+
+    cache.put("c", [3])
+
+    assert sorted(os.listdir(tmp_path / "cache")) == ["a.json", "c.json"]
+    assert cache.get("b") is None
+
+
+def test_size_bound_and_content_hash_key(tmp_path):
+    source = tmp_path / "AAPL.csv"
+    write_prices(str(source), '2023-01-02')
+    cache = WeeklyCache(str(tmp_path / "cache"), max_bytes=100, hash_contents=True)
+
+    key = cache.key(str(source), {"period": "W"})
+    os.utime(source, (0, 0))  # touching the file keeps the content hash key
+    assert cache.key(str(source), {"period": "W"}) == key
+    assert cache.key(str(source), {"period": "M"}) != key
+
+    cache.put("small", [1])
+    cache.put("large", list(range(100)))
+    assert os.listdir(tmp_path / "cache") == []  # both evicted to stay under max_bytes
+
+
+def test_put_and_key_skip_rescanning_and_rehashing(tmp_path, mocker):
+    source = tmp_path / "AAPL.csv"
+    write_prices(str(source), '2023-01-02')
+    cache = WeeklyCache(str(tmp_path / "cache"), max_entries=3, hash_contents=True)
+    scandir = mocker.patch('util_cache.os.scandir', side_effect=AssertionError("should not list the cache"))
+    sha256 = mocker.spy(util_cache.hashlib, 'sha256')
+
+    key = cache.key(str(source), {"period": "W"})
+    hashed = sha256.call_count
+    assert cache.key(str(source), {"period": "M"}) != key
+    assert sha256.call_count == hashed + 1  # only the key payload, not the unchanged file again
+    for i in range(5):
+        cache.put(f"k{i}", [i])
+
+    assert scandir.call_count == 0
+    assert sorted(os.listdir(tmp_path / "cache")) == ["k2.json", "k3.json", "k4.json"]
+    mocker.stopall()
+    # A reopened cache picks up the entries and their LRU order from disk
+    for name, used in (("k2", 2), ("k3", 1), ("k4", 3)):
+        os.utime(tmp_path / "cache" / f"{name}.json", (used, used))
+    reopened = WeeklyCache(str(tmp_path / "cache"), max_entries=3)
+    reopened.put("k5", [5])
+    assert sorted(os.listdir(tmp_path / "cache")) == ["k2.json", "k4.json", "k5.json"]
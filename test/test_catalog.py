@@ -0,0 +1,64 @@
+import os
+
+import pandas as pd
+
+from util_catalog import PriceCatalog, detect_date_column, detect_price_column
+
+
+def write_prices(folder, security, start, periods, columns=('Date', 'Close')):
+    dates = pd.bdate_range(start=start, periods=periods).strftime('%Y-%m-%d')
+    pd.DataFrame({columns[0]: dates, columns[1]: range(periods)}).to_csv(os.path.join(folder, f"{security}.csv"), index=False)
+
+
+def test_detect_columns():
+    assert detect_date_column(['Open', 'date', 'Close']) == 'date'
+    assert detect_price_column(['Date', 'Adj Close']) == 'Adj Close'
+    assert detect_price_column(['Date', 'Volume']) is None
+
+
+def test_catalog_indexes_once_and_persists(tmp_path):
+    write_prices(tmp_path, "AAPL", "2024-01-01", 30)
+    write_prices(tmp_path, "FUND", "2024-01-01", 10, columns=('AsOfDate', 'Price'))
+
+    catalog = PriceCatalog(str(tmp_path))
+    assert sorted(catalog.refresh()) == ["AAPL", "FUND"]
+    entry = catalog.lookup("FUND")
+    assert (entry["date_col"], entry["price_col"], entry["start"], entry["rows"]) == ("AsOfDate", "Price", "2024-01-01", 10)
+
+    # A new instance reads the saved index and has nothing to re-detect
+    reopened = PriceCatalog(str(tmp_path))
+    assert reopened.lookup("AAPL")["end"] == catalog.lookup("AAPL")["end"]
+    assert reopened.refresh() == []
+
+    # Changed files are re-indexed, deleted ones dropped
+    write_prices(tmp_path, "AAPL", "2024-01-01", 60)
+    os.remove(tmp_path / "FUND.csv")
+    assert reopened.refresh() == ["AAPL"]
+    assert reopened.lookup("AAPL")["rows"] == 60 and "FUND" not in reopened
+
+
+def test_catalog_reports_missing_and_stale(tmp_path):
+    write_prices(tmp_path, "FRESH", "2024-06-03", 20)
+    write_prices(tmp_path, "OLD", "2024-01-01", 20)
+    write_prices(tmp_path, "ODD", "2024-01-01", 5, columns=('Date', 'Volume'))
+    catalog = PriceCatalog(str(tmp_path))
+    catalog.refresh()
+
+    missing, stale = catalog.check(["FRESH", "OLD", "ODD", "NONE"], as_of="2024-06-28")
+
+    assert missing == ["ODD", "NONE"]
+    assert stale == ["OLD"]
+    assert catalog.file_paths(["NONE"]) == {"NONE": os.path.join(str(tmp_path), "NONE.csv")}
+
+
+def test_catalog_records_stock_splits(tmp_path):
+    dates = pd.bdate_range(start="2024-01-01", periods=10).strftime('%Y-%m-%d')
+    pd.DataFrame({'Date': dates, 'Close': 1.0, 'Stock Splits': [0.0] * 3 + [4.0] + [0.0] * 6}).to_csv(tmp_path / "NVDA.csv", index=False)
+    write_prices(tmp_path, "FUND", "2024-01-01", 10)
+
+    catalog = PriceCatalog(str(tmp_path))
+    catalog.refresh()
+
+    assert catalog.lookup("NVDA")["splits"] == [["2024-01-04", 4.0]]
+    assert catalog.lookup("FUND")["splits"] == []
+    assert PriceCatalog(str(tmp_path)).splits(["FUND", "NVDA", "MISSING"]) == [("NVDA", "2024-01-04", 4.0)]
@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from class_definition import ColumnarContent
+from util_data import calculate_weekly_content, calculate_weekly_data
+from util_ui import load_content, transform_data
+
+
+@pytest.mark.parametrize(
+    "json_file", ["testdata1.json", "testdata2.json", "testdata3.json", "test/baseline/baseline_changes.json", "test/baseline/baseline_prices.json"]
+)
+def test_round_trip_is_lossless(json_file):
+    content = load_content(json_file)
+
+    columnar = ColumnarContent.from_content(content)
+
+    assert columnar.values.dtype == np.float64
+    assert columnar.values.shape == (len(content["data"]), len(content["metadata"]["time"]))
+    assert columnar.to_content() == content
+    assert json.loads(json.dumps(columnar.to_content())) == content
+    pd.testing.assert_frame_equal(transform_data(columnar), transform_data(content), check_dtype=False)
+
+
+def test_ragged_and_missing_values_round_trip():
+    content = {
+        "metadata": {"name": "Ragged", "datatype": "price", "time": ["2024", "2025"]},
+        "data": [
+            {"id": "A", "description": "Full", "timeseries": [1.5, None], "total": 1.0},
+            {"id": "B", "description": "Empty", "timeseries": [], "total": 0.0},
+        ],
+    }
+
+    columnar = ColumnarContent.from_content(content)
+
+    assert list(columnar.lengths) == [2, 0]
+    assert np.isnan(columnar.values[0, 1]) and np.isnan(columnar.values[1]).all()
+    assert columnar.to_content() == content
+
+
+def test_slots_prevent_ad_hoc_attributes():
+    columnar = ColumnarContent("Empty", "return", [], [], [], np.empty((0, 0)))
+
+    with pytest.raises(AttributeError):
+        columnar.extra = 1
+
+
+def test_calculate_weekly_content_matches_dict_output(tmp_path):
+    dates = pd.date_range(start='2023-01-02', end='2023-02-28', freq='B')
+    pd.DataFrame({'Date': dates, 'Close': np.linspace(100, 120, len(dates))}).to_csv(tmp_path / "AAPL.csv", index=False)
+    pd.DataFrame({'Date': dates[:10], 'Close': np.linspace(50, 40, 10)}).to_csv(tmp_path / "SHORT.csv", index=False)
+    file_paths = {"AAPL": str(tmp_path / "AAPL.csv"), "SHORT": str(tmp_path / "SHORT.csv")}
+    descriptions = {"AAPL": "Apple Inc.", "SHORT": "Short History"}
+
+    content_changes, content_prices = calculate_weekly_content(file_paths, descriptions)
+    dict_changes, dict_prices = calculate_weekly_data(file_paths, descriptions)
+
+    assert content_changes.ids == ["AAPL", "SHORT"]
+    assert np.isnan(content_prices.values[1, 2:]).all()  # SHORT has two weeks, aligned to the first two periods
+    assert content_changes.to_content() == dict_changes
+    assert content_prices.to_content() == dict_prices
+    short_prices = dict_prices["data"][1]["timeseries"]
+    assert short_prices[2:] == [None] * (len(short_prices) - 2)
+    assert dict_prices["data"][1]["total"] == round(short_prices[1] - short_prices[0], 2)
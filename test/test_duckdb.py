@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+
+from test.test_ledger import load_ledger_module
+from util_data import calculate_period_contents
+
+duckdb = pytest.importorskip("duckdb")
+
+from util_duckdb import DuckCatalog, arrow_to_content  # noqa: E402
+
+
+def write_prices(file_path, seed, start='2024-01-01', periods=160):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start=start, periods=periods)
+    close = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates)))), 2)
+    pd.DataFrame({'Date': dates.strftime('%Y-%m-%d 00:00:00-05:00'), 'Open': close, 'Close': close}).to_csv(file_path, index=False)
+
+
+@pytest.fixture
+def price_dir(tmp_path):
+    for i, ticker in enumerate(["AAA", "BBB", "CCC"]):
+        write_prices(tmp_path / f"{ticker}.csv", i)
+    return tmp_path
+
+
+@pytest.fixture
+def ledger():
+    return pl.DataFrame(
+        {
+            "Account Name": ["IRA", "IRA", "IRA", "Roth IRA", "Taxable"],
+            "Security": ["AAA", "Cash", "AAA", "BBB", "CCC"],
+            "Entry Date": ["2024-01-10", "2024-01-10", "2024-03-15", "2024-02-01", "2024-01-02"],
+            "Qty": [10.0, 500.0, -4.0, 3.0, 7.0],
+            "Txn MV": [1000.0, 500.0, -400.0, 300.0, 700.0],  # same sign as Qty, see util_performance
+        }
+    )
+
+
+def test_weekly_returns_match_calculate_period_data(price_dir):
+    catalog = DuckCatalog(str(price_dir))
+    weekly = catalog.weekly_returns()
+    tickers = ["AAA", "BBB", "CCC"]
+    changes, prices = calculate_period_contents({ticker: str(price_dir / f"{ticker}.csv") for ticker in tickers}, {ticker: ticker for ticker in tickers})['W']
+
+    sql_prices = arrow_to_content(weekly, "Weekly Asset Prices", "price", "ticker", "week", "close")
+    sql_changes = arrow_to_content(weekly, "Prior Week Asset Returns", "return", "ticker", "week", "change")
+    assert sql_prices.ids == tickers and sql_prices.time == prices.time
+    np.testing.assert_allclose(sql_prices.values, prices.values)
+    # DuckDB rounds half away from zero, numpy half to even
+    np.testing.assert_allclose(sql_changes.values, changes.values, atol=0.011)
+
+
+def test_month_end_positions(price_dir, ledger):
+    catalog = DuckCatalog(str(price_dir), ledger)
+    positions = pl.from_arrow(catalog.month_end_positions("%IRA%"))
+
+    assert set(positions["account"].unique()) == {"IRA", "Roth IRA"}
+    aaa = positions.filter((pl.col("account") == "IRA") & (pl.col("security") == "AAA")).sort("month_end")
+    assert aaa["qty"].to_list() == [10.0, 10.0, 6.0]
+    march = pd.read_csv(price_dir / "AAA.csv")
+    march_close = march.loc[march['Date'].str[:10] <= '2024-03-31', 'Close'].iloc[-1]
+    assert aaa["price"][-1] == pytest.approx(march_close)
+    assert aaa["mv"][-1] == pytest.approx(6 * march_close)
+
+    cash = positions.filter(pl.col("security") == "Cash")
+    assert cash["price"].to_list() == [1.0, 1.0, 1.0] and cash["mv"].to_list() == [500.0, 500.0, 500.0]
+
+    by_month = pl.from_arrow(catalog.query("SELECT month_end, sum(mv) AS mv FROM month_end_positions('%IRA%') GROUP BY ALL ORDER BY month_end"))
+    assert by_month.height == 3
+    assert by_month["mv"][-1] == pytest.approx(positions.filter(pl.col("month_end") == by_month["month_end"][-1])["mv"].sum())
+
+
+def test_month_end_positions_restate_splits(tmp_path):
+    ledger_module = load_ledger_module()
+    # Same file and trades as the split test of the ledger module: 4-for-1 on 2024-03-04, 2-for-1 on 2024-06-03
+    dates = pd.bdate_range(start='2024-01-01', end='2024-07-31')
+    splits = np.where(dates == '2024-03-04', 4.0, np.where(dates == '2024-06-03', 2.0, 0.0))
+    pd.DataFrame({'Date': dates.strftime('%Y-%m-%d'), 'Close': 10.0, 'Dividends': 0.0, 'Stock Splits': splits}).to_csv(tmp_path / "XYZ.csv", index=False)
+    transactions = pl.DataFrame({"Account Name": ["IRA"] * 3, "Security": ["XYZ"] * 3, "Entry Date": ["2024-01-10", "2024-03-04", "2024-07-01"], "Qty": [10.0, 5.0, 1.0]})
+
+    positions = pl.from_arrow(DuckCatalog(str(tmp_path), transactions, split_adjust=True).month_end_positions("IRA"))
+    eom = ledger_module.compute_eom_position(transactions, "IRA", start_month="2024-01-01", end_month="Jul-24", price_dir=str(tmp_path), split_adjust=True)
+
+    assert positions["qty"].to_list() == eom["XYZ"].to_list() == [80.0, 80.0, 90.0, 90.0, 90.0, 90.0, 91.0]
+    assert positions["mv"].to_list() == eom["XYZ_MV"].to_list()
+    # Without split_adjust the booked quantities are kept, as in compute_eom_position
+    raw = pl.from_arrow(DuckCatalog(str(tmp_path), transactions).month_end_positions("IRA"))
+    assert raw["qty"].to_list() == [10.0, 10.0, 15.0, 15.0, 15.0, 15.0, 16.0]
+
+
+def test_empty_price_dir(tmp_path):
+    catalog = DuckCatalog(str(tmp_path))
+    assert catalog.weekly_returns().num_rows == 0
+    catalog.close()
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+
+import util_data
+from test.test_ledger import load_ledger_module
+from util_cache import WeeklyCache
+from util_catalog import PriceCatalog
+from util_data import calculate_period_contents
+from util_fx import FxConverter, load_fx_rates
+
+# EURUSD quotes on weekdays only; a EUR listing also trades on a day the FX file lacks
+FX_DATES = ['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05', '2024-01-08', '2024-01-09', '2024-02-29']
+FX_RATES = [1.10, 1.09, 1.095, 1.10, 1.08, 1.07, 1.05]
+
+
+@pytest.fixture
+def price_dir(tmp_path):
+    pd.DataFrame({'Date': FX_DATES, 'Close': FX_RATES}).to_csv(tmp_path / "EURUSD=X.csv", index=False)
+    pd.DataFrame({'Date': ['2023-12-29', '2024-01-03', '2024-01-06', '2024-01-09', '2024-03-01'], 'Close': [50.0, 51.0, 52.0, 53.0, 54.0]}).to_csv(
+        tmp_path / "SAP.DE.csv", index=False
+    )
+    pd.DataFrame({'Date': ['2023-12-29', '2024-01-03', '2024-01-09', '2024-03-01'], 'Close': [10.0, 11.0, 12.0, 13.0]}).to_csv(tmp_path / "SPY.csv", index=False)
+    return tmp_path
+
+
+def test_long_frame_is_converted_as_of_each_date(price_dir):
+    fx = FxConverter.from_catalog(PriceCatalog(str(price_dir)), {"SAP.DE": "EUR", "SPY": "USD"})
+    dates = pd.to_datetime(['2023-12-29', '2024-01-03', '2024-01-06', '2024-01-09', '2024-03-01', '2024-01-03'])
+    long_df = pd.DataFrame({'ticker': ["SAP.DE"] * 5 + ["SPY"], 'Date': dates, 'Close': [50.0, 51.0, 52.0, 53.0, 54.0, 11.0]})
+
+    converted = fx(long_df)
+
+    # Before the FX series: first rate; Saturday: Friday's rate; after it: last rate; USD: unchanged
+    np.testing.assert_allclose(converted['Close'], [50 * 1.10, 51 * 1.09, 52 * 1.10, 53 * 1.07, 54 * 1.05, 11.0])
+    assert converted['ticker'].tolist() == long_df['ticker'].tolist()
+
+
+def test_inverse_pair_and_missing_pair(price_dir):
+    catalog = PriceCatalog(str(price_dir))
+    rates, versions = load_fx_rates(catalog, ["USD"], "EUR")
+    np.testing.assert_allclose(rates['rate'], 1 / np.array(FX_RATES))
+    assert list(versions) == ["EURUSD=X"]
+
+    with pytest.raises(FileNotFoundError, match="GBPUSD=X"):
+        load_fx_rates(catalog, ["EUR", "GBP"], "USD")
+
+
+def test_period_contents_in_base_currency(price_dir):
+    file_paths = {"SAP.DE": str(price_dir / "SAP.DE.csv"), "SPY": str(price_dir / "SPY.csv")}
+    fx = FxConverter.from_catalog(PriceCatalog(str(price_dir)), {"SAP.DE": "EUR"})
+
+    changes, prices = calculate_period_contents(file_paths, {"SAP.DE": "SAP", "SPY": "SPY"}, ('M',), fx=fx)['M']
+    local_changes, local_prices = calculate_period_contents(file_paths, {"SAP.DE": "SAP", "SPY": "SPY"}, ('M',))['M']
+
+    assert prices.name == "Monthly Asset Prices in USD" and changes.name == "Monthly Asset Returns in USD"
+    assert prices.time == ['2023-12', '2024-01', '2024-03']
+    np.testing.assert_allclose(prices.values[0], [55.0, 56.71, 56.7])
+    np.testing.assert_array_equal(prices.values[1], local_prices.values[1])
+    assert changes.values[0][1] == pytest.approx(round((56.71 - 55.0) / 55.0 * 100, 2))
+
+
+def test_cache_keys_follow_each_tickers_own_rates(price_dir, mocker):
+    file_paths = {"SAP.DE": str(price_dir / "SAP.DE.csv"), "SPY": str(price_dir / "SPY.csv")}
+    descriptions = {"SAP.DE": "SAP", "SPY": "SPY"}
+    cache = WeeklyCache(str(price_dir / "cache"))
+    calculate_period_contents(file_paths, descriptions, ('M',), cache, fx=FxConverter.from_catalog(PriceCatalog(str(price_dir)), {"SAP.DE": "EUR"}))
+    read = mocker.spy(util_data, "_read_close_frame")
+
+    # Another currency joins the converter: neither ticker's entries change
+    pd.DataFrame({'Date': FX_DATES, 'Close': FX_RATES}).to_csv(price_dir / "GBPUSD=X.csv", index=False)
+    fx = FxConverter.from_catalog(PriceCatalog(str(price_dir)), {"SAP.DE": "EUR", "VOD.L": "GBP"})
+    assert fx.params("SPY") is None and list(fx.params("SAP.DE")["rates"]) == ["EURUSD=X"]
+    calculate_period_contents(file_paths, descriptions, ('M',), cache, fx=fx)
+    assert list(read.call_args.args[0]) == []
+
+    # The EUR rates are refreshed: only the EUR ticker is read again
+    pd.DataFrame({'Date': FX_DATES, 'Close': [rate + 0.01 for rate in FX_RATES]}).to_csv(price_dir / "EURUSD=X.csv", index=False)
+    fx = FxConverter.from_catalog(PriceCatalog(str(price_dir)), {"SAP.DE": "EUR", "VOD.L": "GBP"})
+    changes, prices = calculate_period_contents(file_paths, descriptions, ('M',), cache, fx=fx)['M']
+    assert list(read.call_args.args[0]) == ["SAP.DE"]
+    np.testing.assert_allclose(prices.values[0], [55.5, 57.24, 57.24])
+
+
+def test_eom_position_in_base_currency(price_dir):
+    ledger = load_ledger_module()
+    transactions = pl.DataFrame(
+        {
+            "Account Name": ["Intl", "Intl", "Intl"],
+            "Security": ["SAP.DE", "SPY", "Cash"],
+            "Entry Date": ["2024-01-03", "2024-01-03", "2024-01-03"],
+            "Qty": [10.0, 2.0, 100.0],
+        }
+    )
+    fx = FxConverter.from_catalog(PriceCatalog(str(price_dir)), {"SAP.DE": "EUR"})
+
+    eom = ledger.compute_eom_position(transactions, "Intl", start_month="2024-01-01", end_month="Feb-24", price_dir=str(price_dir), fx=fx)
+
+    # January: last SAP close 53 EUR at 1.07; February: still 53 EUR, at the 2024-02-29 rate
+    assert eom["SAP.DE_Price"].to_list() == pytest.approx([53 * 1.07, 53 * 1.05])
+    assert eom["SAP.DE_MV"].to_list() == pytest.approx([530 * 1.07, 530 * 1.05])
+    assert eom["SPY_Price"].to_list() == [12.0, 12.0]
+    assert eom["Total"].to_list() == pytest.approx([530 * 1.07 + 24 + 100, 530 * 1.05 + 24 + 100])
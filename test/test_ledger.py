@@ -0,0 +1,137 @@
+import importlib.util
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+
+from util_catalog import PriceCatalog
+from util_positions import PositionIndex, split_factors
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_ledger_module():
+    spec = importlib.util.spec_from_file_location("ledger", os.path.join(REPO_DIR, "test.py"))
+    ledger = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(ledger)
+    return ledger
+
+
+def make_transactions(n_rows, seed=0, n_accounts=10, n_securities=40):
+    """Synthetic ledger export ordered by entry date, as custodian exports are"""
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64("2000-01-01") + np.sort(rng.integers(0, 9000, n_rows))
+    return pl.DataFrame(
+        {
+            "Account Name": np.array([f"Account {i}" for i in range(n_accounts)])[rng.integers(0, n_accounts, n_rows)],
+            "Security": np.array([f"SEC{i:03d}" for i in range(n_securities)])[rng.integers(0, n_securities, n_rows)],
+            "Entry Date": np.datetime_as_string(dates),
+            "Qty": np.round(rng.normal(0, 10, n_rows), 2),
+            "Txn MV": np.round(rng.normal(0, 1000, n_rows), 2),
+            "Memo": "transfer between accounts",
+        }
+    )
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_scan_matches_in_memory_positions(tmp_path, suffix):
+    ledger = load_ledger_module()
+    transactions = make_transactions(20_000)
+    # Rows the in-memory version skips
+    transactions = pl.concat([transactions, pl.DataFrame({"Account Name": ["Account 1"], "Security": ["SEC000"], "Entry Date": [None], "Qty": [5.0], "Txn MV": [0.0], "Memo": [""]})])
+    path = str(tmp_path / f"ledger{suffix}")
+    transactions.write_csv(path) if suffix == ".csv" else transactions.write_parquet(path)
+
+    for account in ("Account 1", None):
+        expected = ledger.compute_monthly_positions(transactions, account) if account else pl.concat(
+            [ledger.compute_monthly_positions(transactions, name) for name in sorted(transactions["Account Name"].unique())]
+        )
+        result = ledger.scan_monthly_positions(path, account)
+        assert result.columns == expected.columns
+        assert result["Month"].to_list() == expected["Month"].to_list()
+        np.testing.assert_allclose(result["End of Month Qty"].to_numpy(), expected["End of Month Qty"].to_numpy(), atol=1e-6)
+
+
+MEMORY_CAPPED_RUN = """
+import importlib.util, resource, sys
+cap = int(sys.argv[3]) * 2**20
+resource.setrlimit(resource.RLIMIT_DATA, (cap, cap))
+spec = importlib.util.spec_from_file_location("ledger", "test.py")
+ledger = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(ledger)
+import datetime
+import polars as pl
+if sys.argv[2] == "scan":
+    result = ledger.scan_monthly_positions(sys.argv[1])
+elif sys.argv[2] == "scan-splits":
+    # A split of every other security, some of them twice
+    splits = pl.DataFrame(
+        {
+            "Security": [f"SEC{i:03d}" for i in range(0, 40, 2)] + [f"SEC{i:03d}" for i in range(0, 40, 8)],
+            "Split Date": [datetime.date(2010, 1, 4)] * 20 + [datetime.date(2018, 6, 1)] * 5,
+            "Split Factor": [4.0] * 20 + [2.0] * 5,
+        }
+    ).sort("Split Date")
+    result = ledger.scan_monthly_positions(sys.argv[1], splits=splits)
+else:
+    result = ledger.compute_monthly_positions(pl.read_csv(sys.argv[1]), None)
+print(result.height)
+"""
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="RLIMIT_DATA caps heap allocations on Linux only")
+def test_scan_runs_in_capped_memory(tmp_path):
+    path = str(tmp_path / "ledger.csv")
+    make_transactions(2_000_000).write_csv(path)
+    cap_mb = "220"
+
+    # One polars thread, so the cap does not depend on the machine's thread stacks and per-thread buffers
+    env = dict(os.environ, POLARS_MAX_THREADS="1")
+
+    def run(mode):
+        return subprocess.run([sys.executable, "-c", MEMORY_CAPPED_RUN, path, mode, cap_mb], cwd=REPO_DIR, env=env, capture_output=True, text=True)
+
+    for mode in ("scan", "scan-splits"):
+        scan = run(mode)
+        assert scan.returncode == 0, scan.stderr
+        assert int(scan.stdout.strip()) > 0
+    # The same cap is too small to load the export, so it is the streaming that keeps the scan within it
+    assert run("memory").returncode != 0
+
+
+def test_eom_position_restates_quantities_across_splits(tmp_path, mocker):
+    ledger = load_ledger_module()
+    # yfinance-style file: split-adjusted closes, 4-for-1 on 2024-03-04 and 2-for-1 on 2024-06-03
+    dates = pd.bdate_range(start='2024-01-01', end='2024-07-31')
+    splits = np.where(dates == '2024-03-04', 4.0, np.where(dates == '2024-06-03', 2.0, 0.0))
+    pd.DataFrame({'Date': dates.strftime('%Y-%m-%d'), 'Close': 10.0, 'Dividends': 0.0, 'Stock Splits': splits}).to_csv(tmp_path / "XYZ.csv", index=False)
+    transactions = pl.DataFrame(
+        {
+            "Account Name": ["IRA"] * 3,
+            "Security": ["XYZ"] * 3,
+            "Entry Date": ["2024-01-10", "2024-03-04", "2024-07-01"],
+            "Qty": [10.0, 5.0, 1.0],
+        }
+    )
+
+    positions = mocker.spy(ledger, "compute_monthly_positions")
+    eom = ledger.compute_eom_position(transactions, "IRA", start_month="2024-01-01", end_month="Jul-24", price_dir=str(tmp_path), split_adjust=True)
+    assert positions.call_count == 1
+    # Off by default: a ledger that books its splits keeps its quantities
+    raw = ledger.compute_eom_position(transactions, "IRA", start_month="2024-01-01", end_month="Jul-24", price_dir=str(tmp_path))
+
+    # 10 shares bought before both splits are 80 of today's shares; those bought on the first ex-date only double
+    assert eom["XYZ"].to_list() == [80.0, 80.0, 90.0, 90.0, 90.0, 90.0, 91.0]
+    assert eom["XYZ_MV"].to_list() == [800.0, 800.0, 900.0, 900.0, 900.0, 900.0, 910.0]
+    assert raw["XYZ"].to_list() == [10.0, 10.0, 15.0, 15.0, 15.0, 15.0, 16.0]
+
+    table = split_factors(PriceCatalog(str(tmp_path)), ["XYZ", "Cash"])
+    assert table["Split Factor"].to_list() == [8.0, 2.0]
+    # The position index restates quantities the same way when given the splits
+    month_ends = pd.date_range("2024-01-31", periods=7, freq="ME").date
+    assert PositionIndex(transactions, table).positions_over("IRA", month_ends)["XYZ"].to_list() == eom["XYZ"].to_list()
+    assert PositionIndex(transactions).positions_over("IRA", month_ends)["XYZ"].to_list() == raw["XYZ"].to_list()
@@ -1,10 +1,15 @@
+import io
 import os
+import numpy as np
 import pytest
 from pypdf import PdfReader
 import util_data
 from util_ui import transform_data
-from util_ui import PDF, create_table
+from util_rank import top_k
+from util_ui import PDF, create_table, _sparkline_path
+from util_ui import content_rows, declare_layout, measure_rows, render_tables, stream_table
 import json
+import re
 
 
 def setup_test_data(start_date, end_date, use_baseline=True):
@@ -115,3 +120,143 @@ def test_pdf_generation(test_dates):
 
     # Cleanup
     os.remove(test_pdf_path)
+
+
+def make_large_content(n_tickers, n_periods, datatype="return"):
+    time = [f"2024-W{i:03d}" for i in range(n_periods)]
+    data = [
+        {"id": f"T{i:03d}", "description": f"Asset {i}", "timeseries": [round(((i * 7 + j * 3) % 41 - 20) / 3, 2) for j in range(n_periods)], "total": float(i)}
+        for i in range(n_tickers)
+    ]
+    return {"metadata": {"name": "Large Table", "datatype": datatype, "time": time}, "data": data}
+
+
+def test_large_table_is_paginated_with_repeated_headers(tmp_path):
+    content = make_large_content(120, 60)
+    pdf = PDF(orientation="L")
+    pdf.add_page()
+
+    create_table(pdf, transform_data(content), content, pdf.get_y())
+    output_path = str(tmp_path / "large.pdf")
+    pdf.output(output_path)
+
+    pages = [page.extract_text() for page in PdfReader(output_path).pages]
+    assert len(pages) > 1
+    assert all("ID Description" in page for page in pages)
+    text = "\n".join(pages)
+    for period in content["metadata"]["time"] + ["Total"]:
+        assert period in text
+    assert "Large Table (cont.)" in text
+    assert text.count("Asset 119") > 1  # every column band lists every row
+    assert "Highest Return" in pages[-1] and "Lowest Return" in pages[-1]
+
+
+def test_column_bands_fit_page_width():
+    content = make_large_content(5, 104)
+    df = transform_data(content)
+    pdf = PDF(orientation="L")
+    pdf.add_page()
+    time_periods = list(df.columns)[2:]
+    layout = measure_rows(pdf, time_periods, content_rows(content), False)
+
+    available_width = pdf.w - pdf.l_margin - pdf.r_margin
+    bands = layout.column_bands(available_width)
+
+    assert sum(bands, []) == time_periods
+    assert len(bands) > 1
+    assert all(layout.id_width + layout.description_width + len(band) * layout.standard_return_width <= available_width for band in bands)
+
+
+def test_streamed_rows_match_dataframe_table(tmp_path):
+    content = make_large_content(30, 20)
+    df = transform_data(content)
+
+    outputs = []
+    for render in (lambda pdf: create_table(pdf, df, content, pdf.get_y()), lambda pdf: render_tables(pdf, iter([content]))):
+        pdf = PDF(orientation="L")
+        pdf.add_page()
+        render(pdf)
+        outputs.append(re.sub(r"/CreationDate \(D:\d+\)", "", pdf.output(dest='S')))
+    assert outputs[0] == outputs[1]
+
+
+def test_stream_table_from_generator_with_declared_layout():
+    time_periods = ["01-05", "01-12", "01-19"]
+    consumed = []
+
+    def rows():
+        for i in range(200):
+            consumed.append(i)
+            yield f"T{i}", f"Ticker {i}", [i - 100.0, 100.0 - i, float(i % 7)]
+
+    pdf = PDF(orientation="L")
+    pdf.add_page()
+    layout = declare_layout(pdf, time_periods, False, id_chars=4, description_chars=10)
+    end_y = stream_table(pdf, "Streamed", time_periods, rows(), pdf.get_y(), layout=layout)
+
+    assert consumed == list(range(200)) and end_y > 0
+    assert pdf.page > 1
+
+    # Column bands need one pass per band, which a one-shot generator can't provide
+    many_periods = [f"P{i}" for i in range(200)]
+    with pytest.raises(ValueError):
+        stream_table(pdf, "Too wide", many_periods, iter([("A", "B", [1.0] * 200)]), pdf.get_y(), layout=declare_layout(pdf, many_periods, False))
+
+
+def test_top_k_summary_rows_and_rank_shading():
+    content = make_large_content(40, 6)
+    df = transform_data(content)
+    time_periods = list(df.columns)[2:]
+
+    def render(**options):
+        pdf = PDF(orientation="L")
+        pdf.set_compression(False)
+        pdf.add_page()
+        create_table(pdf, df, content, pdf.get_y(), **options)
+        return pdf
+
+    default, top_three, shaded = render(), render(summary_rows=3), render(rank_shading=True)
+    values, ids = df[time_periods].to_numpy(dtype=float), df["ID"].to_numpy(dtype=object)
+    highest, lowest = ids[top_k(values, 3, largest=True)].T, ids[top_k(values, 3, largest=False)].T
+    text = top_three.output(dest='S')
+    for rank in range(3):
+        assert f"Highest Return #{rank + 1}" in text and f"Lowest Return #{rank + 1}" in text
+        assert all(f"({period_ids[rank]})" in text for period_ids in list(highest) + list(lowest))
+    assert "Highest Return #" not in default.output(dest='S')
+
+    # Shading changes the cell fills, not the text
+    fills = lambda pdf: re.findall(r"[\d.]+ [\d.]+ [\d.]+ rg", pdf.output(dest='S'))
+    text = lambda pdf: "".join(page.extract_text() for page in PdfReader(io.BytesIO(pdf.output(dest='S').encode('latin-1'))).pages)
+    assert fills(shaded) != fills(default)
+    assert text(shaded) == text(default)
+
+
+def test_sparkline_path_scales_and_breaks_at_gaps():
+    series = np.array([1.0, np.nan, 2.0, 3.0])
+    assert _sparkline_path(series.tobytes(), False, 30.0, 10.0) == "0.00 0.00 m 20.00 5.00 m 30.00 10.00 l S"
+    # Returns draw as growth of 1: +100% then -50% comes back to the start
+    assert _sparkline_path(np.array([100.0, -50.0]).tobytes(), True, 10.0, 4.0) == "0.00 4.00 m 10.00 0.00 l S"
+    assert _sparkline_path(np.array([5.0, 5.0]).tobytes(), False, 10.0, 4.0) == "0.00 2.00 m 10.00 2.00 l S"
+    assert _sparkline_path(np.array([np.nan, 5.0]).tobytes(), False, 10.0, 4.0) == ""
+
+
+def test_sparkline_column_is_drawn_once_per_row_and_cached():
+    content = make_large_content(30, 40)
+    df = transform_data(content)
+    _sparkline_path.cache_clear()
+
+    def render():
+        pdf = PDF(orientation="L")
+        pdf.set_compression(False)
+        pdf.add_page()
+        create_table(pdf, df, content, pdf.get_y(), sparklines=True)
+        return pdf.output(dest='S')
+
+    output = render()
+    n_bands = output.count("Large Table")
+    assert n_bands > 1
+    assert output.count(" cm ") == 30 * n_bands and output.count("(Trend)") == output.count("(ID)")
+    # Every series is drawn from the cache after its first row
+    assert _sparkline_path.cache_info().misses == len({tuple(item["timeseries"]) for item in content["data"]})
+    render()
+    assert _sparkline_path.cache_info().misses == len({tuple(item["timeseries"]) for item in content["data"]})
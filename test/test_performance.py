@@ -0,0 +1,82 @@
+import time
+
+import numpy as np
+import polars as pl
+
+import util_performance
+
+
+def test_time_weighted_return_ignores_flows():
+    # 10% growth each month; a 1000 deposit at the end of month 2 must not count as performance
+    values = np.array([[1000.0, 1100.0, 2210.0]])
+    flows = np.array([[0.0, 0.0, 1000.0]])
+
+    twr = util_performance.time_weighted_returns(values, flows, flow_weight=0.0)
+
+    np.testing.assert_allclose(twr, [1.1 * 1.1 - 1])
+
+
+def test_xirr_matches_known_rates():
+    # Invest 100, get 110 a year later -> 10%; invest 100 twice, get 231 two years after the first -> 10%
+    cash_flows = np.array([[-100.0, 0.0, 110.0], [-100.0, -100.0, 231.0], [-100.0, 0.0, 0.0]])
+
+    rates = util_performance.xirr(cash_flows, np.array([0.0, 1.0, 2.0]))
+
+    assert abs(rates[0] - (np.sqrt(1.1) - 1)) < 1e-9
+    assert abs(rates[1] - 0.1) < 1e-9
+    assert np.isnan(rates[2])
+
+
+def test_compute_performance_from_ledger():
+    ledger = pl.DataFrame(
+        {
+            "Account Name": ["A", "A", "A", "A", "A", "A", "B", "B"],
+            "Security": ["Cash", "XYZ", "Cash", "Cash", "Cash", "XYZ", "Cash", "Cash"],
+            "Entry Date": ["2024-01-05", "2024-01-06", "2024-01-06", "2024-02-15", "2024-02-15", "2024-02-15", "2024-01-02", "2024-03-02"],
+            "Qty": [1000.0, 10.0, -1000.0, 20.0, -20.0, 0.2, 500.0, 500.0],
+            "Txn MV": [None, 1000.0, None, None, None, 20.0, None, None],
+            "Description": ["Deposit", "Buy XYZ", "Buy XYZ", "Qualified Dividend XYZ", "Reinvest Shares XYZ", "Reinvest Shares XYZ", "Deposit", "Deposit"],
+        }
+    )
+    flows = util_performance.ledger_cash_flows(ledger)
+    # The buy of XYZ nets against its cash leg, the dividend is a return and so are the shares it bought back:
+    # A only has the 1000 deposit
+    assert flows.filter(pl.col("Account Name") == "A")["Flow"].to_list() == [1000.0]
+    # The reinvested shares are no new money for XYZ either
+    by_security = util_performance.ledger_cash_flows(ledger, by=("Account Name", "Security"))
+    assert by_security.filter(pl.col("Security") == "XYZ")["Flow"].to_list() == [1000.0]
+    # Without the description every Cash row without a security leg is a flow
+    undescribed = util_performance.ledger_cash_flows(ledger.drop("Description"))
+    assert undescribed.filter(pl.col("Account Name") == "A")["Flow"].to_list() == [1000.0, 20.0]
+    assert util_performance.ledger_cash_flows(ledger, income=pl.col("Entry Date") == pl.date(2024, 1, 5)).filter(pl.col("Account Name") == "A")["Flow"].to_list() == [0.0, 20.0]
+
+    values = pl.DataFrame(
+        {
+            "Account Name": ["A"] * 3 + ["B"] * 3,
+            "_MonthSort": ["2024-01", "2024-02", "2024-03"] * 2,
+            "Value": [1000.0, 1100.0, 1210.0, 500.0, 500.0, 1000.0],
+        }
+    )
+
+    performance = util_performance.compute_performance(values, flows)
+
+    assert performance["Account Name"].to_list() == ["A", "B"]
+    assert performance["TWR"].to_list() == [21.0, 0.0]
+    assert abs(performance["IRR"][0] - round((1.1**12 - 1) * 100, 2)) < 0.01
+    assert performance["IRR"][1] == 0.0
+
+
+def test_performance_of_hundreds_of_accounts_is_fast():
+    rng = np.random.default_rng(1)
+    n_accounts, n_months = 500, 12 * 25
+    growth = np.cumprod(1 + rng.normal(0.006, 0.04, (n_accounts, n_months)), axis=1)
+    flows = np.where(rng.random((n_accounts, n_months)) < 0.1, rng.normal(0, 200, (n_accounts, n_months)), 0.0)
+    values = 10_000 * growth + np.cumsum(flows, axis=1)
+
+    start = time.perf_counter()
+    twr = util_performance.time_weighted_returns(values, flows)
+    irr = util_performance.money_weighted_returns(values, flows)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.0
+    assert np.isfinite(twr).all() and np.isfinite(irr).mean() > 0.99
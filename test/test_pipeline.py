@@ -0,0 +1,126 @@
+import asyncio
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import util_pipeline
+from util_cache import WeeklyCache
+from util_data import calculate_period_contents
+from util_pipeline import period_pipeline
+from util_validate import PriceValidator
+
+
+def write_history(file_path, seed):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start='2024-01-01', periods=200)
+    close = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates)))), 2)
+    pd.DataFrame({'Date': dates.strftime('%Y-%m-%d'), 'Close': close, 'Dividends': 0.0}).to_csv(file_path, index=False)
+
+
+def make_watchlist(tmp_path, n):
+    file_paths = {f"T{i}": os.path.join(tmp_path, f"T{i}.csv") for i in range(n)}
+    descriptions = {ticker: f"Ticker {ticker}" for ticker in file_paths}
+    return file_paths, descriptions
+
+
+def test_pipeline_matches_batch_aggregation(tmp_path):
+    file_paths, descriptions = make_watchlist(tmp_path, 6)
+
+    def download(ticker):
+        write_history(file_paths[ticker], seed=int(ticker[1:]))
+
+    contents = asyncio.run(period_pipeline(file_paths, descriptions, download, freqs=('W', 'M'), max_downloads=3, queue_size=2))
+    expected = calculate_period_contents(file_paths, descriptions, freqs=('W', 'M'))
+
+    for freq in ('W', 'M'):
+        for actual, reference in zip(contents[freq], expected[freq]):
+            assert actual.ids == reference.ids and actual.time == reference.time
+            np.testing.assert_array_equal(actual.values, reference.values)
+            np.testing.assert_array_equal(actual.totals, reference.totals)
+
+
+def test_pipeline_overlaps_downloads_with_parsing(tmp_path):
+    file_paths, descriptions = make_watchlist(tmp_path, 8)
+    delay = 0.2
+
+    def download(ticker):
+        time.sleep(delay)
+        write_history(file_paths[ticker], seed=int(ticker[1:]))
+
+    started = time.perf_counter()
+    contents = asyncio.run(period_pipeline(file_paths, descriptions, download, max_downloads=8))
+    elapsed = time.perf_counter() - started
+
+    # Eight 0.2 s downloads in sequence would take 1.6 s on their own
+    assert elapsed < 4 * delay
+    assert len(contents['W'][0]) == 8
+
+
+def test_pipeline_propagates_download_errors(tmp_path):
+    file_paths, descriptions = make_watchlist(tmp_path, 3)
+
+    def download(ticker):
+        raise ConnectionError(ticker)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(period_pipeline(file_paths, descriptions, download))
+
+
+def test_pipeline_reuses_cached_tickers(tmp_path, mocker):
+    file_paths, descriptions = make_watchlist(tmp_path, 4)
+    for i, file_path in enumerate(file_paths.values()):
+        write_history(file_path, seed=i)
+    cache = WeeklyCache(str(tmp_path / "cache"))
+
+    first = asyncio.run(period_pipeline(file_paths, descriptions, freqs=('W', 'M'), cache=cache))
+    write_history(file_paths["T2"], seed=7)  # only T2 changes
+    parse = mocker.spy(util_pipeline, "_parse")
+    second = asyncio.run(period_pipeline(file_paths, descriptions, freqs=('W', 'M'), cache=cache))
+
+    assert [call.args[0] for call in parse.call_args_list] == ["T2"]
+    expected = calculate_period_contents(file_paths, descriptions, freqs=('W', 'M'))
+    for freq in ('W', 'M'):
+        for actual, reference in zip(second[freq], expected[freq]):
+            assert actual.ids == reference.ids and actual.time == reference.time
+            np.testing.assert_array_equal(actual.values, reference.values)
+    assert not np.array_equal(first['W'][1].values[2], second['W'][1].values[2])
+
+
+def test_pipeline_replays_cached_issues(tmp_path):
+    file_paths, descriptions = make_watchlist(tmp_path, 3)
+    for i, file_path in enumerate(file_paths.values()):
+        write_history(file_path, seed=i)
+    raw = pd.read_csv(file_paths["T1"])
+    raw.loc[20, 'Close'] = -1.0
+    raw.to_csv(file_paths["T1"], index=False)
+    cache = WeeklyCache(str(tmp_path / "cache"))
+
+    reports = []
+    for _ in range(2):
+        validator = PriceValidator()
+        asyncio.run(period_pipeline(file_paths, descriptions, cache=cache, validator=validator))
+        reports.append(validator.report())
+
+    assert cache.hits >= 3 and "T1: non_positive x1" in reports[0]
+    assert reports[1] == reports[0]
+
+
+def test_total_return_run_downloads_unadjusted_closes(tmp_path, mocker):
+    file_paths, descriptions = make_watchlist(tmp_path, 2)
+    calls = []
+
+    def download_ticker_data(ticker, start_date, end_date, auto_adjust=True, update_catalog=True):
+        calls.append(auto_adjust)
+        write_history(file_paths[ticker], seed=int(ticker[1:]))
+
+    mocker.patch.object(util_pipeline, 'download_ticker_data', download_ticker_data)
+    mocker.patch.object(util_pipeline, 'get_price_dir', return_value=str(tmp_path))
+
+    contents = util_pipeline.run_period_pipeline(file_paths, descriptions, '2024-01-01', '2024-12-31', total_return=True)
+
+    assert calls == [False, False]
+    # The mock writes no 'Adj Close' column, so there are no raw closes to reinvest dividends into
+    assert contents['W'][0].name == "Prior Week Asset Returns"
@@ -0,0 +1,79 @@
+import importlib.util
+import os
+
+import numpy as np
+import polars as pl
+
+from util_positions import PositionIndex
+
+
+def make_ledger(rows):
+    return pl.DataFrame(rows, schema=["Account Name", "Security", "Entry Date", "Qty"], orient="row")
+
+
+LEDGER = make_ledger(
+    [
+        ("IRA", "AAPL", "2024-01-10", 10.0),
+        ("IRA", "AAPL", "2024-01-10", 5.0),
+        ("IRA", "AAPL", "2024-03-01", -15.0),
+        ("IRA", "Cash", "2024-01-02", 1000.0),
+        ("IRA", "Cash", "2024-01-10", -600.0),
+        ("Brokerage", "MSFT", "2024-02-15", 3.0),
+        ("Brokerage", "MSFT", None, 99.0),
+    ]
+)
+
+
+def test_position_as_of_uses_change_points():
+    index = PositionIndex(LEDGER)
+
+    assert index.accounts == ["Brokerage", "IRA"]
+    assert index.quantity_as_of("IRA", "AAPL", "2024-01-09") == 0.0
+    assert index.quantity_as_of("IRA", "AAPL", "2024-01-10") == 15.0
+    assert index.position_as_of("IRA", "2024-02-29") == {"AAPL": 15.0, "Cash": 400.0}
+    assert index.position_as_of("IRA", "2024-03-01") == {"Cash": 400.0}
+    assert index.position_as_of("IRA", "2024-03-01", include_zero=True)["AAPL"] == 0.0
+    assert index.quantity_as_of("Nobody", "AAPL", "2024-03-01") == 0.0
+
+    changes = index.changes_between("IRA", "AAPL", "2024-02-01", "2024-12-31")
+    assert changes["Qty"].to_list() == [15.0, 0.0]
+
+
+def test_positions_over_matches_monthly_cumulative_sum():
+    spec = importlib.util.spec_from_file_location("ledger", os.path.join(os.path.dirname(os.path.dirname(__file__)), "test.py"))
+    ledger = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(ledger)
+    rng = np.random.default_rng(5)
+    dates = np.datetime64("2020-01-01") + np.sort(rng.integers(0, 1000, 500))
+    transactions = pl.DataFrame(
+        {
+            "Account Name": ["IRA"] * 500,
+            "Security": rng.choice(["A", "B", "C"], 500),
+            "Entry Date": dates.astype(str),
+            "Qty": rng.integers(-5, 10, 500).astype(float),
+        }
+    )
+    monthly = ledger.compute_monthly_positions(transactions, "IRA")
+    index = PositionIndex(transactions)
+
+    month_ends = [(np.datetime64(month, "M") + 1).astype("datetime64[D]") - 1 for month in monthly["_MonthSort"].to_list()]
+    grid = index.positions_over("IRA", month_ends)
+
+    for row, (security, expected) in enumerate(zip(monthly["Security"], monthly["End of Month Qty"])):
+        assert grid[security][row] == expected
+
+
+def test_append_extends_and_back_dates_incrementally():
+    index = PositionIndex(LEDGER)
+
+    index.append(make_ledger([("IRA", "AAPL", "2024-04-01", 7.0), ("Brokerage", "GOOG", "2024-04-01", 1.0)]))
+    assert index.quantity_as_of("IRA", "AAPL", "2024-12-31") == 7.0
+    assert index.securities("Brokerage") == ["GOOG", "MSFT"]
+
+    # A correction dated before existing change points shifts every later quantity
+    index.append(make_ledger([("IRA", "AAPL", "2024-02-01", 2.0), ("IRA", "AAPL", "2024-01-10", 1.0)]))
+    assert index.quantity_as_of("IRA", "AAPL", "2024-01-10") == 16.0
+    assert index.quantity_as_of("IRA", "AAPL", "2024-02-01") == 18.0
+    assert index.quantity_as_of("IRA", "AAPL", "2024-03-01") == 3.0
+    assert index.quantity_as_of("IRA", "AAPL", "2024-12-31") == 10.0
+    assert len(index) == 4
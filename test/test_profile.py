@@ -0,0 +1,80 @@
+import pstats
+
+import numpy as np
+import pytest
+
+from util_profile import PROFILER, finish_profiling, profiled, record_rows, stage, start_profiling
+
+
+@profiled("square")
+def square_all(values):
+    record_rows(len(values))
+    return np.asarray(values) ** 2
+
+
+@pytest.fixture(autouse=True)
+def reset_profiler():
+    yield
+    PROFILER.disable()
+    PROFILER.reset()
+
+
+def test_disabled_profiler_records_nothing():
+    with stage("outer"):
+        result = square_all([1, 2, 3])
+
+    assert list(result) == [1, 4, 9]
+    assert PROFILER.records == {}
+
+
+def test_stage_breakdown_with_rows_and_memory():
+    start_profiling()
+    with stage("outer"):
+        square_all(list(range(10)))
+        with stage("allocate"):
+            buffer = np.ones(1_000_000)  # ~8 MB, tracked by tracemalloc
+            del buffer
+    square_all([1, 2])
+    report = finish_profiling()
+
+    records = PROFILER.records
+    assert records["square"].calls == 2
+    assert records["square"].rows == 12
+    assert records["allocate"].peak_memory >= 8_000_000
+    assert records["outer"].peak_memory >= records["allocate"].peak_memory  # nested stage peaks roll up
+    assert records["outer"].wall_time >= records["allocate"].wall_time
+    assert "square" in report and "allocate" in report and "Total" in report
+
+
+def test_cprofile_dump(tmp_path):
+    output_path = str(tmp_path / "profile.prof")
+    start_profiling(use_cprofile=True)
+    square_all([1, 2, 3])
+    finish_profiling(output_path)
+
+    stats = pstats.Stats(output_path)
+    assert any(func[2] == "square_all" for func in stats.stats)
+
+
+def test_dump_without_cprofile_raises(tmp_path):
+    start_profiling()
+    with pytest.raises(RuntimeError):
+        finish_profiling(str(tmp_path / "profile.prof"))
+
+
+def test_stages_in_worker_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    start_profiling()
+    with stage("outer"):
+        with ThreadPoolExecutor(4) as executor:
+            list(executor.map(square_all, [list(range(1000))] * 8))
+        record_rows(5)
+    finish_profiling()
+
+    records = PROFILER.records
+    assert records["square"].calls == 8 and records["square"].rows == 8000
+    # Each thread has its own stage stack, so the main thread's rows stay with its own stage
+    assert records["outer"].rows == 5
+    # The process-wide tracemalloc peak is only attributed on the main thread
+    assert records["square"].peak_memory == 0
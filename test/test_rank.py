@@ -0,0 +1,68 @@
+import argparse
+
+import numpy as np
+import pytest
+
+from main_gen_pdf import non_negative_int
+from util_rank import RunningTopK, percentile_buckets, top_k
+
+
+def reference_top_k(values, k, largest):
+    """Full stable sort of each column: ties keep the earlier row, NaN never ranks"""
+    ranked = np.full((k, values.shape[1]), -1)
+    for j in range(values.shape[1]):
+        usable = np.flatnonzero(~np.isnan(values[:, j]))
+        order = usable[np.argsort(-values[usable, j] if largest else values[usable, j], kind='stable')][:k]
+        ranked[: len(order), j] = order
+    return ranked
+
+
+def make_values(n_rows=500, n_periods=12, seed=0):
+    rng = np.random.default_rng(seed)
+    values = np.round(rng.normal(0, 3, (n_rows, n_periods)), 1)  # one decimal, so ties are common
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[:, -1] = np.nan
+    return values
+
+
+def test_top_k_matches_full_sort():
+    values = make_values()
+    for k in (1, 3, 10, 600):
+        for largest in (True, False):
+            np.testing.assert_array_equal(top_k(values, k, largest), reference_top_k(values, k, largest))
+
+
+def test_running_top_k_matches_top_k_across_blocks():
+    values = make_values()
+    ids = [f"T{i}" for i in range(len(values))]
+    for largest in (True, False):
+        running = RunningTopK(values.shape[1], 5, largest, block=64)
+        for row_id, row in zip(ids, values):
+            running.add(row_id, row)
+        expected = np.append(np.array(ids, dtype=object), "")[top_k(values, 5, largest)]
+        assert running.ids().tolist() == expected.tolist()
+
+
+def test_top_k_ties_keep_the_earlier_row_and_empty_columns_rank_nothing():
+    values = np.array([[1.0, np.nan], [3.0, np.nan], [3.0, np.nan]])
+    np.testing.assert_array_equal(top_k(values, 1), [[1, -1]])
+    np.testing.assert_array_equal(top_k(values, 2, largest=False), [[0, -1], [1, -1]])
+
+
+def test_top_k_option_accepts_only_non_negative_counts():
+    assert non_negative_int("0") == 0 and non_negative_int("3") == 3
+    for value in ("-1", "two"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            non_negative_int(value)
+
+
+def test_percentile_buckets():
+    values = np.column_stack([np.arange(100.0), np.full(100, 2.0), np.full(100, np.nan)])
+    values[0, 1] = np.nan
+
+    buckets = percentile_buckets(values)
+
+    np.testing.assert_array_equal(buckets[:, 0], np.arange(100) // 10)
+    # A flat column sits in the middle; NaN gets no bucket
+    assert set(buckets[1:, 1]) == {4} and buckets[0, 1] == -1
+    assert (buckets[:, 2] == -1).all()
@@ -0,0 +1,41 @@
+import os
+
+from pypdf import PdfReader
+
+from class_definition import ColumnarContent
+from util_report import ReportJob, render_report, render_reports
+from util_ui import PDF, get_string_width, load_content
+
+BASELINE_FILES = [os.path.join("test", "baseline", "baseline_changes.json"), os.path.join("test", "baseline", "baseline_prices.json")]
+
+
+def extract_text(path):
+    return "".join(page.extract_text() for page in PdfReader(path).pages)
+
+
+def test_render_report_accepts_paths_dicts_and_columnar(tmp_path):
+    from_paths = render_report(BASELINE_FILES, str(tmp_path / "paths.pdf"))
+    from_dicts = render_report([load_content(path) for path in BASELINE_FILES], str(tmp_path / "dicts.pdf"))
+    from_columnar = render_report([ColumnarContent.from_content(load_content(path)) for path in BASELINE_FILES], str(tmp_path / "columnar.pdf"))
+
+    assert extract_text(from_paths) == extract_text(from_dicts) == extract_text(from_columnar)
+    assert "Prior Week Asset Returns" in extract_text(from_paths)
+
+
+def test_render_reports_in_parallel_matches_serial(tmp_path):
+    jobs = [ReportJob(BASELINE_FILES, str(tmp_path / f"parallel_{i}.pdf")) for i in range(4)]
+    serial_path = render_report(BASELINE_FILES, str(tmp_path / "serial.pdf"))
+
+    outputs = render_reports(jobs, max_workers=2)
+
+    assert outputs == [job.output_path for job in jobs]
+    assert all(extract_text(path) == extract_text(serial_path) for path in outputs)
+
+
+def test_cached_string_width_matches_fpdf():
+    pdf = PDF(orientation="L")
+    pdf.add_page()
+    for style, size in [("", 5), ("B", 6), ("B", 7)]:
+        pdf.set_font("Courier", style, size)
+        for text in ["ID", "Microsoft Corporation", "-18.3%", ""]:
+            assert get_string_width(pdf, text) == pdf.get_string_width(text)
@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+
+from util_data import calculate_period_data
+from util_server import MtimeCache, ReportService, make_server
+
+
+def write_prices(folder, ticker, scale=1.0):
+    dates = pd.bdate_range(start='2024-01-01', periods=60)
+    close = np.round(np.linspace(100, 130, len(dates)) * scale, 2)
+    pd.DataFrame({'Date': dates.strftime('%Y-%m-%d'), 'Close': close}).to_csv(os.path.join(folder, f"{ticker}.csv"), index=False)
+
+
+@pytest.fixture
+def server(tmp_path):
+    write_prices(tmp_path, "AAA")
+    write_prices(tmp_path, "BBB", 2.0)
+    ledger_path = tmp_path / "ledger.csv"
+    pl.DataFrame({"Account Name": ["IRA", "IRA"], "Security": ["AAA", "BBB"], "Entry Date": ["2024-01-05", "2024-02-05"], "Qty": [10.0, 3.0]}).write_csv(
+        ledger_path
+    )
+    service = ReportService(str(tmp_path), lambda: pl.read_csv(ledger_path), str(ledger_path))
+    httpd = make_server(service, port=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield service, f"http://127.0.0.1:{httpd.server_address[1]}", tmp_path
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(url):
+    with urllib.request.urlopen(url) as response:
+        return response.headers["Content-Type"], response.read()
+
+
+def test_content_is_served_from_warm_caches(server):
+    service, base_url, folder = server
+    file_paths = {"AAA": str(folder / "AAA.csv"), "BBB": str(folder / "BBB.csv")}
+
+    _, body = get(f"{base_url}/content?tickers=AAA,BBB&AAA=Alpha&freq=W")
+    payload = json.loads(body)
+    expected_changes, _ = calculate_period_data(file_paths, {"AAA": "Alpha", "BBB": "BBB"}, 'W')
+    assert payload["changes"] == expected_changes.to_content()
+    assert service.aggregates.misses == 2
+
+    started = time.perf_counter()
+    get(f"{base_url}/content?tickers=AAA,BBB&freq=W")
+    assert time.perf_counter() - started < 0.5
+    assert service.aggregates.misses == 2 and service.aggregates.hits == 2
+
+    # A rewritten file invalidates only its own entries
+    write_prices(folder, "BBB", 3.0)
+    os.utime(folder / "BBB.csv", ns=(time.time_ns(), time.time_ns() + 10**9))
+    _, body = get(f"{base_url}/content?tickers=AAA,BBB&freq=W")
+    assert service.aggregates.misses == 3
+    assert json.loads(body)["prices"]["data"][1]["timeseries"][0] == pytest.approx(3 * json.loads(body)["prices"]["data"][0]["timeseries"][0], abs=0.02)
+
+
+def test_report_positions_and_errors(server):
+    _, base_url, _ = server
+
+    content_type, body = get(f"{base_url}/report?tickers=AAA,BBB&periods=W,M")
+    assert content_type == "application/pdf" and body.startswith(b"%PDF")
+
+    _, body = get(f"{base_url}/positions?account=IRA&date=2024-01-31")
+    assert json.loads(body) == {"AAA": 10.0}
+
+    for path, status in (
+        ("/content?tickers=ZZZ", 404),
+        ("/content?tickers=AAA&freq=D", 400),
+        ("/nowhere", 404),
+        ("/content?tickers=../../x", 400),
+        ("/positions?account=IRA", 400),
+        ("/positions?account=IRA&date=June", 400),
+    ):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            get(f"{base_url}{path}")
+        assert error.value.code == status
+
+
+def test_unexpected_errors_answer_500(server):
+    _, base_url, folder = server
+    (folder / "EMPTY.csv").write_text("")  # e.g. truncated by a concurrent download
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        get(f"{base_url}/content?tickers=EMPTY")
+    assert error.value.code == 500 and "EmptyDataError" in json.loads(error.value.read())["error"]
+
+    # The daemon keeps serving
+    content_type, _ = get(f"{base_url}/health")
+    assert content_type == "application/json"
+
+
+def test_concurrent_misses_compute_once(tmp_path):
+    source = tmp_path / "AAA.csv"
+    source.write_text("Date,Close\n")
+    cache = MtimeCache()
+    calls = []
+
+    def compute():
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+        return len(calls)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("AAA", [str(source)], compute))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1 and results == [1, 1, 1, 1]
+    assert (cache.misses, cache.hits) == (1, 3)
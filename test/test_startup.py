@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only plotting, downloading or reading the .buffet config need; report and ledger startup must not import them
+HEAVY_MODULES = ("matplotlib", "yfinance", "requests", "yaml")
+
+# Modules only some functions of an entry point use (pandas, which main_gen_pdf needs anyway, imports dateutil itself)
+LAZY_MODULES = {"main_gen_pdf": (), "ledger": ("dateutil",)}
+
+# Cumulative import time budgets in seconds, with headroom over a typical run (about 0.6 s for main_gen_pdf, mostly pandas)
+IMPORT_BUDGETS = {
+    "main_gen_pdf": 1.5,
+    "ledger": 0.8,
+}
+
+IMPORT_STATEMENTS = {
+    "main_gen_pdf": "import main_gen_pdf",
+    "ledger": "import importlib.util\n"
+    "spec = importlib.util.spec_from_file_location('ledger', 'test.py')\n"
+    "spec.loader.exec_module(importlib.util.module_from_spec(spec))",
+}
+
+
+def import_profile(statement):
+    """Run `statement` in a fresh interpreter with -X importtime; return (imported module names, total seconds)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+    modules, total = set(), 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.add(name.strip())
+        if not name[1:].startswith(" "):  # nested imports are indented; their time is in their parent's cumulative time
+            total += int(cumulative) / 1e6
+    return modules, total
+
+
+@pytest.mark.parametrize("entry_point", list(IMPORT_STATEMENTS))
+def test_startup_skips_heavy_modules_and_meets_budget(entry_point):
+    modules, total = import_profile(IMPORT_STATEMENTS[entry_point])
+
+    assert not [name for name in modules if name.split(".")[0] in HEAVY_MODULES + LAZY_MODULES[entry_point]]
+    assert total < IMPORT_BUDGETS[entry_point]
+
+
+def test_lazy_modules_load_on_first_use():
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, util_data; assert 'yaml' not in sys.modules; util_data.yaml; assert 'yaml' in sys.modules"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
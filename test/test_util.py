@@ -1,5 +1,7 @@
 from util_data import download_file_and_compare, process_data_from_fred, Status, create_dual_axis_plot, calculate_weekly_data
+from util_data import calculate_period_contents, calculate_period_data, total_return_factors
 import os
+import pytest
 import pandas as pd
 import numpy as np
 import matplotlib
@@ -275,3 +277,112 @@ def calculate_weekly_data_single_week(tmp_path):
     assert len(content_prices["data"][0]["timeseries"]) == 1
     assert content_changes["data"][0]["total"] == 0  # No change in price
     assert content_prices["data"][0]["total"] == 0  # No change in price
+
+
+def test_calculate_period_data_year_qualified_keys(tmp_path):
+    """Periods from different years must not collide, and every window comes from one load."""
+    dates = pd.bdate_range(start='2023-12-18', end='2025-01-17')
+    close = np.linspace(100, 200, len(dates))
+    pd.DataFrame({'Date': dates, 'Close': close}).to_csv(tmp_path / "AAPL.csv", index=False)
+    pd.DataFrame({'Date': dates[200:], 'Close': close[200:] / 2}).to_csv(tmp_path / "LATE.csv", index=False)
+    file_paths = {"AAPL": str(tmp_path / "AAPL.csv"), "LATE": str(tmp_path / "LATE.csv")}
+    descriptions = {"AAPL": "Apple Inc.", "LATE": "Late Listing"}
+
+    contents = calculate_period_contents(file_paths, descriptions, freqs=('W', 'M', 'Q', 'Y'))
+
+    weekly_changes, weekly_prices = contents['W']
+    assert weekly_prices.time[:2] == ['2023-12-18', '2023-12-25']
+    assert '2024-01-08' in weekly_prices.time and '2025-01-06' in weekly_prices.time
+    assert len(weekly_prices.time) == len(set(weekly_prices.time))
+    assert contents['M'][1].time[0] == '2023-12' and contents['M'][1].time[-1] == '2025-01'
+    assert contents['Q'][1].time == ['2023-Q4', '2024-Q1', '2024-Q2', '2024-Q3', '2024-Q4', '2025-Q1']
+    annual_changes, annual_prices = contents['Y']
+    assert annual_changes.name == "Annual Asset Returns"
+    assert annual_prices.time == ['2023', '2024', '2025']
+    np.testing.assert_allclose(annual_prices.values[0], [close[dates.year == year][-1].round(2) for year in (2023, 2024, 2025)])
+    assert annual_changes.values[0, 0] == 0
+    assert annual_changes.values[0, 1] == round((annual_prices.values[0, 1] - annual_prices.values[0, 0]) / annual_prices.values[0, 0] * 100, 2)
+
+    # LATE starts mid 2024: aligned to the shared period keys, NaN before its first period
+    assert np.isnan(annual_prices.values[1, 0])
+    assert annual_changes.values[1, 1] == 0
+    assert weekly_changes.to_content()["data"][1]["timeseries"][0] is None
+
+
+def test_calculate_period_data_rejects_unknown_window(tmp_path):
+    with pytest.raises(ValueError):
+        calculate_period_data({}, {}, freq='D')
+
+
+def test_stacked_period_path_matches_per_ticker_reference(tmp_path):
+    """The stacked groupby/pivot path agrees with a straightforward per-ticker computation."""
+    rng = np.random.default_rng(seed=7)
+    file_paths, descriptions, reference = {}, {}, {}
+    for i, (start, periods) in enumerate([('2024-01-01', 300), ('2024-03-15', 120), ('2024-06-03', 40)]):
+        dates = pd.bdate_range(start=start, periods=periods)
+        close = np.round(50 + np.cumsum(rng.normal(0, 1, periods)), 2)
+        ticker = f"T{i}"
+        file_paths[ticker] = str(tmp_path / f"{ticker}.csv")
+        descriptions[ticker] = f"Ticker {i}"
+        pd.DataFrame({'Date': dates, 'Close': close}).to_csv(file_paths[ticker], index=False)
+        weekly = pd.Series(close, index=dates).groupby(dates.to_period('W')).last().round(2)
+        reference[ticker] = pd.Series(weekly.to_numpy(), index=weekly.index.start_time.strftime('%Y-%m-%d'))
+
+    content_changes, content_prices = calculate_period_data(file_paths, descriptions, 'W')
+
+    for row, ticker in enumerate(content_prices.ids):
+        prices = pd.Series(content_prices.values[row], index=content_prices.time).dropna()
+        pd.testing.assert_series_equal(prices, reference[ticker], check_names=False)
+        expected_changes = np.round(reference[ticker].pct_change().fillna(0).to_numpy() * 100, 2)
+        changes = content_changes.values[row][~np.isnan(content_changes.values[row])]
+        np.testing.assert_allclose(changes, expected_changes, atol=0.011)
+
+
+def test_total_return_factors_reinvest_dividends():
+    long_df = pd.DataFrame(
+        {
+            'ticker': ['A', 'A', 'A', 'B', 'B'],
+            'Date': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-01', '2024-01-02']),
+            'Close': [100.0, 100.0, 110.0, 50.0, 50.0],
+            'Dividends': [0.0, 2.0, 0.0, 0.0, 0.0],
+        }
+    )
+
+    factors = total_return_factors(long_df)
+
+    # Back-adjusted: the latest row of each ticker is 1, days before the ex-date are scaled down
+    np.testing.assert_allclose(factors, [100 / 102, 1.0, 1.0, 1.0, 1.0])
+
+
+def test_total_return_mode_includes_dividends(tmp_path):
+    """Raw closes (auto_adjust=False files) gain their dividends; already adjusted files are unchanged."""
+    dates = pd.bdate_range(start='2024-01-01', periods=15)
+    close = np.full(len(dates), 100.0)
+    dividends = np.zeros(len(dates))
+    dividends[7] = 1.0
+    raw = pd.DataFrame({'Date': dates, 'Close': close, 'Dividends': dividends, 'Stock Splits': 0.0, 'Adj Close': close})
+    raw.to_csv(tmp_path / "RAW.csv", index=False)
+    raw.drop(columns=['Adj Close']).to_csv(tmp_path / "ADJ.csv", index=False)
+    file_paths = {"RAW": str(tmp_path / "RAW.csv"), "ADJ": str(tmp_path / "ADJ.csv")}
+    descriptions = {"RAW": "Raw closes", "ADJ": "Adjusted closes"}
+
+    price_changes, _ = calculate_period_data(file_paths, descriptions, 'W')
+    tr_changes, tr_prices = calculate_period_data(file_paths, descriptions, 'W', total_return=True)
+
+    assert tr_changes.name == "Prior Week Asset Returns (Total Return)"
+    np.testing.assert_allclose(price_changes.totals, [0.0, 0.0])
+    assert tr_changes.totals[0] == 1.0
+    assert tr_changes.values[0, 1] == 1.0
+    assert tr_changes.totals[1] == 0.0
+    assert tr_prices.values[0, -1] == 100.0
+
+
+def test_total_return_mode_without_raw_closes_warns(tmp_path, capsys):
+    dates = pd.bdate_range(start='2024-01-01', periods=15)
+    pd.DataFrame({'Date': dates, 'Close': 100.0, 'Dividends': 0.0}).to_csv(tmp_path / "ADJ.csv", index=False)
+
+    tr_changes, _ = calculate_period_data({"ADJ": str(tmp_path / "ADJ.csv")}, {"ADJ": "Adjusted closes"}, 'W', total_return=True)
+
+    # Closes saved with the default auto_adjust already include dividends: the mode changes nothing
+    assert tr_changes.name == "Prior Week Asset Returns"
+    assert "no price file has an 'Adj Close' column" in capsys.readouterr().out
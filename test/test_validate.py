@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+import util_data
+from benchmarks.conftest import write_price_files
+from util_cache import WeeklyCache
+from util_data import calculate_period_contents
+from util_validate import PriceValidator, issue_report, quarantine_rows, validate_prices
+
+
+def make_long_frame(n_days=300, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start='2024-01-01', periods=n_days)
+    frames = []
+    for ticker in ("AAA", "BBB"):
+        # Fat-tailed returns, so only the injected ticks are spikes
+        close = np.round(100 * np.exp(np.cumsum(rng.standard_t(3, n_days) * 0.01)), 2)
+        frames.append(pd.DataFrame({'ticker': ticker, 'Date': dates, 'Close': close}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_clean_frame_has_no_issues():
+    assert validate_prices(make_long_frame()).empty
+    assert issue_report(validate_prices(make_long_frame())) == ""
+
+
+def test_each_check_flags_the_bad_rows():
+    long_df = make_long_frame()
+    long_df.loc[10, 'Close'] = 0.0
+    long_df.loc[20, 'Close'] = np.nan
+    long_df.loc[30, 'Close'] = long_df.loc[30, 'Close'] * 10  # bad tick
+    long_df = long_df.drop(index=range(100, 110))  # two trading weeks missing
+    duplicate = long_df.loc[[350]].assign(Close=1.0)  # re-written date: the later row wins
+    swapped = long_df.loc[[400, 401]].iloc[::-1]
+    long_df = pd.concat([long_df.loc[:349], duplicate, long_df.loc[350:399], swapped, long_df.loc[402:]])
+
+    issues = validate_prices(long_df)
+    by_check = {check: group for check, group in issues.groupby('check')}
+
+    assert sorted(by_check["non_positive"]['row']) == [10, 20]
+    assert by_check["spike"]['row'].tolist() == [30]
+    assert by_check["gap"]['row'].tolist() == [110] and by_check["gap"]['value'].tolist() == [10.0]
+    assert by_check["duplicate_date"]['row'].tolist() == [350] and by_check["duplicate_date"]['ticker'].tolist() == ["BBB"]
+    assert by_check["unordered_date"]['row'].tolist() == [400]
+    assert set(issues['check']) == {"non_positive", "spike", "gap", "duplicate_date", "unordered_date"}
+
+    report = issue_report(issues)
+    assert report.startswith(f"Price data issues: {len(issues)} in 2 tickers")
+    assert "AAA: gap x1 (from 2024-06-03), non_positive x2 (from 2024-01-15), spike x1 (from 2024-02-12)" in report
+
+
+def test_quarantine_drops_bad_rows_only():
+    long_df = make_long_frame()
+    long_df.loc[5, 'Close'] = -1.0
+    long_df.loc[40, 'Close'] = long_df.loc[40, 'Close'] / 20
+
+    clean = quarantine_rows(long_df, validate_prices(long_df))
+
+    assert len(clean) == len(long_df) - 2
+    assert 5 not in clean.index and 40 not in clean.index
+    assert validate_prices(clean).empty
+
+
+def test_validator_in_period_contents(tmp_path):
+    file_paths, descriptions = write_price_files(str(tmp_path), 3, 1)
+    expected = calculate_period_contents(file_paths, descriptions)['W']
+    raw = pd.read_csv(file_paths["T0001"])
+    raw.loc[50, 'Close'] = 0.0
+    raw.to_csv(file_paths["T0001"], index=False)
+
+    reporting = PriceValidator()
+    changes, _ = calculate_period_contents(file_paths, descriptions, validator=reporting)['W']
+    assert reporting.issues[['ticker', 'check']].values.tolist() == [["T0001", "non_positive"]]
+
+    quarantining = PriceValidator(quarantine=True)
+    changes, prices = calculate_period_contents(file_paths, descriptions, validator=quarantining)['W']
+    assert np.isfinite(changes.values).all()
+    np.testing.assert_array_equal(changes.values[[0, 2]], expected[0].values[[0, 2]])
+
+
+
+def test_cached_tickers_keep_their_issues(tmp_path, mocker):
+    file_paths, descriptions = write_price_files(str(tmp_path), 3, 1)
+    raw = pd.read_csv(file_paths["T0001"])
+    raw.loc[50, 'Close'] = 0.0
+    raw.to_csv(file_paths["T0001"], index=False)
+    cache = WeeklyCache(str(tmp_path / "cache"))
+
+    first = PriceValidator()
+    calculate_period_contents(file_paths, descriptions, cache=cache, validator=first)
+    read = mocker.spy(util_data, "_read_close_frame")
+    second = PriceValidator()
+    calculate_period_contents(file_paths, descriptions, cache=cache, validator=second)
+
+    assert read.call_args.args[0] == {}
+    assert second.report() == first.report() != ""
+    assert second.issues[['ticker', 'Date', 'check', 'value']].equals(first.issues[['ticker', 'Date', 'check', 'value']])
+    # Aggregates cached without validation are read again the first time the checks run
+    unchecked = WeeklyCache(str(tmp_path / "unchecked"))
+    calculate_period_contents(file_paths, descriptions, cache=unchecked)
+    third = PriceValidator()
+    calculate_period_contents(file_paths, descriptions, cache=unchecked, validator=third)
+    assert third.report() == first.report()
@@ -0,0 +1,109 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+
+from util_data import calculate_period_contents
+from util_watch import DependencyGraph, add_ledger_outputs, add_report
+
+
+def write_prices(file_path, seed):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start='2024-01-01', periods=120)
+    close = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates)))), 2)
+    pd.DataFrame({'Date': dates.strftime('%Y-%m-%d'), 'Close': close}).to_csv(file_path, index=False)
+
+
+def touch_later(file_path):
+    later = time.time_ns() + 10**9
+    os.utime(file_path, ns=(later, later))
+
+
+@pytest.fixture
+def universe(tmp_path):
+    file_paths = {f"T{i:03d}": str(tmp_path / f"T{i:03d}.csv") for i in range(200)}
+    for i, file_path in enumerate(file_paths.values()):
+        write_prices(file_path, i)
+    return file_paths
+
+
+def test_single_ticker_change_recomputes_only_its_path(tmp_path, universe):
+    graph = DependencyGraph()
+    first = dict(list(universe.items())[:150])
+    second = dict(list(universe.items())[150:])
+    add_report(graph, "first", first, {ticker: ticker for ticker in first}, str(tmp_path / "first.pdf"), ('W', 'M'))
+    add_report(graph, "second", second, {ticker: ticker for ticker in second}, str(tmp_path / "second.pdf"))
+
+    initial = graph.update()
+    assert "output:first" in initial and "output:second" in initial
+    assert graph.update() == []
+
+    write_prices(universe["T007"], seed=1000)
+    touch_later(universe["T007"])
+    started = time.perf_counter()
+    recomputed = graph.update()
+    elapsed = time.perf_counter() - started
+
+    assert set(recomputed) == {"frame:T007", "aggregate:T007:W", "aggregate:T007:M", "content:first:W", "content:first:M", "output:first"}
+    assert recomputed[0] == "frame:T007" and recomputed[-1] == "output:first"
+    assert elapsed < 1.0
+    expected = calculate_period_contents(first, {ticker: ticker for ticker in first}, ('W', 'M'))
+    np.testing.assert_array_equal(graph.value("content:first:M")[1].values, expected['M'][1].values)
+
+
+def test_ledger_outputs_follow_their_securities(tmp_path, universe):
+    ledger_path = tmp_path / "ledger.csv"
+    pl.DataFrame({"Account Name": ["IRA", "Roth"], "Security": ["T001", "T002"], "Entry Date": ["2024-01-05", "2024-01-05"], "Qty": [1.0, 2.0]}).write_csv(ledger_path)
+    calls, parses = [], []
+
+    def load_ledger(path):
+        parses.append(path)
+        return pl.read_csv(path)
+
+    def compute_eom(transactions, account):
+        calls.append(account)
+        return transactions.filter(pl.col("Account Name") == account)
+
+    graph = DependencyGraph()
+    outputs = add_ledger_outputs(graph, str(ledger_path), load_ledger, compute_eom, ["IRA", "Roth"], universe, str(tmp_path))
+    assert graph.update() == ["eom:IRA", "output:eom:IRA", "eom:Roth", "output:eom:Roth"]
+    assert len(parses) == 1
+    assert sorted(calls) == ["IRA", "Roth"] and all(os.path.exists(graph.value(name)) for name in outputs)
+
+    touch_later(universe["T002"])
+    assert graph.update() == ["eom:Roth", "output:eom:Roth"]
+
+    touch_later(str(ledger_path))
+    assert graph.update() == ["ledger", "eom:IRA", "output:eom:IRA", "eom:Roth", "output:eom:Roth"]
+    assert len(parses) == 2
+
+
+@pytest.mark.parametrize("damage", ["delete", "truncate"])
+def test_failed_recompute_keeps_value_and_retries(tmp_path, universe, damage, capsys):
+    file_paths = {ticker: universe[ticker] for ticker in ("T001", "T002")}
+    graph = DependencyGraph()
+    output = add_report(graph, "report", file_paths, {ticker: ticker for ticker in file_paths}, str(tmp_path / "report.pdf"))
+    graph.update()
+    before = graph.value("content:report:W")
+
+    if damage == "delete":
+        os.remove(file_paths["T001"])
+    else:
+        open(file_paths["T001"], "w").close()
+    assert graph.update() == []
+    assert set(graph.errors) == {"frame:T001"} and "frame:T001" in capsys.readouterr().out
+    assert graph.value("content:report:W") is before
+    # The file is fixed without its version changing again between polls: the failed nodes are retried anyway
+    write_prices(file_paths["T001"], seed=1)
+    assert graph.poll() == ["source:T001"]
+    assert graph.update() == ["frame:T001", "aggregate:T001:W", "content:report:W", output]
+    assert graph.errors == {} and graph.update() == []
+
+
+def test_graph_rejects_unknown_dependencies():
+    graph = DependencyGraph()
+    with pytest.raises(ValueError):
+        graph.add_node("derived", ["missing"], lambda value: value)
@@ -0,0 +1,161 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Optional
+
+from class_definition import ColumnarContent
+
+RISK_METRICS = ["Volatility", "Max Drawdown", "Sharpe", "Beta"]
+
+
+def period_returns(prices: np.ndarray) -> np.ndarray:
+    """
+    Simple period returns of a price matrix.
+
+    Args:
+        prices (np.ndarray): Assets x periods, NaN where an asset has no price
+
+    Returns:
+        np.ndarray: Assets x (periods - 1) returns, NaN where either price is missing
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return prices[:, 1:] / prices[:, :-1] - 1
+
+
+def rolling_volatility(returns: np.ndarray, window: int, periods_per_year: int = 52) -> np.ndarray:
+    """
+    Annualized rolling standard deviation of returns over a trailing window.
+
+    Returns:
+        np.ndarray: Assets x (periods - window + 1); a window with fewer than two returns is NaN
+    """
+    if returns.shape[1] < window:
+        return np.empty((returns.shape[0], 0))
+    windows = sliding_window_view(returns, window, axis=1)
+    counts = (~np.isnan(windows)).sum(axis=2)
+    means = np.nansum(windows, axis=2) / np.maximum(counts, 1)
+    squares = np.nansum((windows - means[..., None]) ** 2, axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volatility = np.sqrt(squares / (counts - 1)) * np.sqrt(periods_per_year)
+    return np.where(counts >= 2, volatility, np.nan)
+
+
+def max_drawdown(prices: np.ndarray) -> np.ndarray:
+    """Largest peak-to-trough decline of each asset, as a negative fraction (0 when prices never fall)."""
+    running_peak = np.fmax.accumulate(prices, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdowns = prices / running_peak - 1
+    deepest = np.min(np.where(np.isnan(drawdowns), np.inf, drawdowns), axis=1, initial=np.inf)
+    return np.where(np.isinf(deepest), np.nan, deepest)
+
+
+def _nan_mean_std(returns: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    counts = (~np.isnan(returns)).sum(axis=1)
+    means = np.nansum(returns, axis=1) / np.maximum(counts, 1)
+    squares = np.nansum((returns - means[:, None]) ** 2, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stds = np.where(counts >= 2, np.sqrt(squares / (counts - 1)), np.nan)
+    return np.where(counts >= 1, means, np.nan), stds
+
+
+def sharpe_ratio(returns: np.ndarray, risk_free_rate: float = 0.0, periods_per_year: int = 52) -> np.ndarray:
+    """Annualized Sharpe ratio of each asset; risk_free_rate is annual."""
+    means, stds = _nan_mean_std(returns - risk_free_rate / periods_per_year)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(stds > 0, means / stds * np.sqrt(periods_per_year), np.nan)
+
+
+def _pairwise_moments(x: np.ndarray, y: np.ndarray):
+    """
+    Pairwise-complete moments between the rows of x and the rows of y, computed with matrix products.
+
+    Only periods where both series have a value count towards each pair.
+    """
+    mask_x, mask_y = ~np.isnan(x), ~np.isnan(y)
+    x0, y0 = np.where(mask_x, x, 0.0), np.where(mask_y, y, 0.0)
+    mx, my = mask_x.astype(np.float64), mask_y.astype(np.float64)
+    n = mx @ my.T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_x = (x0 @ my.T) / n
+        mean_y = (mx @ y0.T) / n
+        cov = (x0 @ y0.T) / n - mean_x * mean_y
+        var_x = ((x0**2) @ my.T) / n - mean_x**2
+        var_y = (mx @ (y0**2).T) / n - mean_y**2
+    return n, cov, var_x, var_y
+
+
+def correlation_matrix(returns: np.ndarray) -> np.ndarray:
+    """Pairwise-complete Pearson correlation between all assets (assets x assets)."""
+    n, cov, var_x, var_y = _pairwise_moments(returns, returns)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.sqrt(var_x * var_y)
+    return np.where(n >= 2, np.clip(corr, -1.0, 1.0), np.nan)
+
+
+def beta(returns: np.ndarray, benchmark_returns: np.ndarray) -> np.ndarray:
+    """Beta of each asset versus a benchmark return series, over the periods both have a return."""
+    n, cov, _, var_benchmark = _pairwise_moments(returns, benchmark_returns[None, :])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = cov / var_benchmark
+    return np.where((n >= 2) & (var_benchmark > 0), result, np.nan)[:, 0]
+
+
+def risk_metrics(
+    content_prices: ColumnarContent,
+    benchmark_id: str = "SPY",
+    risk_free_rate: float = 0.0,
+    periods_per_year: int = 52,
+    benchmark: Optional[ColumnarContent] = None,
+) -> ColumnarContent:
+    """
+    Volatility, max drawdown, Sharpe ratio and beta of every asset of a price content.
+
+    Args:
+        content_prices (ColumnarContent): Period prices, e.g. the prices returned by calculate_period_data
+        benchmark_id (str): ID of the asset used as the market for beta
+        risk_free_rate (float): Annual risk-free rate used by the Sharpe ratio
+        periods_per_year (int): 52 for weekly, 12 for monthly, 4 for quarterly, 1 for annual prices
+        benchmark (Optional[ColumnarContent]): Prices of the same windows holding benchmark_id, for a benchmark
+            that is not one of the assets; its periods are matched to content_prices by label
+
+    Returns:
+        ColumnarContent: One row per asset; volatility and drawdown in percent, Sharpe and beta as ratios.
+            Without prices of the benchmark the Beta column is left out.
+    """
+    returns = period_returns(content_prices.values)
+    _, stds = _nan_mean_std(returns)
+    columns = [
+        np.round(stds * np.sqrt(periods_per_year) * 100, 2),
+        np.round(max_drawdown(content_prices.values) * 100, 2),
+        np.round(sharpe_ratio(returns, risk_free_rate, periods_per_year), 2),
+    ]
+    benchmark_prices = None
+    if benchmark_id in content_prices.ids:
+        benchmark_prices = content_prices.values[content_prices.ids.index(benchmark_id)]
+    elif benchmark is not None and benchmark_id in benchmark.ids:
+        row = benchmark.values[benchmark.ids.index(benchmark_id)]
+        positions = {label: i for i, label in enumerate(benchmark.time)}
+        benchmark_prices = np.array([row[positions[label]] if label in positions else np.nan for label in content_prices.time])
+    if benchmark_prices is not None:
+        columns.append(np.round(beta(returns, period_returns(benchmark_prices[None, :])[0]), 2))
+    return ColumnarContent("Risk Metrics", "statistic", RISK_METRICS[: len(columns)], content_prices.ids, content_prices.descriptions, np.column_stack(columns))
+
+
+def rolling_volatility_content(content_prices: ColumnarContent, window: int = 13, periods_per_year: int = 52) -> ColumnarContent:
+    """Annualized rolling volatility (percent) of every asset, one column per period ending a full window."""
+    volatility = rolling_volatility(period_returns(content_prices.values), window, periods_per_year)
+    time: List[str] = content_prices.time[window:]
+    return ColumnarContent(
+        f"Rolling {window}-Period Volatility (%)", "statistic", time, content_prices.ids, content_prices.descriptions, np.round(volatility * 100, 2)
+    )
+
+
+def correlation_content(content_prices: ColumnarContent, ids: Optional[List[str]] = None) -> ColumnarContent:
+    """Correlation of period returns between every pair of assets; columns are the asset IDs."""
+    correlations = np.round(correlation_matrix(period_returns(content_prices.values)), 2)
+    if ids is not None:
+        positions = [content_prices.ids.index(asset_id) for asset_id in ids]
+        correlations = correlations[np.ix_(positions, positions)]
+        descriptions = [content_prices.descriptions[i] for i in positions]
+    else:
+        ids, descriptions = content_prices.ids, content_prices.descriptions
+    return ColumnarContent("Return Correlations", "statistic", ids, ids, descriptions, correlations)
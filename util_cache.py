@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+CACHE_VERSION = 1
+
+
+class WeeklyCache:
+    """
+    On-disk, size-bounded LRU cache for per-ticker aggregation results.
+
+    Entries are JSON files named after a key derived from the source file (path, mtime and size, or
+    its content hash) and the aggregation parameters, so a changed source file or different parameters
+    never hit a stale entry. Reads refresh an entry's mtime, which is the LRU order used for eviction.
+    The directory is listed once when the cache is opened; after that the LRU order, entry count and
+    total size are kept in memory, so a put does not stat every entry.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 2000, max_bytes: int = 64 * 1024 * 1024, hash_contents: bool = False):
+        """
+        Args:
+            cache_dir (str): Directory holding the cache entries (created if missing)
+            max_entries (int): Maximum number of entries kept
+            max_bytes (int): Maximum total size of the entries in bytes
+            hash_contents (bool): Key on a SHA-256 of the source file instead of its mtime and size
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hash_contents = hash_contents
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        # key -> entry size, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        # source path -> (mtime_ns, size, SHA-256) of the version last hashed
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+        self._load_entries()
+
+    def _load_entries(self) -> None:
+        entries = [(entry.stat(), entry.name[:-5]) for entry in os.scandir(self.cache_dir) if entry.name.endswith('.json')]
+        for stat, key in sorted(entries, key=lambda item: item[0].st_mtime_ns):
+            self._entries[key] = stat.st_size
+        self._total_bytes = sum(self._entries.values())
+
+    def _digest(self, file_path: str) -> str:
+        stat = os.stat(file_path)
+        cached = self._digests.get(file_path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        with open(file_path, 'rb') as file:
+            digest = hashlib.sha256(file.read()).hexdigest()
+        self._digests[file_path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def key(self, file_path: str, params: Dict[str, Any]) -> str:
+        """Return the cache key for `file_path` aggregated with `params`."""
+        if self.hash_contents:
+            # Hashed once per file version; the key of an unchanged file is then as cheap as a stat
+            source = self._digest(os.path.abspath(file_path))
+        else:
+            stat = os.stat(file_path)
+            source = f"{os.path.abspath(file_path)}:{stat.st_mtime_ns}:{stat.st_size}"
+        payload = json.dumps({"source": source, "params": params, "version": CACHE_VERSION}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for `key`, or None on a miss."""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r') as file:
+                value = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        os.utime(entry_path)  # mark as most recently used
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        else:  # written by another process since this one listed the directory
+            self._track(key, os.path.getsize(entry_path))
+        self.hits += 1
+        return value
+
+    def _track(self, key: str, size: int) -> None:
+        self._total_bytes += size - self._entries.pop(key, 0)
+        self._entries[key] = size
+
+    def put(self, key: str, value: Any) -> None:
+        """Store `value` (JSON serializable) under `key` and evict least recently used entries if over budget."""
+        entry_path = self._entry_path(key)
+        tmp_path = f"{entry_path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(value, file)
+        os.replace(tmp_path, entry_path)
+        self._track(key, os.path.getsize(entry_path))
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            oldest, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._entry_path(oldest))
+            except FileNotFoundError:  # already evicted by another process
+                pass
+
+    def clear(self) -> None:
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.json'):
+                os.remove(entry.path)
+        self._entries.clear()
+        self._total_bytes = 0
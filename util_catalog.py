@@ -0,0 +1,168 @@
+import datetime
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+CATALOG_FILE = "catalog.json"
+CATALOG_VERSION = 2
+
+DATE_COLUMNS = ("date", "asofdate", "as_of_date")
+PRICE_COLUMNS = ("close", "adj close", "price")
+SPLIT_COLUMN = "Stock Splits"
+
+
+def detect_date_column(columns: Sequence[str]) -> Optional[str]:
+    """First column named like a date ('Date', 'AsOfDate', 'as_of_date'), case-insensitive."""
+    return next((column for column in columns if column.lower() in DATE_COLUMNS), None)
+
+
+def detect_price_column(columns: Sequence[str]) -> Optional[str]:
+    """First column named like a price ('Close', 'Adj Close', 'Price'), case-insensitive."""
+    return next((column for column in columns if column.lower() in PRICE_COLUMNS), None)
+
+
+class PriceCatalog:
+    """
+    Index of the <security>.csv price files of a directory, persisted next to them as catalog.json.
+
+    Each entry records the file's mtime and size, its detected date and price columns, first and last
+    date, row count and the stock splits of yfinance files ([date, ratio] pairs). Opening the catalog reads only the index; refresh() re-reads just the files that
+    are new or changed since they were indexed, so schema detection happens once per file version.
+    """
+
+    def __init__(self, price_dir: str, index_path: Optional[str] = None):
+        """
+        Args:
+            price_dir (str): Directory holding one <security>.csv per security
+            index_path (Optional[str]): Index file (default: <price_dir>/catalog.json)
+        """
+        self.price_dir = price_dir
+        self.index_path = index_path or os.path.join(price_dir, CATALOG_FILE)
+        self.entries: Dict[str, dict] = {}
+        try:
+            with open(self.index_path, 'r') as file:
+                index = json.load(file)
+            if index.get("version") == CATALOG_VERSION:
+                self.entries = index["entries"]
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    def __contains__(self, security: str) -> bool:
+        return security in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def path(self, security: str) -> str:
+        """Location of a security's price file (whether or not it exists)."""
+        entry = self.entries.get(security)
+        return entry["path"] if entry else os.path.join(self.price_dir, f"{security}.csv")
+
+    def lookup(self, security: str) -> Optional[dict]:
+        """Catalog entry of a security (path, date_col, price_col, start, end, rows, splits), or None if not indexed."""
+        return self.entries.get(security)
+
+    def _index_file(self, security: str, file_path: str, stat: os.stat_result) -> dict:
+        import polars as pl  # only needed when a file is new or changed
+
+        columns = pl.read_csv(file_path, n_rows=0).columns
+        date_col, price_col = detect_date_column(columns), detect_price_column(columns)
+        start = end = None
+        rows = 0
+        splits = []
+        if date_col:
+            columns_read = [date_col] + ([SPLIT_COLUMN] if SPLIT_COLUMN in columns else [])
+            df = pl.read_csv(file_path, columns=columns_read, schema_overrides={date_col: pl.Utf8, SPLIT_COLUMN: pl.Float64})
+            dates = df[date_col].str.slice(0, 10)
+            rows = dates.len()
+            start, end = dates.min(), dates.max()
+            if SPLIT_COLUMN in columns:
+                # yfinance writes the ratio (e.g. 4.0 for 4-for-1) on the ex-date and 0 on other days
+                split_rows = df.with_columns(dates.alias(date_col)).filter(pl.col(SPLIT_COLUMN) > 0)
+                splits = [[date, ratio] for date, ratio in split_rows.select([date_col, SPLIT_COLUMN]).iter_rows() if ratio != 1.0]
+        return {
+            "path": file_path,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "date_col": date_col,
+            "price_col": price_col,
+            "start": start,
+            "end": end,
+            "rows": rows,
+            "splits": splits,
+        }
+
+    def refresh(self, securities: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Bring the index up to date with the files on disk and save it if anything changed.
+
+        Args:
+            securities (Optional[Iterable[str]]): Only check these securities (default: every CSV in price_dir)
+
+        Returns:
+            List[str]: Securities that were (re)indexed
+        """
+        if securities is None:
+            names = [entry.name[:-4] for entry in os.scandir(self.price_dir) if entry.name.endswith('.csv')] if os.path.isdir(self.price_dir) else []
+            removed = [security for security in self.entries if security not in set(names)]
+        else:
+            names = list(securities)
+            removed = [security for security in names if security in self.entries and not os.path.exists(self.entries[security]["path"])]
+        for security in removed:
+            del self.entries[security]
+
+        updated = []
+        for security in names:
+            file_path = os.path.join(self.price_dir, f"{security}.csv")
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            entry = self.entries.get(security)
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                continue
+            self.entries[security] = self._index_file(security, file_path, stat)
+            updated.append(security)
+
+        if updated or removed:
+            self.save()
+        return updated
+
+    def save(self) -> None:
+        """Write the index atomically."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump({"version": CATALOG_VERSION, "entries": self.entries}, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def check(self, securities: Iterable[str], as_of: Optional[str] = None, max_age_days: int = 7) -> Tuple[List[str], List[str]]:
+        """
+        Find securities without a usable price file and those whose prices end too early.
+
+        Args:
+            securities (Iterable[str]): Securities the caller needs (e.g. a watchlist or the ledger's holdings)
+            as_of (Optional[str]): Date (YYYY-MM-DD) the prices should reach (default: today)
+            max_age_days (int): A file is stale when its last date is more than this many days before as_of
+
+        Returns:
+            Tuple[List[str], List[str]]: (missing, stale) securities; missing includes files without a
+                detectable date or price column
+        """
+        cutoff = (datetime.date.fromisoformat(as_of) if as_of else datetime.date.today()) - datetime.timedelta(days=max_age_days)
+        missing, stale = [], []
+        for security in securities:
+            entry = self.entries.get(security)
+            if not entry or not entry["date_col"] or not entry["price_col"] or not entry["rows"]:
+                missing.append(security)
+            elif datetime.date.fromisoformat(entry["end"]) < cutoff:
+                stale.append(security)
+        return missing, stale
+
+    def splits(self, securities: Iterable[str]) -> List[Tuple[str, str, float]]:
+        """(security, ex-date, ratio) of every indexed stock split of the securities, in date order per security."""
+        return [(security, date, ratio) for security in securities for date, ratio in sorted((self.entries.get(security) or {}).get("splits", []))]
+
+    def file_paths(self, securities: Iterable[str]) -> Dict[str, str]:
+        """Security to file path mapping, e.g. for calculate_period_contents."""
+        return {security: self.path(security) for security in securities}
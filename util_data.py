@@ -1,12 +1,32 @@
-import requests
+import importlib
 import os
 import pandas as pd
+import numpy as np
 from collections import namedtuple
-import matplotlib.pyplot as plt
-import yaml
-import yfinance as yf
-from typing import Dict, List
-from class_definition import Content
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+from class_definition import Content, ColumnarContent
+from util_cache import WeeklyCache
+from util_catalog import PriceCatalog
+from util_profile import profiled, record_rows, stage
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+    from util_fx import FxConverter
+    from util_validate import PriceValidator
+
+# Heavy dependencies only some entry points need; they are imported on first use so that baseline
+# report runs, which never plot or download, don't pay for them at startup.
+_LAZY_MODULES = {"plt": "matplotlib.pyplot", "yf": "yfinance", "requests": "requests", "yaml": "yaml"}
+
+
+def __getattr__(name: str):
+    """PEP 562 hook: util_data.plt / .yf / .requests / .yaml import their module on first access."""
+    if name in _LAZY_MODULES:
+        module = importlib.import_module(_LAZY_MODULES[name])
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 Status = namedtuple('Status', ['success', 'result'])
 
@@ -50,6 +70,8 @@ def download_file_and_compare(url, folder_path, file_name):
     if not os.path.exists(folder_path):
         os.makedirs(folder_path)  # pragma: no cover
 
+    import requests
+
     response = requests.get(url)
     if response.status_code == 200:
         file_path = os.path.join(folder_path, file_name)
@@ -155,7 +177,7 @@ def create_dual_axis_plot(
     y2_label: str,
     recession_df: pd.DataFrame | None = None,
     figsize: tuple = (12, 6),
-) -> tuple[plt.Figure, plt.Axes, plt.Axes]:
+) -> tuple["plt.Figure", "plt.Axes", "plt.Axes"]:
     """
     Create a dual-axis plot comparing two time series.
 
@@ -177,6 +199,8 @@ def create_dual_axis_plot(
     df1[date_column] = pd.to_datetime(df1[date_column])
     df2[date_column] = pd.to_datetime(df2[date_column])
 
+    import matplotlib.pyplot as plt
+
     fig, ax1 = plt.subplots(figsize=figsize)
 
     date_range = (min(df1[date_column].min(), df2[date_column].min()), max(df1[date_column].max(), df2[date_column].max()))
@@ -225,13 +249,26 @@ def get_finance_data_path():
     home_dir = os.path.expanduser("~")
     buffet_file = os.path.join(home_dir, ".buffet")
 
+    import yaml
+
     with open(buffet_file, "r") as file:
         config = yaml.safe_load(file)
 
     return config["finance_data"]
 
 
-def download_ticker_data(ticker_symbol: str, start_date: str, end_date: str):
+def get_price_dir():
+    """
+    Directory holding the <ticker>.csv daily price files, shared by the report and the ledger.
+
+    Returns:
+        str: <finance_data>/asset_prices
+    """
+    return os.path.join(get_finance_data_path(), "asset_prices")
+
+
+@profiled("download")
+def download_ticker_data(ticker_symbol: str, start_date: str, end_date: str, auto_adjust: bool = True, update_catalog: bool = True, decimals: int = 2):
     """
     Download historical data for a given ticker and save to CSV only if the file doesn't exist
 
@@ -239,12 +276,16 @@ def download_ticker_data(ticker_symbol: str, start_date: str, end_date: str):
         ticker_symbol (str): The stock ticker symbol (e.g., 'AAPL')
         start_date (str): Start date in 'YYYY-MM-DD' format
         end_date (str): End date in 'YYYY-MM-DD' format
+        auto_adjust (bool): Save dividend-adjusted closes (yfinance default). With False, Close excludes
+            dividends and an 'Adj Close' column is added, which total-return mode uses to reinvest them.
+        update_catalog (bool): Index the new file in the price catalog; concurrent downloaders pass False
+            and refresh the catalog once afterwards.
+        decimals (int): Decimals kept for prices; FX rates keep more (see util_fx)
 
     Returns:
         None
     """
-    finance_data_path = get_finance_data_path()
-    output_dir = os.path.join(finance_data_path, "asset_prices")
+    output_dir = get_price_dir()
     os.makedirs(output_dir, exist_ok=True)
 
     output_file = os.path.join(output_dir, f"{ticker_symbol}.csv")
@@ -255,111 +296,367 @@ def download_ticker_data(ticker_symbol: str, start_date: str, end_date: str):
         return
 
     # Create a Ticker object
+    import yfinance as yf
+
     ticker = yf.Ticker(ticker_symbol)
 
     # Download the data
-    data = ticker.history(start=start_date, end=end_date)
+    data = ticker.history(start=start_date, end=end_date, auto_adjust=auto_adjust)
+    record_rows(len(data))
 
     # Ensure dates are in ISO format and prices are rounded to 2 decimals
     data.index = data.index.strftime('%Y-%m-%d')  # Convert index to ISO format
-    data = data.round(2)  # Round all numeric columns to 2 decimals
+    data = data.round(decimals)  # Round all numeric columns to 2 decimals (by default)
 
     # Save to CSV
     data.to_csv(output_file)
+    if update_catalog:
+        PriceCatalog(output_dir).refresh([ticker_symbol])
     print(f"Data saved to {output_file}")
 
 
-def calculate_weekly_data(file_paths: Dict[str, str], descriptions: Dict[str, str]) -> tuple[Content, Content]:
+# Label format of each aggregation window; year-qualified so keys never collide across years and sort chronologically.
+# Weekly periods are labelled with the date of their Monday.
+PERIOD_LABELS = {'W': '%Y-%m-%d', 'M': '%Y-%m', 'Q': '%Y-Q%q', 'Y': '%Y'}
+
+PERIOD_TITLES = {
+    'W': ("Prior Week Asset Returns", "Weekly Asset Prices"),
+    'M': ("Monthly Asset Returns", "Monthly Asset Prices"),
+    'Q': ("Quarterly Asset Returns", "Quarterly Asset Prices"),
+    'Y': ("Annual Asset Returns", "Annual Asset Prices"),
+}
+
+
+def _period_params(freq: str, total_return: bool = False, extra: Optional[dict] = None) -> dict:
+    """Aggregation parameters; part of the cache key so a change here invalidates cached results"""
+    params = {"aggregation": "period_close", "period": freq, "label": PERIOD_LABELS[freq], "decimals": 2, "total_return": total_return}
+    # Stages that change the aggregated values (quarantine, currency conversion) add their own parameters
+    return {**params, **extra} if extra else params
+
+
+def _read_close_frame(file_paths: Dict[str, str], total_return: bool = False) -> pd.DataFrame:
     """
-    Calculate weekly data for given file paths and descriptions.
+    Read the daily closes of several tickers into one long frame.
 
     Args:
         file_paths (Dict[str, str]): A dictionary mapping tickers to file paths.
-        descriptions (Dict[str, str]): A dictionary mapping tickers to descriptions.
+        total_return (bool): Also read the Dividends column of files holding unadjusted closes (those
+            saved with auto_adjust=False, recognizable by their 'Adj Close' column). Files from the
+            default download already have dividends in Close and get zero Dividends.
 
     Returns:
-        tuple[Content, Content]: Weekly changes and weekly prices content.
+        pd.DataFrame: Columns ticker, Date (timezone-naive), Close and, in total-return mode, Dividends;
+            tickers with empty files have no rows
     """
-    all_weekly_data: Dict[str, List[dict]] = {}
-    common_dates = set()
-
-    # Process each stock's data
+    wanted = {'Date', 'Close', 'Dividends', 'Adj Close'} if total_return else {'Date', 'Close'}
+    frames = []
     for ticker, file_path in file_paths.items():
-        # Read CSV into pandas DataFrame
-        df = pd.read_csv(file_path)
-
-        # Handle empty DataFrame case
-        if df.empty:
-            all_weekly_data[ticker] = []
+        with stage("csv_parse"):
+            df = pd.read_csv(file_path, usecols=lambda column: column in wanted)
+            record_rows(len(df))
+        if total_return:
+            has_raw_close = 'Adj Close' in df.columns and 'Dividends' in df.columns
+            df = df.assign(Dividends=df['Dividends'].fillna(0.0) if has_raw_close else 0.0).drop(columns=['Adj Close'], errors='ignore')
+        if not df.empty:
+            frames.append(df.assign(ticker=ticker))
+
+    if not frames:
+        columns = {'ticker': pd.Series(dtype=str), 'Date': pd.Series(dtype='datetime64[ns]'), 'Close': pd.Series(dtype=float)}
+        if total_return:
+            columns['Dividends'] = pd.Series(dtype=float)
+        return pd.DataFrame(columns)
+
+    long_df = pd.concat(frames, ignore_index=True)
+    # Dates are written as YYYY-MM-DD, possibly followed by a time and UTC offset; keep the local calendar date
+    long_df['Date'] = pd.to_datetime(long_df['Date'].astype(str).str.slice(0, 10), format='%Y-%m-%d')
+    record_rows(len(long_df))
+    return long_df
+
+
+def _has_raw_closes(file_paths: Dict[str, str]) -> bool:
+    """
+    Whether total-return mode can change any of the closes: True if some file was saved with
+    auto_adjust=False, i.e. its header has an 'Adj Close' column. Only the header line is read.
+    """
+    for file_path in file_paths.values():
+        try:
+            with open(file_path, 'r') as file:
+                if 'Adj Close' in [column.strip() for column in file.readline().split(',')]:
+                    return True
+        except OSError:
             continue
+    return False
 
-        # Parse dates after confirming data exists
-        df['Date'] = pd.to_datetime(df['Date'])
-        df['Date'] = df['Date'].dt.tz_localize(None)  # Remove timezone info
 
-        # Group by week, using the first day of each week
-        df['Week'] = df['Date'].dt.to_period('W').astype(str)
-        weekly_groups = df.groupby('Week', as_index=False)
+def _total_return_title(file_paths: Dict[str, str], total_return: bool) -> bool:
+    """Title the tables total return only if some file holds the unadjusted closes the mode reinvests dividends into"""
+    if not total_return or _has_raw_closes(file_paths):
+        return total_return
+    print("Warning: --total-return has no effect: no price file has an 'Adj Close' column (download them with auto_adjust=False)")
+    return False
 
-        # Calculate weekly data
-        weekly_data = []
 
-        # Process each week's data
-        for _, group in weekly_groups:
-            end_price = round(float(group['Close'].iloc[-1]), 2)  # 2 decimals
-            date = pd.to_datetime(group['Date'].iloc[0])  # Use first date of the week
-            start_date = date.strftime('%m-%d')  # MM-DD format
+def total_return_factors(long_df: pd.DataFrame) -> np.ndarray:
+    """
+    Cumulative dividend reinvestment factor of every row of a long daily frame, in one vectorized pass.
 
-            weekly_data.append({'date': start_date, 'change': 0, 'close': end_price})  # Will be calculated in the next pass
-            common_dates.add(start_date)
+    Each ex-dividend day multiplies the factor by (Close + Dividends) / Close, i.e. the dividend is
+    reinvested at that day's close. Factors are back-adjusted so each ticker's latest row is 1, which
+    makes Close * factor comparable to yfinance's 'Adj Close'. Splits need no factor because yfinance
+    closes and dividends are already split-adjusted.
 
-        # Calculate weekly changes
-        for i in range(len(weekly_data)):
-            if i > 0:
-                prev_price = weekly_data[i - 1]['close']
-                curr_price = weekly_data[i]['close']
-                weekly_data[i]['change'] = round(((curr_price - prev_price) / prev_price) * 100, 2)
+    Args:
+        long_df (pd.DataFrame): Columns ticker, Date, Close and Dividends, sorted by ticker and Date
 
-        all_weekly_data[ticker] = weekly_data
+    Returns:
+        np.ndarray: One factor per row
+    """
+    close = long_df['Close'].to_numpy(dtype=np.float64)
+    dividends = long_df['Dividends'].to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.where(dividends > 0, (close + dividends) / close, 1.0)
+    cumulative = pd.Series(growth, index=long_df.index).groupby(long_df['ticker'], sort=False).cumprod()
+    latest = cumulative.groupby(long_df['ticker'], sort=False).transform('last')
+    return (cumulative / latest).to_numpy()
 
-    # Sort dates to ensure consistent order
-    dates = sorted(list(common_dates))
 
-    # Create content structures for both files
-    content_changes: Content = {"metadata": {"name": "Prior Week Asset Returns", "datatype": "return", "time": dates}, "data": []}
-    content_prices: Content = {"metadata": {"name": "Weekly Asset Prices", "datatype": "price", "time": dates}, "data": []}
+def _aggregate_periods(long_df: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """
+    Aggregate a long daily frame into period closes with one groupby over all tickers.
 
-    # Add data for each ticker
-    for ticker in file_paths.keys():
-        weekly_data = all_weekly_data[ticker]
+    Args:
+        long_df (pd.DataFrame): Columns ticker, Date and Close, as returned by _read_close_frame
+        freq (str): 'W', 'M', 'Q' or 'Y'
+
+    Returns:
+        pd.DataFrame: Columns ticker, label and close (last close of the period, 2 decimals), sorted by ticker and period
+    """
+    df = long_df.sort_values(['ticker', 'Date'], kind='stable')
+    df = df.assign(period=df['Date'].dt.to_period(freq))
+    agg = df.groupby(['ticker', 'period'], sort=True)['Close'].last().reset_index()
+
+    # Format each distinct period once rather than every row
+    codes, periods = pd.factorize(agg['period'])
+    period_index = pd.PeriodIndex(periods)
+    labels = period_index.start_time.strftime(PERIOD_LABELS[freq]) if freq == 'W' else period_index.strftime(PERIOD_LABELS[freq])
+    return pd.DataFrame({'ticker': agg['ticker'], 'label': np.asarray(labels, dtype=object)[codes], 'close': agg['Close'].round(2)})
 
-        # Handle empty data case
-        if not weekly_data:
-            content_changes["data"].append({"id": ticker, "description": descriptions[ticker], "timeseries": [], "total": 0})
-            content_prices["data"].append({"id": ticker, "description": descriptions[ticker], "timeseries": [], "total": 0})
+
+def _build_period_contents(
+    freq: str, tickers: List[str], descriptions: Dict[str, str], period_df: pd.DataFrame, total_return: bool = False, currency: Optional[str] = None
+) -> tuple[ColumnarContent, ColumnarContent]:
+    """
+    Turn a long (ticker, label, close) frame into period-aligned change and price content.
+
+    Changes are computed on the long frame per ticker (versus the ticker's previous period, 0 for its
+    first one) and both matrices are then filled with a single scatter by (ticker, period) codes.
+    """
+    period_df = period_df.sort_values(['ticker', 'label'], kind='stable')
+    close = period_df['close'].to_numpy(dtype=np.float64)
+    prev_close = period_df.groupby('ticker', sort=False)['close'].shift(1).to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = np.where(np.isnan(prev_close), 0.0, np.round((close - prev_close) / prev_close * 100, 2))
+
+    row_codes = pd.Categorical(period_df['ticker'], categories=tickers).codes
+    column_codes, time = pd.factorize(period_df['label'], sort=True)
+    time = [str(label) for label in time]
+    changes = np.full((len(tickers), len(time)), np.nan)
+    prices = np.full((len(tickers), len(time)), np.nan)
+    changes[row_codes, column_codes] = change
+    prices[row_codes, column_codes] = close
+
+    # Totals compare each ticker's last and first period close; tickers with fewer than two periods get 0
+    valid = ~np.isnan(prices)
+    rows = np.arange(len(tickers))
+    first_price = prices[rows, valid.argmax(axis=1)] if len(time) else np.zeros(len(tickers))
+    last_price = prices[rows, len(time) - 1 - valid[:, ::-1].argmax(axis=1)] if len(time) else np.zeros(len(tickers))
+    has_total = valid.sum(axis=1) >= 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total_change = np.where(has_total, np.round((last_price - first_price) / first_price * 100, 2), 0.0)
+    total_price_delta = np.where(has_total, np.round(last_price - first_price, 2), 0.0)
+
+    # Tickers without data keep an empty timeseries
+    lengths = np.where(valid.any(axis=1), len(time), 0)
+    ticker_descriptions = [descriptions[ticker] for ticker in tickers]
+    changes_name, prices_name = PERIOD_TITLES[freq]
+    if total_return:
+        changes_name, prices_name = f"{changes_name} (Total Return)", f"{prices_name} (Total Return)"
+    if currency:
+        changes_name, prices_name = f"{changes_name} in {currency}", f"{prices_name} in {currency}"
+    content_changes = ColumnarContent(changes_name, "return", time, tickers, ticker_descriptions, changes, lengths, total_change)
+    content_prices = ColumnarContent(prices_name, "price", time, tickers, ticker_descriptions, prices, lengths, total_price_delta)
+    return content_changes, content_prices
+
+
+def _cache_extra(ticker: str, validator: Optional["PriceValidator"] = None, fx: Optional["FxConverter"] = None) -> dict:
+    """Cache key parameters of the stages that change a ticker's aggregated values, see _period_params"""
+    extra = {}
+    if validator is not None and validator.params():
+        extra["quarantine"] = validator.params()
+    if fx is not None and fx.params(ticker):
+        extra["fx"] = fx.params(ticker)
+    return extra
+
+
+def _cached_periods(cache: WeeklyCache, file_path: str, freqs: Sequence[str], total_return: bool = False, extra: Optional[dict] = None) -> Optional[list]:
+    """Cached [labels, closes] of one ticker for every window, or None when any window is missing and the ticker has to be read"""
+    hits = [cache.get(cache.key(file_path, _period_params(freq, total_return, extra))) for freq in freqs]
+    return None if any(hit is None for hit in hits) else hits
+
+
+def _store_period_cache(
+    cache: WeeklyCache, agg: pd.DataFrame, file_paths: Dict[str, str], extras: Dict[str, dict], freq: str, total_return: bool = False
+) -> None:
+    """Write the slice of the aggregated frame of each ticker of `extras` (its _cache_extra) to the cache, tickers without data as empty."""
+    labels = agg['label'].to_numpy()
+    closes = agg['close'].to_numpy()
+    positions = agg.groupby('ticker', sort=False).indices
+    for ticker, extra in extras.items():
+        rows = positions.get(ticker, [])
+        cache.put(cache.key(file_paths[ticker], _period_params(freq, total_return, extra)), [labels[rows].tolist(), closes[rows].tolist()])
+
+
+def _cached_issues(cache: WeeklyCache, file_path: str, ticker: str, validator: "PriceValidator") -> Optional[pd.DataFrame]:
+    """Issues found in a ticker's file when it was last read with the same checks, or None when they are not cached"""
+    from util_validate import issues_from_records
+
+    records = cache.get(cache.key(file_path, validator.issue_params()))
+    return None if records is None else issues_from_records(ticker, records)
+
+
+def _store_issues(cache: WeeklyCache, issues: pd.DataFrame, file_paths: Dict[str, str], tickers: List[str], validator: "PriceValidator") -> None:
+    """Write each loaded ticker's issues to the cache (tickers without issues as empty), keyed like its aggregates by the file version"""
+    from util_validate import issue_records
+
+    positions = issues.groupby('ticker', sort=False).indices
+    for ticker in tickers:
+        cache.put(cache.key(file_paths[ticker], validator.issue_params()), issue_records(issues.iloc[positions.get(ticker, [])]))
+
+
+@profiled("period_aggregation")
+def calculate_period_contents(
+    file_paths: Dict[str, str],
+    descriptions: Dict[str, str],
+    freqs: Sequence[str] = ('W',),
+    cache: Optional[WeeklyCache] = None,
+    total_return: bool = False,
+    validator: Optional["PriceValidator"] = None,
+    fx: Optional["FxConverter"] = None,
+) -> Dict[str, tuple[ColumnarContent, ColumnarContent]]:
+    """
+    Calculate period changes and prices for several aggregation windows from a single data load.
+
+    All tickers are stacked into one long (ticker, Date, Close) frame, aggregated with one groupby per
+    window and pivoted once into the date-aligned matrix, so the cost grows with the number of rows
+    rather than with Python-level work per ticker.
+
+    Args:
+        file_paths (Dict[str, str]): A dictionary mapping tickers to file paths.
+        descriptions (Dict[str, str]): A dictionary mapping tickers to descriptions.
+        freqs (Sequence[str]): Aggregation windows, any of 'W' (weekly), 'M' (monthly), 'Q' (quarterly) and 'Y' (annual).
+        cache (Optional[WeeklyCache]): Cache of per-ticker period results; tickers whose source file and
+            parameters are unchanged for every requested window are not read at all.
+        total_return (bool): Aggregate closes adjusted for reinvested dividends (see total_return_factors)
+            instead of plain closes. The mode is part of the cache key, so both are cached side by side.
+        validator (Optional[PriceValidator]): Checks the raw closes of the tickers that are read before
+            they are aggregated, collecting issues and optionally quarantining bad rows. The issues of
+            tickers served from the cache were cached when they were first read and are recorded again.
+        fx (Optional[FxConverter]): Convert closes quoted in other currencies to fx.base before they are
+            aggregated, so prices and returns are in the base currency.
+
+    Returns:
+        Dict[str, tuple[ColumnarContent, ColumnarContent]]: Changes and prices content per window, with
+            year-qualified period keys (e.g. '2025-01-06', '2025-01', '2025-Q1', '2025').
+    """
+    for freq in freqs:
+        if freq not in PERIOD_LABELS:
+            raise ValueError(f"Unsupported aggregation window '{freq}', expected one of {list(PERIOD_LABELS)}")
+
+    tickers = list(file_paths.keys())
+    extras = {ticker: _cache_extra(ticker, validator, fx) for ticker in tickers}
+
+    # Cached (ticker, label, close) columns per window; a ticker missing any window is loaded again
+    cached: Dict[str, Dict[str, list]] = {freq: {'ticker': [], 'label': [], 'close': []} for freq in freqs}
+    to_load = []
+    for ticker in tickers:
+        hits = None if cache is None else _cached_periods(cache, file_paths[ticker], freqs, total_return, extras[ticker])
+        if cache is not None and hits is not None and validator is not None:
+            issues = _cached_issues(cache, file_paths[ticker], ticker, validator)
+            if issues is None:
+                hits = None  # Aggregates cached without these checks: read the ticker again to validate it
+            else:
+                validator.record(issues)
+        if hits is None:
+            to_load.append(ticker)
             continue
+        for freq, (labels, closes) in zip(freqs, hits):
+            cached[freq]['ticker'].extend([ticker] * len(labels))
+            cached[freq]['label'].extend(labels)
+            cached[freq]['close'].extend(closes)
+
+    long_df = _read_close_frame({ticker: file_paths[ticker] for ticker in to_load}, total_return)
+    if validator is not None:
+        long_df, issues = validator.check(long_df)
+        validator.record(issues)
+        if cache is not None:
+            _store_issues(cache, issues, file_paths, to_load, validator)
+    if fx is not None:
+        long_df = fx(long_df)
+    if total_return:
+        long_df = long_df.sort_values(['ticker', 'Date'], kind='stable')
+        long_df['Close'] = long_df['Close'] * total_return_factors(long_df)
+
+    contents = {}
+    titled = _total_return_title(file_paths, total_return)
+    for freq in freqs:
+        agg = _aggregate_periods(long_df, freq)
+        if cache is not None:
+            _store_period_cache(cache, agg, file_paths, {ticker: extras[ticker] for ticker in to_load}, freq, total_return)
+        period_df = pd.concat([agg, pd.DataFrame(cached[freq])], ignore_index=True) if cached[freq]['ticker'] else agg
+        contents[freq] = _build_period_contents(freq, tickers, descriptions, period_df, titled, fx.base if fx is not None else None)
+    return contents
+
+
+def calculate_period_data(
+    file_paths: Dict[str, str], descriptions: Dict[str, str], freq: str = 'W', cache: Optional[WeeklyCache] = None, total_return: bool = False
+) -> tuple[ColumnarContent, ColumnarContent]:
+    """
+    Calculate changes and prices aggregated by week, month, quarter or year.
 
-        # Create date-to-data mappings for the dates we have
-        date_to_change = {d['date']: d['change'] for d in weekly_data}
-        date_to_price = {d['date']: d['close'] for d in weekly_data}
+    Args:
+        file_paths (Dict[str, str]): A dictionary mapping tickers to file paths.
+        descriptions (Dict[str, str]): A dictionary mapping tickers to descriptions.
+        freq (str): 'W' (weekly), 'M' (monthly), 'Q' (quarterly) or 'Y' (annual).
+        cache (Optional[WeeklyCache]): Cache of per-ticker period results, see calculate_period_contents.
+        total_return (bool): Reinvest dividends, see calculate_period_contents.
 
-        # Get the weekly data for this ticker's dates only
-        ticker_dates = [d['date'] for d in weekly_data]
-        price_timeseries = [date_to_price[date] for date in ticker_dates]
-        change_timeseries = [date_to_change[date] for date in ticker_dates]
+    Returns:
+        tuple[ColumnarContent, ColumnarContent]: Period changes and period prices content.
+    """
+    return calculate_period_contents(file_paths, descriptions, (freq,), cache, total_return)[freq]
 
-        # Calculate totals
-        if len(price_timeseries) >= 2:
-            total_return = round(((price_timeseries[-1] - price_timeseries[0]) / price_timeseries[0]) * 100, 2)
-            total_price_delta = round(price_timeseries[-1] - price_timeseries[0], 2)
-        else:
-            total_return = 0
-            total_price_delta = 0
 
-        # Add to changes content
-        content_changes["data"].append({"id": ticker, "description": descriptions[ticker], "timeseries": change_timeseries, "total": total_return})
+def calculate_weekly_content(
+    file_paths: Dict[str, str], descriptions: Dict[str, str], cache: Optional[WeeklyCache] = None, total_return: bool = False
+) -> tuple[ColumnarContent, ColumnarContent]:
+    """Weekly changes and prices as array-backed content, see calculate_period_data."""
+    return calculate_period_data(file_paths, descriptions, 'W', cache, total_return)
 
-        # Add to prices content
-        content_prices["data"].append({"id": ticker, "description": descriptions[ticker], "timeseries": price_timeseries, "total": total_price_delta})
 
-    return content_changes, content_prices
+def calculate_weekly_data(
+    file_paths: Dict[str, str], descriptions: Dict[str, str], cache: Optional[WeeklyCache] = None, total_return: bool = False
+) -> tuple[Content, Content]:
+    """
+    Calculate weekly data for given file paths and descriptions.
+
+    Args:
+        file_paths (Dict[str, str]): A dictionary mapping tickers to file paths.
+        descriptions (Dict[str, str]): A dictionary mapping tickers to descriptions.
+        cache (Optional[WeeklyCache]): Cache of per-ticker weekly results, see calculate_weekly_content.
+        total_return (bool): Reinvest dividends, see calculate_period_contents.
+
+    Returns:
+        tuple[Content, Content]: Weekly changes and weekly prices content.
+    """
+    content_changes, content_prices = calculate_weekly_content(file_paths, descriptions, cache, total_return)
+    return content_changes.to_content(), content_prices.to_content()
@@ -0,0 +1,201 @@
+import glob
+import os
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+import numpy as np
+
+from class_definition import ColumnarContent
+from util_catalog import PriceCatalog
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import polars as pl
+
+# Views over the raw files; Date is cut to its first 10 characters like the pandas readers do
+PRICES_VIEW = """
+CREATE OR REPLACE VIEW prices AS
+SELECT
+    regexp_extract(filename, '([^/\\\\]+)\\.csv$', 1) AS ticker,
+    CAST(substr(CAST("Date" AS VARCHAR), 1, 10) AS DATE) AS "Date",
+    CAST("Close" AS DOUBLE) AS "Close"
+FROM read_csv({files}, filename = true, union_by_name = true)
+"""
+
+EMPTY_PRICES_VIEW = """
+CREATE OR REPLACE VIEW prices AS
+SELECT CAST(NULL AS VARCHAR) AS ticker, CAST(NULL AS DATE) AS "Date", CAST(NULL AS DOUBLE) AS "Close" WHERE false
+"""
+
+LEDGER_VIEW = """
+CREATE OR REPLACE VIEW ledger AS
+SELECT
+    "Account Name" AS account,
+    "Security" AS security,
+    TRY_CAST(substr(CAST("Entry Date" AS VARCHAR), 1, 10) AS DATE) AS entry_date,
+    TRY_CAST("Qty" AS DOUBLE) AS qty
+FROM ledger_source
+"""
+
+# Weekly close (last close of the Monday-based week, 2 decimals) and its change in percent, as calculate_weekly_data
+WEEKLY_RETURNS_MACRO = """
+CREATE OR REPLACE MACRO weekly_returns() AS TABLE
+WITH weekly AS (
+    SELECT ticker, CAST(date_trunc('week', "Date") AS DATE) AS week, round(arg_max("Close", "Date"), 2) AS close
+    FROM prices
+    GROUP BY ALL
+)
+SELECT
+    ticker,
+    week,
+    close,
+    coalesce(round((close - lag(close) OVER w) / lag(close) OVER w * 100, 2), 0) AS change
+FROM weekly
+WINDOW w AS (PARTITION BY ticker ORDER BY week)
+ORDER BY ticker, week
+"""
+
+# Stock splits the price catalog indexed from the price files (security, ex-date, ratio), refilled with the prices view;
+# left empty unless the catalog split-adjusts
+SPLITS_TABLE = """
+CREATE OR REPLACE TABLE splits (security VARCHAR, ex_date DATE, ratio DOUBLE)
+"""
+
+# Month-end quantity, price (last close on or before the month end; 1 for Cash) and MV of every holding
+# of the accounts matching a LIKE pattern, from each holding's first transaction month to the last ledger month.
+# With splits in the splits table, quantities are restated in today's shares like compute_eom_position(split_adjust=True):
+# each row is multiplied by the product of the ratios of the splits after its entry date (a trade on the ex-date is
+# already in post-split shares)
+MONTH_END_POSITIONS_MACRO = """
+CREATE OR REPLACE MACRO month_end_positions(account_pattern) AS TABLE
+WITH split_factors AS (
+    SELECT security, ex_date, product(ratio) OVER (PARTITION BY security ORDER BY ex_date DESC) AS factor
+    FROM splits
+),
+txns AS (
+    SELECT l.account, l.security, CAST(date_trunc('month', l.entry_date) AS DATE) AS month, sum(l.qty * coalesce(f.factor, 1.0)) AS qty
+    FROM ledger l
+    ASOF LEFT JOIN split_factors f ON l.security = f.security AND l.entry_date < f.ex_date
+    WHERE l.account LIKE account_pattern AND l.entry_date IS NOT NULL AND l.qty IS NOT NULL
+    GROUP BY ALL
+),
+grid AS (
+    SELECT account, security, CAST(unnest(generate_series(min(month), (SELECT max(month) FROM txns), INTERVAL 1 MONTH)) AS DATE) AS month
+    FROM txns
+    GROUP BY ALL
+),
+positions AS (
+    SELECT
+        g.account,
+        g.security,
+        last_day(g.month) AS month_end,
+        sum(coalesce(t.qty, 0)) OVER (PARTITION BY g.account, g.security ORDER BY g.month) AS qty
+    FROM grid g
+    LEFT JOIN txns t USING (account, security, month)
+)
+SELECT
+    p.account,
+    p.security,
+    p.month_end,
+    p.qty,
+    CASE WHEN p.security = 'Cash' THEN 1.0 ELSE pr."Close" END AS price,
+    p.qty * (CASE WHEN p.security = 'Cash' THEN 1.0 ELSE pr."Close" END) AS mv
+FROM positions p
+ASOF LEFT JOIN prices pr ON p.security = pr.ticker AND p.month_end >= pr."Date"
+ORDER BY p.account, p.month_end, p.security
+"""
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError as e:  # pragma: no cover
+        raise ImportError("The SQL layer needs the optional 'duckdb' package: uv add duckdb (or pip install duckdb)") from e
+    return duckdb
+
+
+class DuckCatalog:
+    """
+    Optional in-process DuckDB layer over the price files and the parsed ledger.
+
+    Registers the views `prices` (ticker, Date, Close of every <ticker>.csv) and `ledger` (account,
+    security, entry_date, qty), the `splits` table of the price catalog, and the table macros
+    weekly_returns() and month_end_positions(pattern), so ad-hoc questions are one query, e.g. the MV
+    of all IRA accounts by month:
+
+        SELECT month_end, sum(mv) FROM month_end_positions('%IRA%') GROUP BY ALL ORDER BY month_end
+
+    Results come back as Arrow tables, which polars and pandas wrap without copying the columns.
+    """
+
+    def __init__(self, price_dir: str, ledger: Optional["pl.DataFrame"] = None, database: str = ":memory:", split_adjust: bool = False):
+        """
+        Args:
+            price_dir (str): Directory of the <ticker>.csv price files
+            ledger (Optional[pl.DataFrame]): Transactions with 'Account Name', 'Security', 'Entry Date' and 'Qty'
+            database (str): DuckDB database file, in memory by default
+            split_adjust (bool): Fill the splits table from the price files, so month_end_positions() restates
+                quantities in today's shares; leave off for ledgers that record splits as transactions
+        """
+        self.connection = _duckdb().connect(database)
+        self.price_dir = price_dir
+        self.split_adjust = split_adjust
+        self.refresh_prices()
+        if ledger is not None:
+            self.register_ledger(ledger)
+
+    def refresh_prices(self) -> None:
+        """(Re)create the prices view and the splits table; needed only when price files are added, removed or gain a split."""
+        files = sorted(glob.glob(os.path.join(glob.escape(self.price_dir), "*.csv")))
+        sql = PRICES_VIEW.format(files="[" + ", ".join("'" + path.replace("'", "''") + "'" for path in files) + "]") if files else EMPTY_PRICES_VIEW
+        self.connection.execute(sql)
+        self.connection.execute(WEEKLY_RETURNS_MACRO)
+        self.connection.execute(SPLITS_TABLE)
+        if not self.split_adjust:
+            return
+        catalog = PriceCatalog(self.price_dir)
+        catalog.refresh()
+        splits = catalog.splits(os.path.splitext(os.path.basename(path))[0] for path in files)
+        if splits:
+            self.connection.executemany("INSERT INTO splits VALUES (?, CAST(? AS DATE), ?)", splits)
+
+    def register_ledger(self, ledger: Any) -> None:
+        """Expose a parsed ledger (polars/pandas DataFrame or Arrow table) as the `ledger` view, without copying it."""
+        self.connection.register("ledger_source", ledger.to_arrow() if hasattr(ledger, "to_arrow") else ledger)
+        self.connection.execute(LEDGER_VIEW)
+        self.connection.execute(MONTH_END_POSITIONS_MACRO)
+
+    def query(self, sql: str, params: Optional[List[Any]] = None) -> "pa.Table":
+        """Run a query and return its result as an Arrow table."""
+        relation = self.connection.execute(sql, params) if params else self.connection.sql(sql)
+        fetch = getattr(relation, "to_arrow_table", None) or relation.fetch_arrow_table
+        return fetch()
+
+    def weekly_returns(self) -> "pa.Table":
+        return self.query("SELECT * FROM weekly_returns()")
+
+    def month_end_positions(self, account_pattern: str = "%") -> "pa.Table":
+        return self.query("SELECT * FROM month_end_positions(?)", [account_pattern])
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def arrow_to_content(
+    table: "pa.Table", name: str, datatype: str, id_column: str, time_column: str, value_column: str, descriptions: Optional[Dict[str, str]] = None
+) -> ColumnarContent:
+    """
+    Pivot a long Arrow result (one row per id and period) into a ColumnarContent for render_tables.
+
+    Args:
+        table (pa.Table): e.g. DuckCatalog.weekly_returns()
+        name (str): Table title
+        datatype (str): 'return', 'price' or 'statistic'
+        id_column (str), time_column (str), value_column (str): Columns holding the row id, period and value
+        descriptions (Optional[Dict[str, str]]): Description per id (default: the id)
+    """
+    ids, id_codes = np.unique(np.asarray(table.column(id_column).to_pylist(), dtype=object), return_inverse=True)
+    periods, time_codes = np.unique(np.asarray([str(value) for value in table.column(time_column).to_pylist()], dtype=object), return_inverse=True)
+    values = np.full((len(ids), len(periods)), np.nan)
+    values[id_codes, time_codes] = table.column(value_column).to_numpy(zero_copy_only=False)
+    descriptions = descriptions or {}
+    return ColumnarContent(name, datatype, list(periods), list(ids), [descriptions.get(row_id, row_id) for row_id in ids], values)
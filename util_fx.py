@@ -0,0 +1,155 @@
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from util_catalog import PriceCatalog
+
+if TYPE_CHECKING:
+    import polars as pl
+
+# FX series are stored with the prices, so more decimals are kept than for share prices
+FX_DECIMALS = 6
+
+
+def fx_symbol(currency: str, base: str) -> str:
+    """yfinance symbol of the rate quoting one unit of `currency` in `base`, e.g. EURUSD=X."""
+    return f"{currency}{base}=X"
+
+
+def download_fx_rates(currencies: Iterable[str], base: str, start_date: str, end_date: str) -> None:
+    """Download the daily rates of each currency into the price directory, next to the share prices."""
+    from util_data import download_ticker_data
+
+    for currency in sorted(set(currencies) - {base}):
+        download_ticker_data(fx_symbol(currency, base), start_date, end_date, decimals=FX_DECIMALS)
+
+
+def load_fx_rates(catalog: PriceCatalog, currencies: Iterable[str], base: str) -> Tuple[pd.DataFrame, Dict[str, List[int]]]:
+    """
+    Read the daily rates of several currencies into one long frame.
+
+    A currency is read from <currency><base>=X.csv or, failing that, inverted from <base><currency>=X.csv.
+
+    Args:
+        catalog (PriceCatalog): Catalog of the price directory holding the FX files
+        currencies (Iterable[str]): Currencies to convert from; `base` itself is skipped
+        base (str): Currency to convert to
+
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, List[int]]]: Columns currency, Date and rate (units of base per unit
+            of currency) sorted by Date, and the [mtime_ns, size] of each file read
+
+    Raises:
+        FileNotFoundError: For currencies without a usable FX file
+    """
+    frames, versions, missing = [], {}, []
+    for currency in sorted(set(currencies) - {base}):
+        for symbol, invert in ((fx_symbol(currency, base), False), (fx_symbol(base, currency), True)):
+            catalog.refresh([symbol])
+            entry = catalog.lookup(symbol)
+            if entry and entry["date_col"] and entry["price_col"] and entry["rows"]:
+                break
+        else:
+            missing.append(fx_symbol(currency, base))
+            continue
+        df = pd.read_csv(entry["path"], usecols=[entry["date_col"], entry["price_col"]])
+        rate = df[entry["price_col"]].to_numpy(dtype=np.float64)
+        with np.errstate(divide='ignore'):
+            rate = 1.0 / rate if invert else rate
+        dates = pd.to_datetime(df[entry["date_col"]].astype(str).str.slice(0, 10), format='%Y-%m-%d')
+        valid = np.isfinite(rate) & (rate > 0)
+        frames.append(pd.DataFrame({'currency': currency, 'Date': dates[valid], 'rate': rate[valid]}))
+        versions[symbol] = [entry["mtime_ns"], entry["size"]]
+    if missing:
+        raise FileNotFoundError(f"No FX rates in {catalog.price_dir} for: {', '.join(missing)}")
+    rates = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame({'currency': pd.Series(dtype=str), 'Date': pd.Series(dtype='datetime64[ns]'), 'rate': pd.Series(dtype=float)})
+    return rates.sort_values('Date', kind='stable', ignore_index=True), versions
+
+
+class FxConverter:
+    """
+    Converts prices quoted in other currencies into a base currency with as-of joins.
+
+    Each price takes the latest rate on or before its date (the earliest rate when the price predates
+    the FX series), so weekend and holiday mismatches between markets need no alignment. A whole long
+    frame is converted by one merge_asof, never row by row.
+    """
+
+    def __init__(self, base: str, currencies: Dict[str, str], rates: pd.DataFrame, versions: Optional[Dict[str, List[int]]] = None):
+        """
+        Args:
+            base (str): Currency to report in
+            currencies (Dict[str, str]): Quote currency of each ticker/security; missing ones are in `base`
+            rates (pd.DataFrame): Columns currency, Date and rate, as returned by load_fx_rates
+            versions (Optional[Dict[str, List[int]]]): Versions of the FX files, part of cache keys
+        """
+        self.base = base
+        self.currencies = {ticker: currency for ticker, currency in currencies.items() if currency != base}
+        self.rates = rates.sort_values('Date', kind='stable', ignore_index=True)
+        self.versions = versions or {}
+        self._first_rate = self.rates.groupby('currency', sort=False)['rate'].first()
+        self._polars_rates: Dict[str, "pl.DataFrame"] = {}
+
+    @classmethod
+    def from_catalog(cls, catalog: PriceCatalog, currencies: Dict[str, str], base: str = "USD") -> "FxConverter":
+        rates, versions = load_fx_rates(catalog, currencies.values(), base)
+        return cls(base, currencies, rates, versions)
+
+    def params(self, ticker: str) -> Optional[dict]:
+        """
+        What a ticker's converted values depend on besides its price file; part of its cache keys.
+
+        Only the ticker's own currency and the version of that currency's rate file count, so adding a
+        currency or refreshing another rate file leaves the ticker's cache entries valid.
+
+        Returns:
+            Optional[dict]: None for tickers quoted in the base currency, whose values are not converted
+        """
+        currency = self.currencies.get(ticker)
+        if currency is None:
+            return None
+        symbols = (fx_symbol(currency, self.base), fx_symbol(self.base, currency))
+        return {"base": self.base, "currency": currency, "rates": {symbol: version for symbol, version in self.versions.items() if symbol in symbols}}
+
+    def rates_for(self, currency: np.ndarray, dates: np.ndarray) -> np.ndarray:
+        """As-of rate of every (currency, date) pair; 1 for the base currency."""
+        rates = np.ones(len(currency))
+        foreign = np.flatnonzero(currency != self.base)
+        if not len(foreign):
+            return rates
+        left = pd.DataFrame({'_row': foreign, 'currency': currency[foreign], 'Date': dates[foreign]}).sort_values('Date', kind='stable')
+        merged = pd.merge_asof(left, self.rates, on='Date', by='currency', direction='backward')
+        # Prices older than the FX series take its first rate
+        merged['rate'] = merged['rate'].fillna(merged['currency'].map(self._first_rate))
+        if merged['rate'].isna().any():
+            raise LookupError(f"No FX rates to {self.base} for: {', '.join(sorted(merged.loc[merged['rate'].isna(), 'currency'].unique()))}")
+        rates[merged['_row'].to_numpy()] = merged['rate'].to_numpy()
+        return rates
+
+    def __call__(self, long_df: pd.DataFrame) -> pd.DataFrame:
+        """Convert the Close (and Dividends) of a long ticker/Date frame, as read by _read_close_frame."""
+        if long_df.empty or not self.currencies:
+            return long_df
+        currency = long_df['ticker'].map(self.currencies).fillna(self.base).to_numpy(dtype=object)
+        rates = self.rates_for(currency, long_df['Date'].to_numpy())
+        converted = long_df.assign(Close=long_df['Close'].to_numpy() * rates)
+        if 'Dividends' in converted.columns:
+            converted['Dividends'] = converted['Dividends'].to_numpy() * rates
+        return converted
+
+    def convert_prices(self, price_df: "pl.DataFrame", security: str, date_col: str = "_Date", price_col: str = "_Price") -> "pl.DataFrame":
+        """Convert one security's polars price frame (e.g. its month-end prices in load_security_prices) with a join_asof."""
+        currency = self.currencies.get(security, self.base)
+        if currency == self.base:
+            return price_df
+        import polars as pl
+
+        if currency not in self._polars_rates:
+            rates = self.rates[self.rates['currency'] == currency]
+            if rates.empty:
+                raise LookupError(f"No FX rates to {self.base} for: {currency}")
+            self._polars_rates[currency] = pl.DataFrame({"_FxDate": pl.Series(rates['Date'].to_numpy()).cast(pl.Date), "_Rate": rates['rate'].to_numpy()})
+        rates = self._polars_rates[currency]
+        converted = price_df.drop_nulls(date_col).sort(date_col).join_asof(rates, left_on=date_col, right_on="_FxDate", strategy="backward")
+        return converted.with_columns((pl.col(price_col) * pl.col("_Rate").fill_null(rates["_Rate"][0])).alias(price_col)).drop(["_FxDate", "_Rate"])
@@ -0,0 +1,208 @@
+import numpy as np
+import polars as pl
+from typing import Optional, Sequence
+
+from util_profile import profiled, record_rows
+
+# Ledger sign convention, shared by every reader of the transactions sheet (and the test fixtures): Qty and
+# Txn MV have the same sign, positive when the account receives the asset. A buy is a security row with
+# positive Qty and Txn MV plus a Cash row with negative Qty; a deposit or a dividend is a positive Cash row.
+
+# Cash rows matching this in one of INCOME_COLUMNS are income or costs of the holdings, i.e. part of the return
+INCOME_PATTERN = r"(?i)dividend|\bdiv\b|interest|\bfees?\b|cap(ital)? gain|withholding"
+# Rows matching this, on either leg, put income the account already earned back into a holding
+REINVEST_PATTERN = r"(?i)reinvest"
+INCOME_COLUMNS = ("Txn Type", "Type", "Action", "Description", "Memo")
+
+
+def income_rows(columns: Sequence[str], pattern: str = INCOME_PATTERN) -> pl.Expr:
+    """True for rows whose transaction type or description (any of INCOME_COLUMNS the ledger has) matches `pattern`."""
+    matches = [pl.col(column).cast(pl.Utf8).str.contains(pattern).fill_null(False) for column in INCOME_COLUMNS if column in columns]
+    return pl.any_horizontal(matches) if matches else pl.lit(False)
+
+
+def ledger_cash_flows(
+    transactions_df: pl.DataFrame, by: Sequence[str] = ("Account Name",), income: Optional[pl.Expr] = None, reinvested: Optional[pl.Expr] = None
+) -> pl.DataFrame:
+    """
+    Monthly external cash flows derived from the ledger, grouped by `by`.
+
+    Cash rows carry dollars in Qty (as in compute_eom_position) and security rows carry their trade
+    value in Txn MV, signed as described at the top of this module. A buy booked as a security row plus
+    its negative Cash row therefore nets to no external flow, while a deposit, withdrawal or an in-kind
+    transfer without a cash leg does count. Dividends, interest and fees paid into or out of Cash are
+    returns of the holdings rather than money moved in or out, so the `income` rows are left out. A
+    reinvestment moves such income into a holding: both its Cash leg and its security leg are left out,
+    so the shares bought with a dividend are neither an inflow of the account nor of the security.
+    Grouped by security (by containing 'Security'), each other Txn MV is a flow into or out of that holding.
+
+    Args:
+        transactions_df (pl.DataFrame): Ledger with 'Account Name', 'Security', 'Entry Date', 'Qty' and 'Txn MV'
+        by (Sequence[str]): Grouping columns, e.g. ('Account Name',) or ('Account Name', 'Security')
+        income (Optional[pl.Expr]): Marks the income and cost rows; default income_rows(), which matches
+            INCOME_PATTERN in the ledger's transaction type or description columns (none: no income rows)
+        reinvested (Optional[pl.Expr]): Marks the legs of dividend reinvestments, Cash or security; default
+            income_rows() with REINVEST_PATTERN
+
+    Returns:
+        pl.DataFrame: Columns `by`, '_MonthSort' (YYYY-MM) and 'Flow' (positive = money in)
+    """
+    by = list(by)
+    df = transactions_df.with_columns(
+        [
+            pl.col("Entry Date").cast(pl.Utf8).str.strptime(pl.Date, "%Y-%m-%d", strict=False),
+            pl.col("Qty").cast(pl.Float64),
+            pl.col("Txn MV").cast(pl.Float64),
+        ]
+    ).filter(pl.col("Entry Date").is_not_null())
+    is_cash = pl.col("Security") == "Cash"
+    income = income_rows(transactions_df.columns) if income is None else income
+    reinvested = income_rows(transactions_df.columns, REINVEST_PATTERN) if reinvested is None else reinvested
+    df = df.filter(~is_cash & ~reinvested) if "Security" in by else df.filter(~reinvested & ~(is_cash & income))
+    amount = pl.when(is_cash).then(pl.col("Qty")).otherwise(pl.col("Txn MV")).fill_null(0.0)
+    return (
+        df.with_columns([pl.col("Entry Date").dt.strftime("%Y-%m").alias("_MonthSort"), amount.alias("Flow")])
+        .group_by(by + ["_MonthSort"])
+        .agg(pl.col("Flow").sum())
+        .sort(by + ["_MonthSort"])
+    )
+
+
+def eom_values(eom_df: pl.DataFrame, account_name: str, by_security: bool = False) -> pl.DataFrame:
+    """
+    Long month-end values from the wide output of compute_eom_position.
+
+    Args:
+        eom_df (pl.DataFrame): compute_eom_position result (Month as Mon-YY, '<sec>_MV' columns and 'Total')
+        account_name (str): Account the positions belong to
+        by_security (bool): One row per security MV instead of one row per account Total
+
+    Returns:
+        pl.DataFrame: Columns 'Account Name', ['Security',] '_MonthSort' and 'Value'
+    """
+    df = eom_df.with_columns([pl.col("Month").str.strptime(pl.Date, "%b-%y").dt.strftime("%Y-%m").alias("_MonthSort"), pl.lit(account_name).alias("Account Name")])
+    if not by_security:
+        return df.select(["Account Name", "_MonthSort", pl.col("Total").cast(pl.Float64).alias("Value")])
+    mv_cols = [col for col in df.columns if col.endswith("_MV")]
+    return (
+        df.unpivot(index=["Account Name", "_MonthSort"], on=mv_cols, variable_name="Security", value_name="Value")
+        .with_columns([pl.col("Security").str.strip_suffix("_MV"), pl.col("Value").cast(pl.Float64).fill_null(0.0)])
+        .select(["Account Name", "Security", "_MonthSort", "Value"])
+    )
+
+
+def time_weighted_returns(values: np.ndarray, flows: np.ndarray, flow_weight: float = 0.5) -> np.ndarray:
+    """
+    Chain-linked time-weighted return of every row.
+
+    Each month's return is the Modified Dietz return (V_t - V_t-1 - F_t) / (V_t-1 + w * F_t), which
+    treats the month's flows as arriving a fraction w into the month. Months with no capital at work are skipped.
+
+    Args:
+        values (np.ndarray): Entities x months end-of-month values (NaN before an entity exists)
+        flows (np.ndarray): Entities x months external flows, same shape (money in positive)
+        flow_weight (float): w above; 0.5 for mid-month, 0 when flows land at month end
+
+    Returns:
+        np.ndarray: One cumulative return per entity, as a fraction (NaN when there is no valid month)
+    """
+    previous = np.nan_to_num(values[:, :-1])
+    current = np.nan_to_num(values[:, 1:])
+    period_flows = np.nan_to_num(flows[:, 1:])
+    capital = previous + flow_weight * period_flows
+    with np.errstate(divide='ignore', invalid='ignore'):
+        monthly = (current - previous - period_flows) / capital
+    valid = capital > 0
+    growth = np.prod(np.where(valid, 1 + monthly, 1.0), axis=1)
+    return np.where(valid.any(axis=1), growth - 1, np.nan)
+
+
+def xirr(cash_flows: np.ndarray, year_fractions: np.ndarray, guess: float = 0.1, tol: float = 1e-10, max_iter: int = 100) -> np.ndarray:
+    """
+    Annual internal rate of return of many cash flow streams at once, by a vectorized Newton method.
+
+    Solves sum_t c_t * (1 + r) ** -t_t = 0 for every row simultaneously; rows that have converged stop
+    moving while the others keep iterating. Rows without both an inflow and an outflow, or that do not
+    converge, are NaN.
+
+    Args:
+        cash_flows (np.ndarray): Entities x dates cash flows from the investor's view (contributions negative)
+        year_fractions (np.ndarray): Time of each date in years since the first date, shared by all rows
+        guess (float): Starting rate
+        tol (float): Convergence tolerance on the rate
+        max_iter (int): Maximum Newton iterations
+
+    Returns:
+        np.ndarray: One annual rate per row
+    """
+    cash_flows = np.nan_to_num(np.atleast_2d(cash_flows))
+    t = np.asarray(year_fractions, dtype=np.float64)[None, :]
+    solvable = np.asarray((cash_flows > 0).any(axis=1) & (cash_flows < 0).any(axis=1), dtype=bool)
+    rate = np.full(cash_flows.shape[0], guess)
+    active = solvable.copy()
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        discount = (1 + rate[active, None]) ** -t
+        npv = (cash_flows[active] * discount).sum(axis=1)
+        derivative = (-t * cash_flows[active] * discount / (1 + rate[active, None])).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = npv / derivative
+        # Keep rates above -100%, halving the distance to it when a step would cross it
+        updated = np.where(rate[active] - step <= -1, (rate[active] - 1) / 2, rate[active] - step)
+        done = ~np.isfinite(updated) | (np.abs(updated - rate[active]) < tol)
+        rate[active] = updated
+        active[np.flatnonzero(active)[done]] = False
+    converged = solvable & ~active & np.isfinite(rate)
+    return np.where(converged, rate, np.nan)
+
+
+def money_weighted_returns(values: np.ndarray, flows: np.ndarray) -> np.ndarray:
+    """
+    Annualized IRR of every row from month-end values and monthly flows.
+
+    The starting value counts as a contribution at the first month end, flows as contributions at
+    their month end, and the final value as a withdrawal at the last month end.
+    """
+    values = np.nan_to_num(values)
+    cash_flows = -np.nan_to_num(flows).copy()
+    cash_flows[:, 0] = -values[:, 0]
+    cash_flows[:, -1] += values[:, -1]
+    return xirr(cash_flows, np.arange(values.shape[1]) / 12)
+
+
+def _to_matrix(long_df: pl.DataFrame, key_frame: pl.DataFrame, month_frame: pl.DataFrame, by: list, column: str) -> np.ndarray:
+    """Scatter a long (by, _MonthSort, column) frame into a keys x months matrix; absent cells are 0."""
+    matrix = np.zeros((key_frame.height, month_frame.height))
+    coded = long_df.join(key_frame, on=by).join(month_frame, on="_MonthSort")
+    np.add.at(matrix, (coded["_row"].to_numpy(), coded["_col"].to_numpy()), coded[column].fill_null(0.0).to_numpy())
+    return matrix
+
+
+@profiled("performance")
+def compute_performance(values_df: pl.DataFrame, flows_df: pl.DataFrame, by: Sequence[str] = ("Account Name",)) -> pl.DataFrame:
+    """
+    Time-weighted (chain-linked) and money-weighted (IRR) return of every group over the months of values_df.
+
+    All groups are pivoted into one values and one flows matrix, so the returns of every account (or
+    account/security pair) come from a handful of array operations and a single Newton solve.
+
+    Args:
+        values_df (pl.DataFrame): Month-end values with columns `by`, '_MonthSort' and 'Value' (e.g. from eom_values)
+        flows_df (pl.DataFrame): External flows with columns `by`, '_MonthSort' and 'Flow' (e.g. from ledger_cash_flows)
+        by (Sequence[str]): Grouping columns
+
+    Returns:
+        pl.DataFrame: Columns `by`, 'TWR' and 'IRR' (annualized), both in percent with 2 decimals
+    """
+    by = list(by)
+    record_rows(values_df.height + flows_df.height)
+    key_frame = values_df.select(by).unique().sort(by).with_row_index("_row")
+    month_frame = values_df.select("_MonthSort").unique().sort("_MonthSort").with_row_index("_col")
+
+    values = _to_matrix(values_df, key_frame, month_frame, by, "Value")
+    flows = _to_matrix(flows_df, key_frame, month_frame, by, "Flow")
+    twr = time_weighted_returns(values, flows)
+    irr = money_weighted_returns(values, flows)
+
+    return key_frame.drop("_row").with_columns([pl.Series("TWR", np.round(twr * 100, 2)), pl.Series("IRR", np.round(irr * 100, 2))])
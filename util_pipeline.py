@@ -0,0 +1,219 @@
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from class_definition import ColumnarContent
+from util_cache import WeeklyCache
+from util_catalog import PriceCatalog
+from util_data import (
+    PERIOD_LABELS,
+    _aggregate_periods,
+    _build_period_contents,
+    _cache_extra,
+    _cached_issues,
+    _cached_periods,
+    _read_close_frame,
+    _total_return_title,
+    _store_issues,
+    _store_period_cache,
+    download_ticker_data,
+    get_price_dir,
+    total_return_factors,
+)
+from util_profile import profiled
+
+if TYPE_CHECKING:
+    from util_fx import FxConverter
+    from util_validate import PriceValidator
+
+_DONE = object()
+
+
+def _parse(
+    ticker: str, file_path: str, total_return: bool, check: Optional[Callable] = None, fx: Optional["FxConverter"] = None
+) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    long_df = _read_close_frame({ticker: file_path}, total_return)
+    issues = None
+    if check is not None:
+        long_df, issues = check(long_df)
+    if fx is not None:
+        long_df = fx(long_df)
+    if total_return:
+        long_df = long_df.sort_values('Date', kind='stable')
+        long_df['Close'] = long_df['Close'] * total_return_factors(long_df)
+    return long_df, issues
+
+
+def _aggregate(long_df: pd.DataFrame, freqs: Sequence[str]) -> Dict[str, pd.DataFrame]:
+    return {freq: _aggregate_periods(long_df, freq) for freq in freqs}
+
+
+async def _worker(source: asyncio.Queue, sink: Optional[asyncio.Queue], handle: Callable, n_upstream: int) -> None:
+    """Apply `handle` to every item of `source` until all upstream workers are done, then signal `sink`."""
+    finished = 0
+    while finished < n_upstream:
+        item = await source.get()
+        if item is _DONE:
+            finished += 1
+            continue
+        result = await handle(item)
+        if sink is not None:
+            await sink.put(result)
+    if sink is not None:
+        await sink.put(_DONE)
+
+
+async def period_pipeline(
+    file_paths: Dict[str, str],
+    descriptions: Dict[str, str],
+    download: Optional[Callable[[str], None]] = None,
+    freqs: Sequence[str] = ('W',),
+    total_return: bool = False,
+    max_downloads: int = 8,
+    queue_size: int = 16,
+    executor: Optional[Executor] = None,
+    validator: Optional["PriceValidator"] = None,
+    fx: Optional["FxConverter"] = None,
+    cache: Optional[WeeklyCache] = None,
+) -> Dict[str, tuple[ColumnarContent, ColumnarContent]]:
+    """
+    Download, parse and aggregate tickers as overlapping stages connected by bounded queues.
+
+    Downloads run `max_downloads` at a time in threads; each finished ticker is parsed and aggregated in
+    `executor` while later tickers are still downloading, so the total time approaches the slower of
+    the I/O and the compute instead of their sum. The bounded queues stop downloads from running far
+    ahead of the parsing. The result matches calculate_period_contents.
+
+    Args:
+        file_paths (Dict[str, str]): A dictionary mapping tickers to the file paths the downloads write.
+        descriptions (Dict[str, str]): A dictionary mapping tickers to descriptions.
+        download (Optional[Callable[[str], None]]): Blocking download of one ticker to its file path;
+            None skips the download stage and reads the existing files.
+        freqs (Sequence[str]): Aggregation windows, see calculate_period_contents.
+        total_return (bool): Reinvest dividends, see calculate_period_contents.
+        max_downloads (int): Concurrent downloads.
+        queue_size (int): Capacity of each queue between stages.
+        executor (Optional[Executor]): Executor of the CPU-bound stages (default: the loop's thread pool);
+            a ProcessPoolExecutor keeps parsing off the GIL.
+        validator (Optional[PriceValidator]): Checks each ticker's raw closes as part of its parse step;
+            the issues are recorded in the validator, and cached with the ticker's aggregates.
+        fx (Optional[FxConverter]): Converts each ticker's closes to fx.base as part of its parse step.
+        cache (Optional[WeeklyCache]): Cache of per-ticker period results, looked up once a ticker is
+            downloaded (its parse and aggregation are skipped on a hit) and written after aggregation.
+
+    Returns:
+        Dict[str, tuple[ColumnarContent, ColumnarContent]]: Changes and prices content per window.
+    """
+    for freq in freqs:
+        if freq not in PERIOD_LABELS:
+            raise ValueError(f"Unsupported aggregation window '{freq}', expected one of {list(PERIOD_LABELS)}")
+
+    loop = asyncio.get_running_loop()
+    tickers = list(file_paths)
+    pending: asyncio.Queue = asyncio.Queue()
+    downloaded: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    parsed: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    aggregated: List[Dict[str, pd.DataFrame]] = []
+
+    n_downloaders = max(1, min(max_downloads, len(tickers))) if download is not None else 1
+    for ticker in tickers:
+        pending.put_nowait(ticker)
+    for _ in range(n_downloaders):
+        pending.put_nowait(_DONE)
+
+    async def fetch(ticker: str) -> str:
+        if download is not None:
+            await loop.run_in_executor(None, download, ticker)
+        return ticker
+
+    async def parse(ticker: str) -> Tuple[str, Optional[pd.DataFrame]]:
+        if cache is not None:
+            hits = _cached_periods(cache, file_paths[ticker], freqs, total_return, _cache_extra(ticker, validator, fx))
+            if hits is not None and validator is not None:
+                cached_issues = _cached_issues(cache, file_paths[ticker], ticker, validator)
+                if cached_issues is None:
+                    hits = None  # Aggregates cached without these checks: parse the ticker again to validate it
+                else:
+                    validator.record(cached_issues)
+            if hits is not None:
+                aggregated.append({freq: pd.DataFrame({'ticker': ticker, 'label': labels, 'close': closes}) for freq, (labels, closes) in zip(freqs, hits)})
+                return ticker, None
+        check = validator.check if validator is not None else None
+        long_df, issues = await loop.run_in_executor(executor, _parse, ticker, file_paths[ticker], total_return, check, fx)
+        if issues is not None and validator is not None:
+            validator.record(issues)
+            if cache is not None:
+                _store_issues(cache, issues, file_paths, [ticker], validator)
+        return ticker, long_df
+
+    async def aggregate(parsed_ticker: Tuple[str, Optional[pd.DataFrame]]) -> None:
+        ticker, long_df = parsed_ticker
+        if long_df is None:  # served from the cache
+            return
+        result = await loop.run_in_executor(executor, _aggregate, long_df, tuple(freqs))
+        if cache is not None:
+            extras = {ticker: _cache_extra(ticker, validator, fx)}
+            for freq in freqs:
+                _store_period_cache(cache, result[freq], file_paths, extras, freq, total_return)
+        aggregated.append(result)
+
+    tasks = [asyncio.ensure_future(_worker(pending, downloaded, fetch, 1)) for _ in range(n_downloaders)]
+    tasks.append(asyncio.ensure_future(_worker(downloaded, parsed, parse, n_downloaders)))
+    tasks.append(asyncio.ensure_future(_worker(parsed, None, aggregate, 1)))
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    contents = {}
+    titled = _total_return_title(file_paths, total_return)
+    for freq in freqs:
+        frames = [result[freq] for result in aggregated]
+        period_df = pd.concat(frames, ignore_index=True) if frames else _aggregate_periods(_read_close_frame({}), freq)
+        contents[freq] = _build_period_contents(freq, tickers, descriptions, period_df, titled, fx.base if fx is not None else None)
+    return contents
+
+
+@profiled("pipeline")
+def run_period_pipeline(
+    file_paths: Dict[str, str],
+    descriptions: Dict[str, str],
+    start_date: str,
+    end_date: str,
+    freqs: Sequence[str] = ('W',),
+    total_return: bool = False,
+    max_downloads: int = 8,
+    validator: Optional["PriceValidator"] = None,
+    fx: Optional["FxConverter"] = None,
+    cache: Optional[WeeklyCache] = None,
+) -> Dict[str, tuple[ColumnarContent, ColumnarContent]]:
+    """
+    Download the tickers with yfinance and aggregate them as they arrive, see period_pipeline.
+
+    The price catalog of the downloaded files is refreshed once all downloads are done. In total-return
+    mode the closes are downloaded unadjusted (auto_adjust=False), so their dividends can be reinvested.
+
+    Args:
+        file_paths (Dict[str, str]): Where download_ticker_data saves each ticker.
+        descriptions (Dict[str, str]): A dictionary mapping tickers to descriptions.
+        start_date (str): Start date in 'YYYY-MM-DD' format
+        end_date (str): End date in 'YYYY-MM-DD' format
+        freqs (Sequence[str]): Aggregation windows.
+        total_return (bool): Reinvest dividends.
+        max_downloads (int): Concurrent downloads.
+        validator (Optional[PriceValidator]): Checks the downloaded closes before they are aggregated.
+        fx (Optional[FxConverter]): Converts the closes to fx.base; its rates must be loaded beforehand.
+        cache (Optional[WeeklyCache]): Cache of per-ticker period results; files that are already on disk
+            (download_ticker_data keeps them) and unchanged are not parsed again.
+
+    Returns:
+        Dict[str, tuple[ColumnarContent, ColumnarContent]]: Changes and prices content per window.
+    """
+    download = functools.partial(download_ticker_data, start_date=start_date, end_date=end_date, auto_adjust=not total_return, update_catalog=False)
+    contents = asyncio.run(period_pipeline(file_paths, descriptions, download, freqs, total_return, max_downloads, validator=validator, fx=fx, cache=cache))
+    PriceCatalog(get_price_dir()).refresh(list(file_paths))
+    return contents
@@ -0,0 +1,190 @@
+import datetime
+import numpy as np
+import polars as pl
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple, Union, cast
+
+from util_profile import profiled, record_rows
+
+if TYPE_CHECKING:
+    from util_catalog import PriceCatalog
+
+DateLike = Union[str, datetime.date, np.datetime64]
+
+
+def _to_day(date: DateLike) -> np.datetime64:
+    if isinstance(date, np.datetime64):
+        return date.astype('datetime64[D]')
+    return np.datetime64(date, 'D')
+
+
+def split_factors(catalog: "PriceCatalog", securities: Iterable[str]) -> pl.DataFrame:
+    """
+    Corporate-actions table built from the stock splits the price catalog recorded for the securities.
+
+    Returns a DataFrame with columns Security, Split Date and Split Factor, where the factor restates a
+    quantity held before that ex-date in today's shares: the product of the ratios of that split and of
+    every later split of the security.
+    """
+    splits = pl.DataFrame(catalog.splits(securities), schema={"Security": pl.Utf8, "Split Date": pl.Utf8, "Ratio": pl.Float64}, orient="row")
+    return (
+        splits.with_columns(pl.col("Split Date").str.strptime(pl.Date, "%Y-%m-%d"))
+        .sort(["Security", "Split Date"])
+        .with_columns(pl.col("Ratio").cum_prod(reverse=True).over("Security").alias("Split Factor"))
+        .select(["Security", "Split Date", "Split Factor"])
+        .sort("Split Date")
+    )
+
+
+def _daily_deltas(transactions_df: pl.DataFrame, splits: Optional[pl.DataFrame] = None) -> pl.DataFrame:
+    """
+    Net quantity change per (account, security, day), sorted; rows without a date or quantity are dropped.
+
+    With a split_factors table, each day's change is restated in today's shares like compute_monthly_positions
+    does: multiplied by the factor of the first split after that day.
+    """
+    df = transactions_df.select(
+        [
+            pl.col("Account Name"),
+            pl.col("Security"),
+            pl.col("Entry Date").cast(pl.Utf8).str.strptime(pl.Date, "%Y-%m-%d", strict=False),
+            pl.col("Qty").cast(pl.Float64),
+        ]
+    ).filter(pl.col("Entry Date").is_not_null() & pl.col("Qty").is_not_null())
+    deltas = df.group_by(["Account Name", "Security", "Entry Date"]).agg(pl.col("Qty").sum())
+    if splits is not None and splits.height:
+        deltas = (
+            deltas.sort("Entry Date")
+            .join_asof(splits, left_on="Entry Date", right_on="Split Date", by="Security", strategy="forward", allow_exact_matches=False, check_sortedness=False)
+            .with_columns((pl.col("Qty") * pl.col("Split Factor").fill_null(1.0)).alias("Qty"))
+            .drop(["Split Date", "Split Factor"], strict=False)
+        )
+    return deltas.sort(["Account Name", "Security", "Entry Date"])
+
+
+class PositionIndex:
+    """
+    Daily-granularity quantity of every (account, security), stored as sorted change points.
+
+    The cumulative quantity is computed once per (account, security); each key keeps the dates on which
+    its quantity changed and the quantity from that date on. A position as of any date is then a binary
+    search instead of a cumulative sum from the start of the ledger, and appended ledger rows only
+    touch the keys they belong to.
+
+    Given the splits, quantities are in today's shares, as in compute_eom_position; without them they are
+    the raw ledger quantities.
+    """
+
+    def __init__(self, transactions_df: Optional[pl.DataFrame] = None, splits: Optional[pl.DataFrame] = None):
+        """
+        Args:
+            transactions_df (pl.DataFrame): Ledger with 'Account Name', 'Security', 'Entry Date' (YYYY-MM-DD) and 'Qty'
+            splits (Optional[pl.DataFrame]): split_factors table applied to these and later appended rows
+        """
+        self.splits = splits
+        self._dates: Dict[Tuple[str, str], np.ndarray] = {}
+        self._quantities: Dict[Tuple[str, str], np.ndarray] = {}
+        self._securities: Dict[str, List[str]] = {}
+        if transactions_df is not None:
+            self.append(transactions_df)
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+    def __repr__(self) -> str:
+        return f"PositionIndex(keys={len(self)}, change_points={sum(len(dates) for dates in self._dates.values())})"
+
+    @property
+    def accounts(self) -> List[str]:
+        return sorted(self._securities)
+
+    def securities(self, account: str) -> List[str]:
+        """Securities the account ever held, sorted."""
+        return sorted(self._securities.get(account, []))
+
+    @profiled("position_index")
+    def append(self, transactions_df: pl.DataFrame) -> None:
+        """
+        Add ledger rows to the index.
+
+        Rows dated after a key's last change point extend its arrays with a cumulative sum seeded by the
+        current quantity; back-dated rows rebuild only the affected key from its stored deltas.
+        """
+        record_rows(transactions_df.height)
+        deltas = _daily_deltas(transactions_df, self.splits)
+        for group_key, group in deltas.group_by(["Account Name", "Security"], maintain_order=True):
+            key = cast(Tuple[str, str], group_key)
+            account, security = key
+            new_dates = group["Entry Date"].to_numpy().astype('datetime64[D]')
+            new_deltas = group["Qty"].to_numpy()
+            if key not in self._dates:
+                self._dates[key] = new_dates
+                self._quantities[key] = np.cumsum(new_deltas)
+                self._securities.setdefault(account, []).append(security)
+                continue
+
+            dates, quantities = self._dates[key], self._quantities[key]
+            if new_dates[0] > dates[-1]:
+                self._dates[key] = np.concatenate([dates, new_dates])
+                self._quantities[key] = np.concatenate([quantities, quantities[-1] + np.cumsum(new_deltas)])
+                continue
+
+            # Back-dated rows: merge the deltas by day and recompute this key's cumulative quantity
+            all_dates = np.concatenate([dates, new_dates])
+            all_deltas = np.concatenate([np.diff(quantities, prepend=0.0), new_deltas])
+            merged_dates, codes = np.unique(all_dates, return_inverse=True)
+            merged_deltas = np.zeros(len(merged_dates))
+            np.add.at(merged_deltas, codes, all_deltas)
+            self._dates[key] = merged_dates
+            self._quantities[key] = np.cumsum(merged_deltas)
+
+    def quantity_as_of(self, account: str, security: str, date: DateLike) -> float:
+        """Quantity held at the end of `date` (0 before the first transaction or for unknown keys)."""
+        dates = self._dates.get((account, security))
+        if dates is None:
+            return 0.0
+        position = np.searchsorted(dates, _to_day(date), side='right')
+        return float(self._quantities[(account, security)][position - 1]) if position else 0.0
+
+    def position_as_of(self, account: str, date: DateLike, include_zero: bool = False) -> Dict[str, float]:
+        """
+        Holdings of an account at the end of `date`.
+
+        Returns:
+            Dict[str, float]: Security to quantity, without closed positions unless include_zero
+        """
+        positions = {security: self.quantity_as_of(account, security, date) for security in self.securities(account)}
+        return positions if include_zero else {security: qty for security, qty in positions.items() if qty != 0}
+
+    def positions_over(self, account: str, dates: Sequence[DateLike]) -> pl.DataFrame:
+        """
+        Quantity of every security of an account at the end of each date, one binary search per security.
+
+        Args:
+            account (str): Account name
+            dates (Sequence[DateLike]): Query dates, e.g. month ends
+
+        Returns:
+            pl.DataFrame: A 'Date' column plus one quantity column per security
+        """
+        query = np.array([_to_day(date) for date in dates], dtype='datetime64[D]')
+        columns = {"Date": query}
+        for security in self.securities(account):
+            key = (account, security)
+            positions = np.searchsorted(self._dates[key], query, side='right')
+            columns[security] = np.where(positions > 0, self._quantities[key][np.maximum(positions - 1, 0)], 0.0)
+        return pl.DataFrame(columns)
+
+    def changes_between(self, account: str, security: str, start: DateLike, end: DateLike) -> pl.DataFrame:
+        """
+        Change points of one holding within [start, end].
+
+        Returns:
+            pl.DataFrame: Columns 'Date' and 'Qty' (quantity from that date on), starting with the quantity held on `start`
+        """
+        dates = self._dates.get((account, security), np.array([], dtype='datetime64[D]'))
+        quantities = self._quantities.get((account, security), np.array([]))
+        start, end = _to_day(start), _to_day(end)
+        lo = np.searchsorted(dates, start, side='right')
+        hi = np.searchsorted(dates, end, side='right')
+        opening = quantities[lo - 1] if lo else 0.0
+        return pl.DataFrame({"Date": np.concatenate([[start], dates[lo:hi]]), "Qty": np.concatenate([[opening], quantities[lo:hi]])})
@@ -0,0 +1,185 @@
+import cProfile
+import functools
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, TypeVar
+
+F = TypeVar('F', bound=Callable)
+
+_NULL_STAGE = nullcontext()
+
+
+@dataclass
+class StageRecord:
+    name: str
+    calls: int = 0
+    wall_time: float = 0.0
+    rows: int = 0
+    peak_memory: int = 0
+
+
+@dataclass
+class _ActiveStage:
+    record: StageRecord
+    start_time: float
+    start_memory: int
+    max_peak: int
+
+
+class Profiler:
+    """
+    Collects wall time, rows processed and peak memory per pipeline stage.
+
+    Disabled by default; while disabled, `stage`/`profiled` only check a flag so the instrumented
+    hot paths run at full speed. Peak memory is the tracemalloc peak (Python and NumPy allocations)
+    above the memory in use when the stage started, and includes nested stages.
+
+    Stages may run in worker threads (the download and parse stages of util_pipeline): each thread
+    nests its own stages, and since the tracemalloc peak is process-wide, only stages on the main
+    thread record peak memory; the others record calls, time and rows.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.records: Dict[str, StageRecord] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._started_at = 0.0
+        self._total_time = 0.0
+
+    def enable(self, use_cprofile: bool = False) -> None:
+        self.reset()
+        self.enabled = True
+        self._started_at = time.perf_counter()
+        tracemalloc.start()
+        if use_cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def disable(self) -> None:
+        if not self.enabled:
+            return
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        tracemalloc.stop()
+        self._total_time = time.perf_counter() - self._started_at
+        self.enabled = False
+
+    @property
+    def _active(self) -> List[_ActiveStage]:
+        """Stack of the stages running in the calling thread, innermost last."""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def reset(self) -> None:
+        self.records = {}
+        self._local = threading.local()
+        self._cprofile = None
+        self._total_time = 0.0
+
+    @contextmanager
+    def _stage(self, name: str):
+        stack = self._active
+        track_memory = threading.current_thread() is threading.main_thread()
+        current = 0
+        if track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].max_peak = max(stack[-1].max_peak, peak)
+            tracemalloc.reset_peak()
+
+        with self._lock:
+            record = self.records.setdefault(name, StageRecord(name))
+        active = _ActiveStage(record, time.perf_counter(), current, current)
+        stack.append(active)
+        try:
+            yield record
+        finally:
+            stack.pop()
+            with self._lock:
+                record.calls += 1
+                record.wall_time += time.perf_counter() - active.start_time
+            if track_memory:
+                if tracemalloc.is_tracing():
+                    active.max_peak = max(active.max_peak, tracemalloc.get_traced_memory()[1])
+                record.peak_memory = max(record.peak_memory, active.max_peak - active.start_memory)
+                if stack:
+                    stack[-1].max_peak = max(stack[-1].max_peak, active.max_peak)
+
+    def stage(self, name: str):
+        """Context manager timing the enclosed block as `name`; a shared no-op when disabled."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._stage(name)
+
+    def add_rows(self, rows: int) -> None:
+        stack = self._active
+        if self.enabled and stack:
+            with self._lock:
+                stack[-1].record.rows += rows
+
+    def report(self) -> str:
+        """Return a stage breakdown table, slowest stage first."""
+        total_time = self._total_time if not self.enabled else time.perf_counter() - self._started_at
+        lines = [f"{'Stage':<24}{'Calls':>8}{'Wall (s)':>12}{'% Total':>10}{'Rows':>12}{'Peak (MB)':>12}"]
+        for record in sorted(self.records.values(), key=lambda r: r.wall_time, reverse=True):
+            share = record.wall_time / total_time * 100 if total_time > 0 else 0.0
+            lines.append(
+                f"{record.name:<24}{record.calls:>8}{record.wall_time:>12.3f}{share:>9.1f}%{record.rows:>12}{record.peak_memory / (1024 * 1024):>12.1f}"
+            )
+        lines.append(f"{'Total':<24}{'':>8}{total_time:>12.3f}")
+        return "\n".join(lines)
+
+    def dump_stats(self, path: str) -> None:
+        """Write the cProfile statistics (pstats format, e.g. for snakeviz)."""
+        if self._cprofile is None:
+            raise RuntimeError("cProfile was not enabled for this profiling session")
+        self._cprofile.dump_stats(path)
+
+
+PROFILER = Profiler()
+
+
+def stage(name: str):
+    """Time the enclosed block as a stage of the global profiler."""
+    return PROFILER.stage(name)
+
+
+def record_rows(rows: int) -> None:
+    """Attribute `rows` processed rows to the innermost running stage."""
+    if PROFILER.enabled:
+        PROFILER.add_rows(rows)
+
+
+def profiled(name: str) -> Callable[[F], F]:
+    """Decorator recording each call of the wrapped function as stage `name`."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+            with PROFILER._stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def start_profiling(use_cprofile: bool = False) -> None:
+    PROFILER.enable(use_cprofile)
+
+
+def finish_profiling(output_path: Optional[str] = None) -> str:
+    """Stop profiling, optionally dump cProfile stats to `output_path`, and return the stage breakdown."""
+    PROFILER.disable()
+    if output_path:
+        PROFILER.dump_stats(output_path)
+    return PROFILER.report()
@@ -0,0 +1,106 @@
+from typing import Sequence, Union
+import warnings
+
+import numpy as np
+
+# Percentile buckets of the rank shading: deciles
+RANK_BUCKETS = 10
+
+
+def top_k(values: np.ndarray, k: int, largest: bool = True) -> np.ndarray:
+    """
+    Row indices of the k largest (or smallest) values of every column of a period matrix, best first.
+
+    Each column is partitioned around its k-th value (O(n) per period) and only the k rows selected are
+    sorted. Ties keep the earlier row, as argmax does, and NaN never ranks.
+
+    Args:
+        values (np.ndarray): One row per ticker, one column per period
+        k (int): Rows to keep per column
+        largest (bool): Rank the largest values first, or the smallest
+
+    Returns:
+        np.ndarray: (k, n_columns) row indices, -1 where a column has fewer than k values
+    """
+    values = np.asarray(values, dtype=float).reshape(len(values), -1)
+    n_rows, n_columns = values.shape
+    ranked = np.full((max(k, 0), n_columns), -1, dtype=np.intp)
+    if k <= 0 or n_rows == 0:
+        return ranked
+    missing = np.isnan(values)
+    # Smaller keys rank first; NaN sorts last and is dropped below
+    keys = np.where(missing, np.inf, -values if largest else values)
+    kth = np.partition(keys, k - 1, axis=0)[k - 1] if k < n_rows else np.full(n_columns, np.inf)
+    for j in range(n_columns):
+        key, usable = keys[:, j], ~missing[:, j]
+        better = np.flatnonzero((key < kth[j]) & usable)
+        # Of the rows tied with the k-th value, the earliest ones fill the remaining places
+        tied = np.flatnonzero((key == kth[j]) & usable)[: k - len(better)]
+        chosen = np.concatenate([better, tied])
+        chosen = chosen[np.lexsort((chosen, key[chosen]))]
+        ranked[: len(chosen), j] = chosen
+    return ranked
+
+
+def percentile_buckets(values: np.ndarray, buckets: int = RANK_BUCKETS) -> np.ndarray:
+    """
+    Cross-sectional percentile bucket of every value within its column of a period matrix.
+
+    Bucket edges are column quantiles, found by selection rather than a full sort, and each value is
+    placed with a binary search over the edges, so a period costs O(n log buckets). Values equal to an
+    edge land between the buckets on either side of it, so a flat column sits in the middle.
+
+    Returns:
+        np.ndarray: Same shape as values, 0 for the lowest bucket up to buckets - 1 for the highest, -1 for NaN
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.full(values.shape, -1, dtype=np.intp)
+    if not values.size:
+        return result
+    matrix, found = values.reshape(len(values), -1), result.reshape(len(values), -1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns
+        edges = np.nanquantile(matrix, np.linspace(0, 1, buckets + 1)[1:-1], axis=0).reshape(buckets - 1, matrix.shape[1])
+    for j in range(matrix.shape[1]):
+        usable = np.flatnonzero(~np.isnan(matrix[:, j]))
+        column = matrix[usable, j]
+        found[usable, j] = (np.searchsorted(edges[:, j], column, side="left") + np.searchsorted(edges[:, j], column, side="right")) // 2
+    return result
+
+
+class RunningTopK:
+    """
+    Top (or bottom) k rows of every column over rows that arrive one at a time, e.g. streamed table rows.
+
+    Rows are buffered in blocks; each full block is reduced with top_k together with the current
+    leaders, so memory stays O(k + block) per column and the work O(n). Leaders always precede the
+    block, so ties keep the earlier row as top_k does.
+    """
+
+    def __init__(self, n_columns: int, k: int, largest: bool = True, block: int = 1024):
+        self.k = k
+        self.largest = largest
+        self._values = np.full((k + block, n_columns), np.nan)
+        self._ids = np.full((k + block, n_columns), "", dtype=object)
+        self._size = k
+
+    def add(self, row_id: str, values: Union[Sequence[float], np.ndarray]) -> None:
+        if self._size == len(self._values):
+            self._reduce()
+        self._values[self._size] = values
+        self._ids[self._size] = row_id
+        self._size += 1
+
+    def _reduce(self) -> None:
+        ranked = top_k(self._values[: self._size], self.k, self.largest)
+        found = ranked >= 0
+        rows = np.where(found, ranked, 0)
+        values = np.where(found, np.take_along_axis(self._values, rows, axis=0), np.nan)
+        ids = np.where(found, np.take_along_axis(self._ids, rows, axis=0), "")
+        self._values[: self.k], self._ids[: self.k] = values, ids
+        self._size = self.k
+
+    def ids(self) -> np.ndarray:
+        """(k, n_columns) IDs of the leading rows, best first; empty strings where a column has fewer than k values."""
+        self._reduce()
+        return self._ids[: self.k].copy()
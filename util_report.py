@@ -0,0 +1,64 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Union, cast
+
+from class_definition import ColumnarContent, Content
+from util_ui import PDF, load_content, render_tables, warm_font_cache
+
+# contents: Content dicts, ColumnarContent objects or paths to Content JSON files (loaded inside the worker)
+ReportJob = namedtuple('ReportJob', ['contents', 'output_path'])
+
+ReportContent = Union[str, Dict, ColumnarContent]
+
+
+def _load(content: ReportContent) -> Union[Dict, ColumnarContent]:
+    # load_content returns the parsed JSON as a plain Dict; the files it reads hold Content
+    return ColumnarContent.from_content(cast(Content, load_content(content))) if isinstance(content, str) else content
+
+
+def render_report(contents: List[ReportContent], output_path: str) -> str:
+    """
+    Render one landscape PDF report with one table per content.
+
+    Args:
+        contents (List[ReportContent]): The tables of the report, in order
+        output_path (str): Where to write the PDF
+
+    Returns:
+        str: output_path
+    """
+    pdf = PDF(orientation="L")
+    pdf.add_page()
+    render_tables(pdf, [_load(content) for content in contents])
+    pdf.output(output_path)
+    return output_path
+
+
+def _render_job(job: ReportJob) -> str:
+    return render_report(job.contents, job.output_path)
+
+
+def render_reports(jobs: Iterable[ReportJob], max_workers: Optional[int] = None, chunksize: int = 1) -> List[str]:
+    """
+    Render many reports concurrently across a process pool.
+
+    Each worker loads the table fonts once at start-up and keeps its string width cache for all the
+    jobs it renders, so reports sharing tickers and descriptions reuse the same measurements.
+
+    Args:
+        jobs (Iterable[ReportJob]): (contents, output_path) pairs
+        max_workers (Optional[int]): Number of worker processes (default: os.cpu_count()); 1 renders in-process
+        chunksize (int): Jobs handed to a worker at a time; raise it for many small reports
+
+    Returns:
+        List[str]: The output paths, in job order
+    """
+    jobs = list(jobs)
+    max_workers = min(max_workers or os.cpu_count() or 1, max(len(jobs), 1))
+    if max_workers == 1:
+        warm_font_cache()
+        return [_render_job(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=warm_font_cache) as executor:
+        return list(executor.map(_render_job, jobs, chunksize=chunksize))
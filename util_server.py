@@ -0,0 +1,279 @@
+import argparse
+import datetime
+import functools
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from class_definition import ColumnarContent
+from util_data import PERIOD_LABELS, _aggregate_periods, _build_period_contents, _read_close_frame, total_return_factors
+from util_profile import stage
+from util_ui import PDF, render_tables
+
+
+# Ticker symbols as yfinance writes them (e.g. BRK-B, ^GSPC, EURUSD=X); anything else could leave the price directory
+TICKER_PATTERN = re.compile(r"^[A-Za-z0-9.^=_-]+$")
+
+
+class BadRequest(ValueError):
+    """A request the client got wrong, answered with 400; any other failure is the server's and answered with 500."""
+
+
+def _file_version(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class MtimeCache:
+    """
+    In-memory cache of values derived from files, invalidated when any source file's mtime or size changes.
+
+    Thread-safe; a value is computed at most once per version of its source files: concurrent requests
+    for the same key wait on that key's lock while one of them computes, then share its value. Other
+    keys are computed in parallel.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Any, Tuple[tuple, Any]] = {}
+        self._key_locks: Dict[Any, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, key: Any, versions: tuple) -> Optional[Tuple[tuple, Any]]:
+        """The entry of `key` if it was computed from `versions`, counted as a hit; the caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == versions:
+            self.hits += 1
+            return entry
+        return None
+
+    def get(self, key: Any, paths: Sequence[str], compute: Callable[[], Any]) -> Any:
+        """Return the cached value of `key` if `paths` are unchanged since it was computed, else compute and store it."""
+        versions = tuple(_file_version(path) for path in paths)
+        with self._lock:
+            entry = self._cached(key, versions)
+            if entry is not None:
+                return entry[1]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                # Another request may have computed this version while this one waited for the key
+                entry = self._cached(key, versions)
+                if entry is not None:
+                    return entry[1]
+                self.misses += 1
+            value = compute()
+            with self._lock:
+                self._entries[key] = (versions, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class ReportService:
+    """
+    Report logic of the warm daemon: parsed price frames, period aggregates and ledger positions stay in
+    memory between requests and are recomputed only for files that changed. Everything is read from
+    local files; nothing is downloaded.
+    """
+
+    def __init__(self, price_dir: str, ledger_loader: Optional[Callable[[], Any]] = None, ledger_path: Optional[str] = None, split_adjust: bool = False):
+        """
+        Args:
+            price_dir (str): Directory of the <ticker>.csv price files
+            ledger_loader (Optional[Callable[[], Any]]): Returns the ledger as a polars DataFrame (e.g. parse_investment_ledger)
+            ledger_path (Optional[str]): File the ledger is read from; its mtime invalidates the position index
+            split_adjust (bool): Restate positions in today's shares using the splits in the price files (see compute_eom_position)
+        """
+        self.price_dir = price_dir
+        self.ledger_loader = ledger_loader
+        self.ledger_path = ledger_path
+        self.split_adjust = split_adjust
+        self.frames = MtimeCache()
+        self.aggregates = MtimeCache()
+        self.positions = MtimeCache()
+
+    def _path(self, ticker: str) -> str:
+        if not TICKER_PATTERN.match(ticker):
+            raise BadRequest(f"Invalid ticker {ticker!r}")
+        return os.path.join(self.price_dir, f"{ticker}.csv")
+
+    def _frame(self, ticker: str, total_return: bool) -> pd.DataFrame:
+        def parse() -> pd.DataFrame:
+            long_df = _read_close_frame({ticker: self._path(ticker)}, total_return)
+            if total_return:
+                long_df = long_df.sort_values('Date', kind='stable')
+                long_df['Close'] = long_df['Close'] * total_return_factors(long_df)
+            return long_df
+
+        return self.frames.get((ticker, total_return), [self._path(ticker)], parse)
+
+    def _aggregate(self, ticker: str, freq: str, total_return: bool) -> pd.DataFrame:
+        return self.aggregates.get((ticker, freq, total_return), [self._path(ticker)], lambda: _aggregate_periods(self._frame(ticker, total_return), freq))
+
+    def period_contents(self, descriptions: Dict[str, str], freq: str = 'W', total_return: bool = False) -> Tuple[ColumnarContent, ColumnarContent]:
+        """Changes and prices content of the tickers, as calculate_period_data, from the in-memory caches."""
+        if freq not in PERIOD_LABELS:
+            raise BadRequest(f"Unsupported aggregation window '{freq}', expected one of {list(PERIOD_LABELS)}")
+        missing = [ticker for ticker in descriptions if not os.path.exists(self._path(ticker))]
+        if missing:
+            raise FileNotFoundError(f"No price file for: {', '.join(missing)}")
+        period_df = pd.concat([self._aggregate(ticker, freq, total_return) for ticker in descriptions], ignore_index=True)
+        return _build_period_contents(freq, list(descriptions), descriptions, period_df, total_return)
+
+    def report(self, descriptions: Dict[str, str], freqs: Sequence[str] = ('W',), total_return: bool = False) -> bytes:
+        """Render the changes and prices tables of every window into a PDF and return its bytes."""
+        pdf = PDF(orientation="L")
+        pdf.add_page()
+        render_tables(pdf, (content for freq in freqs for content in self.period_contents(descriptions, freq, total_return)))
+        with stage("pdf_output"):
+            return pdf.output(dest='S').encode('latin-1')
+
+    def position_index(self):
+        """
+        PositionIndex of the ledger, like the month-end positions of the ledger module: in today's shares
+        when the service split-adjusts, as booked otherwise.
+
+        It is rebuilt only when the ledger file changes; the splits are those in the price files at that time.
+        """
+        if self.ledger_loader is None:
+            raise LookupError("The service was started without a ledger")
+        from util_catalog import PriceCatalog
+        from util_positions import PositionIndex, split_factors
+
+        def build():
+            transactions = self.ledger_loader()
+            if not self.split_adjust:
+                return PositionIndex(transactions)
+            held = [security for security in transactions["Security"].drop_nulls().unique().to_list() if security != "Cash"]
+            catalog = PriceCatalog(self.price_dir)
+            catalog.refresh(held)
+            return PositionIndex(transactions, split_factors(catalog, held))
+
+        paths = [self.ledger_path] if self.ledger_path else []
+        return self.positions.get("ledger", paths, build)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: {"hits": cache.hits, "misses": cache.misses} for name, cache in (("frames", self.frames), ("aggregates", self.aggregates), ("positions", self.positions))}
+
+
+def _descriptions(query: Dict[str, List[str]]) -> Dict[str, str]:
+    """Tickers and descriptions from a query string: tickers=AAPL,MSFT plus optional <ticker>=<description> pairs"""
+    tickers = [ticker for ticker in query.get("tickers", [""])[0].split(",") if ticker]
+    if not tickers:
+        raise BadRequest("Missing 'tickers' parameter")
+    invalid = [ticker for ticker in tickers if not TICKER_PATTERN.match(ticker)]
+    if invalid:
+        raise BadRequest(f"Invalid tickers: {', '.join(invalid)}")
+    return {ticker: query.get(ticker, [ticker])[0] for ticker in tickers}
+
+
+def _param(query: Dict[str, List[str]], name: str) -> str:
+    if name not in query:
+        raise BadRequest(f"Missing '{name}' parameter")
+    return query[name][0]
+
+
+def _date_param(query: Dict[str, List[str]], name: str) -> str:
+    value = _param(query, name)
+    try:
+        datetime.date.fromisoformat(value)
+    except ValueError:
+        raise BadRequest(f"Invalid date {value!r}, expected YYYY-MM-DD")
+    return value
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /health                                   -> {"status": "ok", "cache": {...}}
+    GET /content?tickers=A,B&freq=W[&total_return=1] -> {"changes": Content, "prices": Content}
+    GET /report?tickers=A,B&periods=W,M           -> application/pdf
+    GET /positions?account=IRA&date=2024-06-30    -> {"AAPL": 10.0, ...}
+    """
+
+    service: ReportService  # set on the subclass created by make_server
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Any) -> None:
+        self._send(status, json.dumps(payload).encode('utf-8'), "application/json")
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        total_return = query.get("total_return", ["0"])[0] in ("1", "true")
+        try:
+            if url.path == "/health":
+                self._send_json(200, {"status": "ok", "cache": self.service.stats()})
+            elif url.path == "/content":
+                changes, prices = self.service.period_contents(_descriptions(query), query.get("freq", ["W"])[0].upper(), total_return)
+                self._send_json(200, {"changes": changes.to_content(), "prices": prices.to_content()})
+            elif url.path == "/report":
+                freqs = [freq.upper() for freq in query.get("periods", ["W"])[0].split(",") if freq]
+                self._send(200, self.service.report(_descriptions(query), freqs, total_return), "application/pdf")
+            elif url.path == "/positions":
+                index = self.service.position_index()
+                self._send_json(200, index.position_as_of(_param(query, "account"), _date_param(query, "date")))
+            else:
+                self._send_json(404, {"error": f"Unknown path {url.path}"})
+        except BadRequest as e:
+            self._send_json(400, {"error": str(e)})
+        except (FileNotFoundError, LookupError) as e:
+            self._send_json(404, {"error": str(e)})
+        except Exception as e:
+            # E.g. a price file caught mid-rewrite; the client still gets an answer and the daemon keeps serving
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # keep the daemon's output quiet
+
+
+def _read_ledger(path: str, sheet_name: str) -> Any:
+    import polars as pl
+
+    return pl.read_excel(path, sheet_name=sheet_name)
+
+
+def make_server(service: ReportService, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """HTTP server bound to `service`; port 0 picks a free port (see server.server_address)."""
+    handler = type("BoundReportRequestHandler", (ReportRequestHandler,), {"service": service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve reports from a warm process with in-memory caches')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default: localhost only)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+    parser.add_argument('--price-dir', help='Directory of the <ticker>.csv price files (default: from ~/.buffet)')
+    parser.add_argument('--ledger', help='Investment ledger workbook to answer /positions from')
+    parser.add_argument('--ledger-sheet', default='Transactions-Schwab', help='Ledger sheet name (default: Transactions-Schwab)')
+    parser.add_argument('--split-adjust', action='store_true', help='Report /positions in today\'s shares using the splits in the price files')
+    args = parser.parse_args()
+
+    ledger_loader: Optional[Callable[[], Any]] = functools.partial(_read_ledger, args.ledger, args.ledger_sheet) if args.ledger else None
+    if args.price_dir is None:
+        from util_data import get_price_dir
+
+        args.price_dir = get_price_dir()
+    server = make_server(ReportService(args.price_dir, ledger_loader, args.ledger, args.split_adjust), args.host, args.port)
+    print(f"Serving reports from {args.price_dir} on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,7 +1,14 @@
 import pandas as pd
+import numpy as np
 from fpdf import FPDF
-from typing import Dict, List, Union
+from fpdf.fonts import fpdf_charwidths
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from dataclasses import dataclass, replace
+from functools import lru_cache, partial
 import json
+from class_definition import ColumnarContent
+from util_profile import profiled, record_rows
+from util_rank import RANK_BUCKETS, RunningTopK, percentile_buckets
 
 
 def load_content(json_file: str) -> Dict:
@@ -10,8 +17,11 @@ def load_content(json_file: str) -> Dict:
         return json.load(f)
 
 
-def transform_data(content: Dict) -> pd.DataFrame:
+def transform_data(content: Union[Dict, ColumnarContent]) -> pd.DataFrame:
     """Transform content dictionary into a DataFrame"""
+    if isinstance(content, ColumnarContent):
+        return transform_columnar(content)
+
     time_periods: List[str] = content["metadata"]["time"]
     transformed_data: Dict[str, List[Union[str, float]]] = {"ID": [], "Description": []}
     for period in time_periods:
@@ -32,116 +42,441 @@ def transform_data(content: Dict) -> pd.DataFrame:
     return pd.DataFrame(transformed_data)
 
 
+def transform_columnar(content: ColumnarContent) -> pd.DataFrame:
+    """Transform array-backed content into a DataFrame without unpacking it row by row"""
+    df = pd.DataFrame(content.values, columns=content.time)
+    df.insert(0, "ID", content.ids)
+    df.insert(1, "Description", content.descriptions)
+    if content.totals is not None:
+        df["Total"] = content.totals
+    return df
+
+
+def content_name(content: Union[Dict, ColumnarContent]) -> str:
+    return content.name if isinstance(content, ColumnarContent) else content["metadata"]["name"]
+
+
+def content_datatype(content: Union[Dict, ColumnarContent]) -> str:
+    return content.datatype if isinstance(content, ColumnarContent) else content["metadata"].get("datatype", "return")
+
+
 class PDF(FPDF):
     def set_cell_colors(self, value: float) -> None:
         if value > 0:
             self.set_fill_color(230, 255, 230)  # light green background
             self.set_text_color(0, 100, 0)  # dark green text
+        elif value != value:  # NaN: no data for this period
+            self.set_fill_color(255, 255, 255)
+            self.set_text_color(0, 0, 0)
         else:
             self.set_fill_color(255, 230, 230)  # light red background
             self.set_text_color(139, 0, 0)  # dark red text
 
+    def set_rank_colors(self, value: float, bucket: int, buckets: int = RANK_BUCKETS) -> None:
+        """Shade by percentile bucket within the column: from red for the lowest through white to green for the highest; the text keeps the sign colors"""
+        if bucket < 0 or value != value:
+            self.set_cell_colors(value)
+            return
+        self.set_fill_color(*_rank_fill(bucket, buckets))
+        if value > 0:
+            self.set_text_color(0, 100, 0)
+        else:
+            self.set_text_color(139, 0, 0)
+
+
+@lru_cache(maxsize=None)
+def _rank_fill(bucket: int, buckets: int) -> Tuple[int, int, int]:
+    position = (2 * bucket + 1) / buckets - 1  # -1 for the lowest bucket, 1 for the highest
+    fade = int(round(255 - 75 * abs(position)))
+    return (fade, 255, fade) if position > 0 else (255, fade, fade)
+
+
+@lru_cache(maxsize=65536)
+def _core_string_width(fontkey: str, font_size: float, text: str) -> float:
+    cw = fpdf_charwidths[fontkey]
+    return sum(cw.get(char, 0) for char in text) * font_size / 1000.0
+
 
 def get_string_width(pdf: FPDF, text: str) -> float:
+    """String width in the current font; core font widths are memoized per process and shared by every PDF"""
+    if pdf.current_font.get('type') == 'core':
+        return _core_string_width(pdf.font_family + pdf.font_style, pdf.font_size, str(text))
     return pdf.get_string_width(str(text))
 
 
-def create_table(pdf: FPDF, df: pd.DataFrame, content: Dict, start_y: float, is_price_table: bool = False) -> float:
-    """Create a table in the PDF and return the ending Y position"""
-    time_periods = list(df.columns)[2:]  # Skip ID and Description columns
+def warm_font_cache(fonts=(("Courier", ""), ("Courier", "B"))) -> None:
+    """Load the core font metrics used by the report tables, so later PDFs in this process skip parsing them"""
+    pdf = FPDF()
+    for family, style in fonts:
+        pdf.set_font(family, style)
+
+
+def format_value(value: float, is_price_table: bool) -> str:
+    if value != value:  # NaN: no data for this period
+        return ""
+    return f"{value:.2f}" if is_price_table else f"{value:.1f}%"
+
+
+@dataclass
+class TableLayout:
+    """Column geometry of a table, computed once and reused for every column band and page."""
+
+    time_periods: List[str]
+    id_width: float
+    description_width: float
+    standard_return_width: float
+    row_height: float
+    is_price_table: bool
+    sparkline_width: float = 0.0  # Trend column after Description; 0 leaves it out
+
+    def column_bands(self, available_width: float) -> List[List[str]]:
+        """Split the periods into bands that fit next to the ID, Description and Trend columns."""
+        per_band = max(1, int((available_width - self.id_width - self.description_width - self.sparkline_width) // self.standard_return_width))
+        return [self.time_periods[i : i + per_band] for i in range(0, len(self.time_periods), per_band)] or [[]]
+
+
+# Width of the Trend column in mm, when a table has sparklines
+SPARKLINE_WIDTH = 16.0
+
+
+@lru_cache(maxsize=8192)
+def _sparkline_path(series: bytes, cumulative: bool, width: float, height: float) -> str:
+    """
+    PDF path operators drawing a series as a polyline in a width x height box (points, origin at the bottom left).
+
+    Keyed by the raw bytes of the series, so a row drawn again (another column band, the next report of
+    the daemon) costs a dictionary lookup. Missing values break the line into separate pieces.
+
+    Args:
+        series (bytes): float64 values, one per period
+        cumulative (bool): The values are % returns, drawn as the growth of 1 invested; otherwise as they are
+        width (float): Box width in points
+        height (float): Box height in points
+    """
+    values = np.frombuffer(series, dtype=np.float64)
+    missing = np.isnan(values)
+    if cumulative:
+        values = np.where(missing, np.nan, np.cumprod(1 + np.where(missing, 0.0, values) / 100))
+    points = np.flatnonzero(~missing)
+    if len(points) < 2:
+        return ""
+    low, high = values[points].min(), values[points].max()
+    x = points * (width / (len(values) - 1))
+    y = (values[points] - low) * (height / (high - low)) if high > low else np.full(len(points), height / 2)
+    # A point after a gap (and the first one) starts a new piece; one format call writes every point
+    template = "".join(np.where(np.diff(points, prepend=-2) > 1, "%.2f %.2f m ", "%.2f %.2f l "))
+    return template % tuple(np.column_stack([x, y]).ravel().tolist()) + "S"
+
+
+def draw_sparkline(pdf: FPDF, x: float, y: float, width: float, height: float, series: np.ndarray, cumulative: bool) -> None:
+    """Draw a row's series into the cell at (x, y) with raw path operators, without touching the document's drawing state."""
+    padding = 0.15 * height
+    path = _sparkline_path(np.ascontiguousarray(series, dtype=np.float64).tobytes(), cumulative, round((width - 2 * padding) * pdf.k, 2), round((height - 2 * padding) * pdf.k, 2))
+    if path:
+        # Move the origin to the bottom left of the box (PDF y points up), draw, and restore the graphics state
+        pdf._out(f"q 0.3 w 0.2 0.2 0.6 RG 1 0 0 1 {(x + padding) * pdf.k:.2f} {(pdf.h - y - height + padding) * pdf.k:.2f} cm {path} Q")
+
+
+# One table row as it is streamed into the writer: (id, description, one value per time period)
+RowValues = Union[Sequence[float], np.ndarray]
+RowRecord = Tuple[str, str, RowValues]
+RowSource = Union[Callable[[], Iterable[RowRecord]], Iterable[RowRecord]]
+
+
+def content_columns(content: Union[Dict, ColumnarContent]) -> List[str]:
+    """Table columns of a content after ID and Description: its time periods, then Total when it has totals"""
+    if isinstance(content, ColumnarContent):
+        return content.time + (["Total"] if content.totals is not None else [])
+    has_total = bool(content["data"]) and "total" in content["data"][0]
+    return content["metadata"]["time"] + (["Total"] if has_total else [])
+
+
+def content_rows(content: Union[Dict, ColumnarContent]) -> Iterator[RowRecord]:
+    """Yield the rows of a content one at a time, without building a DataFrame; missing values are NaN"""
+    if isinstance(content, ColumnarContent):
+        for i in range(len(content)):
+            values = content.values[i] if content.totals is None else np.append(content.values[i], content.totals[i])
+            yield content.ids[i], content.descriptions[i], values
+        return
+    n_periods = len(content["metadata"]["time"])
+    for item in content["data"]:
+        values = np.full(n_periods + ("total" in item), np.nan)
+        timeseries = item["timeseries"]
+        values[: len(timeseries)] = [np.nan if value is None else value for value in timeseries]
+        if "total" in item:
+            values[-1] = item["total"]
+        yield item["id"], item["description"], values
 
-    highest_ids, lowest_ids = calculate_extremes(df, time_periods)
-    id_width, description_width, standard_return_width, row_height = calculate_column_widths(pdf, df, time_periods, is_price_table)
 
-    pdf.set_xy(pdf.l_margin, start_y)
-    add_table_title(pdf, content)
-    add_table_headers(pdf, time_periods, id_width, description_width, standard_return_width, row_height)
-    add_table_data(pdf, df, time_periods, id_width, description_width, standard_return_width, row_height, is_price_table)
-    if not is_price_table:
-        add_summary_rows(pdf, time_periods, id_width, description_width, standard_return_width, row_height, highest_ids, lowest_ids)
+def dataframe_rows(df: pd.DataFrame, time_periods: List[str]) -> Iterator[RowRecord]:
+    """Yield the rows of a transform_data DataFrame"""
+    yield from zip(df["ID"], df["Description"], df[time_periods].to_numpy(dtype=float))
 
-    return pdf.get_y()
 
+def _row_passes(rows: RowSource) -> Callable[[], Iterable[RowRecord]]:
+    """Turn a row source into a callable giving one pass over the rows; a plain iterator allows a single pass"""
+    if callable(rows):
+        return rows
+    consumed = False
+
+    def single_pass() -> Iterable[RowRecord]:
+        nonlocal consumed
+        if consumed:
+            raise ValueError("This table needs several passes over its rows; pass a callable returning a new iterator, or a layout and fewer periods")
+        consumed = True
+        return rows
+
+    return single_pass
 
-def calculate_extremes(df: pd.DataFrame, time_periods: List[str]):
-    highest_ids, lowest_ids = {}, {}
-    for period in time_periods:
-        highest_idx = df[period].idxmax()
-        lowest_idx = df[period].idxmin()
-        highest_ids[period] = str(df.loc[highest_idx, "ID"])
-        lowest_ids[period] = str(df.loc[lowest_idx, "ID"])
-    return highest_ids, lowest_ids
 
+def measure_rows(pdf: FPDF, time_periods: List[str], rows: Iterable[RowRecord], is_price_table: bool) -> TableLayout:
+    """
+    Column geometry from one pass over streamed rows, keeping only running maxima.
 
-def calculate_column_widths(pdf: FPDF, df: pd.DataFrame, time_periods: List[str], is_price_table: bool):
+    The widest ID and Description, and per column the running largest and smallest value: digits share one
+    width in the core fonts, so the formatted text of those two is the widest of the column.
+    """
     pdf.set_font("Courier", "", 5)
     pdf.set_font("Courier", "B", 6)
-
-    all_ids = (
-        list(df["ID"]) + [str(df.loc[df[period].idxmax(), "ID"]) for period in time_periods] + [str(df.loc[df[period].idxmin(), "ID"]) for period in time_periods]
+    id_width = get_string_width(pdf, "ID")
+    description_width = get_string_width(pdf, "Description")
+    highest = np.full(len(time_periods), np.nan)
+    lowest = np.full(len(time_periods), np.nan)
+    for row_id, description, values in rows:
+        id_width = max(id_width, get_string_width(pdf, str(row_id)))
+        description_width = max(description_width, get_string_width(pdf, str(description)))
+        values = np.asarray(values, dtype=float)
+        highest = np.fmax(highest, values)
+        lowest = np.fmin(lowest, values)
+
+    candidates = set(time_periods) | {format_value(value, is_price_table) for value in np.concatenate([highest, lowest]).tolist()}
+    max_return_width = max((get_string_width(pdf, text) for text in candidates), default=0.0)
+    return TableLayout(time_periods, id_width * 1.2, description_width * 1.15, max_return_width * 1.25, pdf.font_size * 1.8, is_price_table)
+
+
+def declare_layout(
+    pdf: FPDF, time_periods: List[str], is_price_table: bool, id_chars: int = 8, description_chars: int = 40, value_chars: int = 8
+) -> TableLayout:
+    """
+    Column geometry declared up front, for streaming rows without a measuring pass.
+
+    The table font is monospaced, so a width follows from the longest text it has to hold.
+
+    Args:
+        pdf (FPDF): The document, used for the font metrics
+        time_periods (List[str]): Column headers
+        is_price_table (bool): Price/statistic (2 decimals) or return (1 decimal and %) formatting
+        id_chars (int): Longest ID
+        description_chars (int): Longest description
+        value_chars (int): Longest formatted value, e.g. 8 for '-1234.5%'
+    """
+    pdf.set_font("Courier", "", 5)
+    pdf.set_font("Courier", "B", 6)
+    char_width = get_string_width(pdf, "0")
+    value_width = max([value_chars * char_width] + [get_string_width(pdf, period) for period in time_periods])
+    return TableLayout(
+        time_periods,
+        max(2, id_chars) * char_width * 1.2,
+        max(len("Description"), description_chars) * char_width * 1.15,
+        value_width * 1.25,
+        pdf.font_size * 1.8,
+        is_price_table,
     )
-    id_width = max(get_string_width(pdf, "ID"), max(get_string_width(pdf, str(id_val)) for id_val in all_ids)) * 1.2
 
-    header_desc_width = get_string_width(pdf, "Description")
-    content_desc_width = max(get_string_width(pdf, str(desc)) for desc in df["Description"])
-    description_width = max(header_desc_width, content_desc_width) * 1.15
 
-    max_return_width = 0.0
-    for period in time_periods:
-        header_width = get_string_width(pdf, period)
-        content_widths = [get_string_width(pdf, f"{value:.2f}" if is_price_table else f"{value:.1f}%") for value in df[period]]
-        content_width = max(content_widths)
-        max_return_width = max(max_return_width, max(header_width, content_width))
+@profiled("pdf_table")
+def stream_table(
+    pdf: FPDF,
+    title: str,
+    time_periods: List[str],
+    rows: RowSource,
+    start_y: float,
+    is_price_table: bool = False,
+    layout: Optional[TableLayout] = None,
+    summary_rows: int = 1,
+    rank_shading: bool = False,
+    sparklines: bool = False,
+) -> float:
+    """
+    Lay out a table from a stream of rows and return the ending Y position.
+
+    Rows are written as they arrive and only running statistics are kept (the highest and lowest
+    returns per column for the summary rows, see RunningTopK), so memory does not grow with the number
+    of rows; rank shading is the exception, it needs a first pass collecting each band's values. Column
+    widths come from `layout` (see declare_layout) or, without one, from a first measuring pass.
+    Periods that don't fit the page width are split into column bands, each one more pass over the rows
+    laid out below the previous one with the ID and Description columns repeated. Rows that don't fit
+    the page height continue on a new page under a repeated header row.
+
+    Args:
+        pdf (FPDF): The document
+        title (str): Table title
+        time_periods (List[str]): Column headers, one per value of each row
+        rows (RowSource): A callable returning a fresh iterator of (id, description, values) rows for
+            each pass, or an iterator when a single pass is enough (a layout and a single band)
+        start_y (float): Where the table starts
+        is_price_table (bool): Prices and statistics print as plain numbers without colors or summary rows
+        layout (Optional[TableLayout]): Pre-declared column widths
+        summary_rows (int): IDs listed per column in each of the Highest and Lowest Return blocks of a return table
+        rank_shading (bool): Shade the cells of a return table by their percentile within the column instead of by sign
+        sparklines (bool): Add a Trend column drawing each row's periods (Total excluded), as growth for a return table
+    """
+    passes = _row_passes(rows)
+    layout = layout or measure_rows(pdf, time_periods, passes(), is_price_table)
+    if sparklines and not layout.sparkline_width:
+        layout = replace(layout, sparkline_width=SPARKLINE_WIDTH)
+    column_index = {period: i for i, period in enumerate(time_periods)}
+    series_columns = [i for i, period in enumerate(time_periods) if period != "Total"]
 
-    standard_return_width = max_return_width * 1.25
-    row_height = pdf.font_size * 1.8
-    return id_width, description_width, standard_return_width, row_height
+    pdf.set_xy(pdf.l_margin, start_y)
+    for band_number, band in enumerate(layout.column_bands(pdf.w - pdf.l_margin - pdf.r_margin)):
+        band_columns = [column_index[period] for period in band]
+        # Keep the title, the header and at least one row together
+        if pdf.get_y() + 6.5 + 2 * layout.row_height > pdf.page_break_trigger:
+            pdf.add_page()
+        elif band_number > 0:
+            pdf.ln(2)
+        add_table_title(pdf, title, continued=band_number > 0)
+        add_table_headers(pdf, band, layout.id_width, layout.description_width, layout.standard_return_width, layout.row_height, layout.sparkline_width)
+
+        ranks = None
+        if rank_shading and not is_price_table:
+            band_matrix = np.array([np.asarray(values, dtype=float)[band_columns] for _, _, values in passes()]).reshape(-1, len(band))
+            ranks = percentile_buckets(band_matrix)
+        highest = RunningTopK(len(band), summary_rows, largest=True)
+        lowest = RunningTopK(len(band), summary_rows, largest=False)
+        n_rows = 0
+        for row_id, description, values in passes():
+            row_id, band_values = str(row_id), np.asarray(values, dtype=float)[band_columns]
+            series = np.asarray(values, dtype=float)[series_columns] if layout.sparkline_width else None
+            add_table_row(pdf, row_id, str(description), band_values, band, layout, None if ranks is None else ranks[n_rows], series)
+            n_rows += 1
+            if not is_price_table:
+                highest.add(row_id, band_values)
+                lowest.add(row_id, band_values)
+        if band_number == 0:
+            record_rows(n_rows)
+
+        if not is_price_table and summary_rows > 0:
+            if pdf.get_y() + 2 * summary_rows * layout.row_height > pdf.page_break_trigger:
+                pdf.add_page()
+                add_table_headers(pdf, band, layout.id_width, layout.description_width, layout.standard_return_width, layout.row_height, layout.sparkline_width)
+            add_summary_rows(
+                pdf, band, layout.id_width, layout.description_width + layout.sparkline_width, layout.standard_return_width, layout.row_height,
+                dict(zip(band, highest.ids().T.tolist())), dict(zip(band, lowest.ids().T.tolist())),
+            )
+
+    return pdf.get_y()
+
+
+def create_table(
+    pdf: FPDF,
+    df: pd.DataFrame,
+    content: Union[Dict, ColumnarContent],
+    start_y: float,
+    is_price_table: bool = False,
+    summary_rows: int = 1,
+    rank_shading: bool = False,
+    sparklines: bool = False,
+) -> float:
+    """Create a table in the PDF from a transform_data DataFrame and return the ending Y position, see stream_table"""
+    time_periods = list(df.columns)[2:]  # Skip ID and Description columns
+    return stream_table(
+        pdf, content_name(content), time_periods, lambda: dataframe_rows(df, time_periods), start_y, is_price_table,
+        summary_rows=summary_rows, rank_shading=rank_shading, sparklines=sparklines,
+    )
 
 
-def add_table_title(pdf: FPDF, content: Dict):
+def render_tables(
+    pdf: FPDF,
+    contents: Iterable[Union[Dict, ColumnarContent]],
+    spacing: float = 5,
+    summary_rows: int = 1,
+    rank_shading: bool = False,
+    sparklines: bool = False,
+) -> float:
+    """
+    Lay out several tables one below the other, starting at the current position, and return the ending Y position.
+
+    Contents may come from a generator: each one is streamed row by row into the writer and can be
+    released before the next one is produced. summary_rows and rank_shading apply to the return tables and sparklines
+    to the return and price tables, see stream_table.
+    """
+    current_y = pdf.get_y()
+    for i, content in enumerate(contents):
+        if i > 0:
+            pdf.ln(spacing)  # Add spacing between tables
+            current_y = pdf.get_y()
+        # Only return tables get percent formatting, colors and highest/lowest rows; prices and statistics print as numbers
+        current_y = stream_table(
+            pdf, content_name(content), content_columns(content), partial(content_rows, content), current_y, content_datatype(content) != "return",
+            summary_rows=summary_rows, rank_shading=rank_shading, sparklines=sparklines and content_datatype(content) in ("return", "price"),
+        )
+    return current_y
+
+
+def add_table_title(pdf: FPDF, content: Union[str, Dict, ColumnarContent], continued: bool = False):
     pdf.set_font("Courier", "B", 7)
-    pdf.cell(0, 6, content["metadata"]["name"], ln=True, align="L")
+    title = content if isinstance(content, str) else content_name(content)
+    pdf.cell(0, 6, title + (" (cont.)" if continued else ""), ln=True, align="L")
     pdf.ln(0.5)
 
 
-def add_table_headers(pdf: FPDF, time_periods: List[str], id_width: float, description_width: float, standard_return_width: float, row_height: float):
+def add_table_headers(
+    pdf: FPDF, time_periods: List[str], id_width: float, description_width: float, standard_return_width: float, row_height: float, sparkline_width: float = 0.0
+):
     pdf.set_font("Courier", "B", 6)
     pdf.set_text_color(0, 0, 0)
     pdf.set_fill_color(240, 240, 240)
 
     pdf.cell(id_width, row_height, "ID", 1, fill=True, align="L")
     pdf.cell(description_width, row_height, "Description", 1, fill=True, align="L")
+    if sparkline_width:
+        pdf.cell(sparkline_width, row_height, "Trend", 1, fill=True, align="L")
     for period in time_periods:
         pdf.cell(standard_return_width, row_height, period, 1, align="L", fill=True)
     pdf.ln()
 
 
-def add_table_data(
+def ensure_row_fits(pdf: FPDF, time_periods: List[str], layout: TableLayout):
+    """Start a new page with a repeated header row if the next row would cross the page break."""
+    if pdf.get_y() + layout.row_height > pdf.page_break_trigger:
+        pdf.add_page()
+        add_table_headers(pdf, time_periods, layout.id_width, layout.description_width, layout.standard_return_width, layout.row_height, layout.sparkline_width)
+
+
+def add_table_row(
     pdf: FPDF,
-    df: pd.DataFrame,
+    row_id: str,
+    description: str,
+    row_values: RowValues,
     time_periods: List[str],
-    id_width: float,
-    description_width: float,
-    standard_return_width: float,
-    row_height: float,
-    is_price_table: bool,
+    layout: TableLayout,
+    ranks: Optional[Sequence[int]] = None,
+    series: Optional[np.ndarray] = None,
 ):
+    ensure_row_fits(pdf, time_periods, layout)
     pdf.set_font("Courier", "", 5)
-    for _, row in df.iterrows():
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_fill_color(255, 255, 255)
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_fill_color(255, 255, 255)
 
-        pdf.cell(id_width, row_height, str(row["ID"]), 1, fill=True, align="L")
-        pdf.cell(description_width, row_height, str(row["Description"]), 1, fill=True, align="L")
+    pdf.cell(layout.id_width, layout.row_height, row_id, 1, fill=True, align="L")
+    pdf.cell(layout.description_width, layout.row_height, description, 1, fill=True, align="L")
+    if layout.sparkline_width:
+        x, y = pdf.get_x(), pdf.get_y()
+        pdf.cell(layout.sparkline_width, layout.row_height, "", 1, fill=True)
+        if series is not None:
+            draw_sparkline(pdf, x, y, layout.sparkline_width, layout.row_height, series, not layout.is_price_table)
 
-        for period in time_periods:
-            value = float(row[period])
-            if not is_price_table and isinstance(pdf, PDF):
-                pdf.set_cell_colors(value)
-            pdf.set_font("Courier", "B", 5)
-            pdf.cell(standard_return_width, row_height, f"{value:.2f}" if is_price_table else f"{value:.1f}%", 1, align="L", fill=True)
-            pdf.set_font("Courier", "", 5)
-        pdf.ln()
+    pdf.set_font("Courier", "B", 5)
+    colored = not layout.is_price_table and isinstance(pdf, PDF)
+    for i, value in enumerate(map(float, row_values)):
+        if colored and ranks is not None:
+            pdf.set_rank_colors(value, ranks[i])
+        elif colored:
+            pdf.set_cell_colors(value)
+        pdf.cell(layout.standard_return_width, layout.row_height, format_value(value, layout.is_price_table), 1, align="L", fill=True)
+    pdf.ln()
 
 
 def add_summary_rows(
@@ -151,21 +486,22 @@ def add_summary_rows(
     description_width: float,
     standard_return_width: float,
     row_height: float,
-    highest_ids: Dict[str, str],
-    lowest_ids: Dict[str, str],
+    highest_ids: Dict[str, Union[str, Sequence[str]]],
+    lowest_ids: Dict[str, Union[str, Sequence[str]]],
 ):
+    """Highest and Lowest Return blocks; a period maps to one ID, or to a list of IDs best first that prints as numbered rows"""
     combined_width = id_width + description_width
 
     pdf.set_font("Courier", "B", 5)
     pdf.set_text_color(0, 0, 0)
     pdf.set_fill_color(255, 255, 255)
 
-    pdf.cell(combined_width, row_height, "Highest Return", 1, fill=True, align="L")
-    for period in time_periods:
-        pdf.cell(standard_return_width, row_height, str(highest_ids[period]), 1, align="L", fill=True)
-    pdf.ln()
-
-    pdf.cell(combined_width, row_height, "Lowest Return", 1, fill=True, align="L")
-    for period in time_periods:
-        pdf.cell(standard_return_width, row_height, str(lowest_ids[period]), 1, align="L", fill=True)
-    pdf.ln()
+    for label, period_ids in (("Highest Return", highest_ids), ("Lowest Return", lowest_ids)):
+        ranked = {period: [ids] if isinstance(ids, str) else list(ids) for period, ids in period_ids.items()}
+        depth = max((len(ids) for ids in ranked.values()), default=1)
+        for rank in range(depth):
+            pdf.cell(combined_width, row_height, label if depth == 1 else f"{label} #{rank + 1}", 1, fill=True, align="L")
+            for period in time_periods:
+                ids = ranked[period]
+                pdf.cell(standard_return_width, row_height, str(ids[rank]) if rank < len(ids) else "", 1, align="L", fill=True)
+            pdf.ln()
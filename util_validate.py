@@ -0,0 +1,192 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from util_profile import profiled
+
+CHECKS = ("unordered_date", "duplicate_date", "non_positive", "gap", "spike")
+
+# Rows these checks flag are wrong in themselves; gaps and ordering are reported but leave the rows alone
+QUARANTINE_CHECKS = ("duplicate_date", "non_positive", "spike")
+
+
+def validate_prices(long_df: pd.DataFrame, max_gap_days: int = 5, spike_z: float = 8.0) -> pd.DataFrame:
+    """
+    Check the daily closes of every ticker of a long frame in one vectorized pass.
+
+    Checks:
+        unordered_date: the date is earlier than the previous row of the same ticker in the file
+        duplicate_date: the ticker has a later row for the same date (the last one is kept)
+        non_positive: the close is missing, zero or negative
+        gap: more than max_gap_days trading days (Mon-Fri) are missing before the row; value is the number missing
+        spike: the log return into the row and out of it both exceed spike_z z-scores of the ticker's
+            returns with opposite signs, i.e. a single bad tick rather than a real move
+
+    Args:
+        long_df (pd.DataFrame): Columns ticker, Date and Close, as returned by _read_close_frame
+        max_gap_days (int): Missing trading days tolerated between two rows (holidays included)
+        spike_z (float): z-score above which a reverted return is a spike
+
+    Returns:
+        pd.DataFrame: One row per issue with columns row (index label in long_df), ticker, Date, check and
+            value (the close, or the missing days of a gap), in CHECKS order
+    """
+    codes, tickers = pd.factorize(long_df['ticker'], sort=False)
+    days = long_df['Date'].to_numpy(dtype='datetime64[D]')
+    close = long_df['Close'].to_numpy(dtype=np.float64)
+    found_rows, found_checks, found_values = [], [], []
+
+    def found(check: str, rows: np.ndarray, values: np.ndarray) -> None:
+        found_rows.append(rows)
+        found_checks.append(np.full(len(rows), CHECKS.index(check), dtype=np.int8))
+        found_values.append(np.asarray(values, dtype=np.float64))
+
+    # File order within each ticker; _read_close_frame keeps each ticker's rows together, so usually no sort is needed
+    contiguous = bool(np.all(codes[1:] >= codes[:-1]))
+    order = np.arange(len(codes)) if contiguous else np.argsort(codes, kind='stable')
+    c, d = (codes, days) if contiguous else (codes[order], days[order])
+    same = c[1:] == c[:-1]
+    unordered = order[1:][same & (d[1:] < d[:-1])]
+    found("unordered_date", unordered, close[unordered])
+
+    # Ticker and date order; lexsort is stable, so of repeated dates the row written last comes last
+    in_order = contiguous and not len(unordered)
+    if not in_order:
+        order = np.lexsort((days, codes))
+        c, d = codes[order], days[order]
+        same = c[1:] == c[:-1]
+    p = close if in_order else close[order]
+    duplicate = np.zeros(len(order), dtype=bool)
+    duplicate[:-1] = same & (d[1:] == d[:-1])
+    rows = order[duplicate]
+    found("duplicate_date", rows, close[rows])
+
+    non_positive = ~(p > 0)
+    rows = order[non_positive]
+    found("non_positive", rows, close[rows])
+
+    # Only steps longer than the tolerance in calendar days can miss too many trading days
+    step = np.flatnonzero(same & (d[1:] - d[:-1] > np.timedelta64(max_gap_days + 1, 'D')))
+    missing = np.busday_count(d[step], d[step + 1]) - 1
+    too_long = missing > max_gap_days
+    found("gap", order[step[too_long] + 1], missing[too_long])
+
+    # Log returns between the consecutive usable rows of each ticker, scaled by the ticker's mean absolute
+    # deviation, which a single bad tick inflates far less than it does the standard deviation
+    usable = np.flatnonzero(~duplicate & ~non_positive)
+    uc, up = c[usable], p[usable]
+    within = uc[1:] == uc[:-1]
+    returns = np.where(within, np.log(up[1:] / np.where(within, up[:-1], 1.0)), 0.0)
+    n_tickers = len(tickers)
+    counts = np.maximum(np.bincount(uc[1:], weights=within, minlength=n_tickers), 1)
+    mean = np.bincount(uc[1:], weights=returns, minlength=n_tickers) / counts
+    deviation = np.abs(returns - mean[uc[1:]]) * within
+    # 1.2533 turns a mean absolute deviation into a standard deviation; the floor keeps flat series
+    # (e.g. money market funds) from turning every cent into a spike
+    scale = np.maximum(1.2533 * np.bincount(uc[1:], weights=deviation, minlength=n_tickers) / counts, 1e-3)
+    z = np.where(within, (returns - mean[uc[1:]]) / scale[uc[1:]], 0.0)
+    z_in, z_out = z[:-1], z[1:]
+    spike = (np.abs(z_in) > spike_z) & (np.abs(z_out) > spike_z) & (np.sign(z_in) != np.sign(z_out))
+    rows = order[usable[1:-1][spike]]
+    found("spike", rows, close[rows])
+
+    rows = np.concatenate(found_rows)
+    return pd.DataFrame(
+        {
+            'row': long_df.index.to_numpy()[rows],
+            'ticker': np.asarray(tickers, dtype=object)[codes[rows]],
+            'Date': long_df['Date'].to_numpy()[rows],
+            'check': np.asarray(CHECKS, dtype=object)[np.concatenate(found_checks)],
+            'value': np.concatenate(found_values),
+        }
+    )
+
+
+def quarantine_rows(long_df: pd.DataFrame, issues: pd.DataFrame, checks=QUARANTINE_CHECKS) -> pd.DataFrame:
+    """Drop the rows flagged by any of `checks` from the frame the issues were found in."""
+    flagged = issues.loc[issues['check'].isin(checks), 'row'].unique()
+    return long_df.drop(index=flagged) if len(flagged) else long_df
+
+
+def issue_records(issues: pd.DataFrame) -> List[list]:
+    """One ticker's issues as JSON-serializable [date, check, value] rows, e.g. to cache them next to its aggregates."""
+    return [[f"{pd.Timestamp(date):%Y-%m-%d}", check, float(value)] for date, check, value in zip(issues['Date'], issues['check'], issues['value'])]
+
+
+def issues_from_records(ticker: str, records: List[list]) -> pd.DataFrame:
+    """Rebuild a ticker's issues from issue_records; row is -1, as the rows belonged to an earlier read of the file."""
+    dates, checks, values = zip(*records) if records else ((), (), ())
+    return pd.DataFrame(
+        {
+            'row': np.full(len(records), -1, dtype=np.int64),
+            'ticker': np.full(len(records), ticker, dtype=object),
+            'Date': pd.to_datetime(pd.Series(dates, dtype=object), format='%Y-%m-%d'),
+            'check': pd.Series(checks, dtype=object),
+            'value': np.asarray(values, dtype=np.float64),
+        }
+    )
+
+
+def issue_report(issues: pd.DataFrame, max_tickers: int = 20) -> str:
+    """
+    Compact text report: one line per ticker with the count and first date of each kind of issue.
+
+    Returns:
+        str: Empty when there are no issues
+    """
+    if issues.empty:
+        return ""
+    summary = issues.groupby(['ticker', 'check'], sort=True).agg(count=('row', 'size'), first=('Date', 'min')).reset_index()
+    lines = [f"Price data issues: {len(issues)} in {summary['ticker'].nunique()} tickers"]
+    for ticker, group in list(summary.groupby('ticker', sort=True))[:max_tickers]:
+        checks = ", ".join(f"{row.check} x{row.count} (from {pd.Timestamp(row.first):%Y-%m-%d})" for row in group.itertuples())
+        lines.append(f"  {ticker}: {checks}")
+    if summary['ticker'].nunique() > max_tickers:
+        lines.append(f"  ... and {summary['ticker'].nunique() - max_tickers} more tickers")
+    return "\n".join(lines)
+
+
+class PriceValidator:
+    """
+    Validation stage run on each freshly parsed long frame before it is aggregated.
+
+    Issues found across calls accumulate in `issues`; with quarantine=True the rows flagged by
+    QUARANTINE_CHECKS are also removed from the frame that is returned.
+    """
+
+    def __init__(self, max_gap_days: int = 5, spike_z: float = 8.0, quarantine: bool = False):
+        self.max_gap_days = max_gap_days
+        self.spike_z = spike_z
+        self.quarantine = quarantine
+        self._found: List[pd.DataFrame] = []
+
+    def params(self) -> Optional[dict]:
+        """Parameters that change the validated data (None when it is only reported); part of cache keys."""
+        return {"max_gap_days": self.max_gap_days, "spike_z": self.spike_z, "checks": list(QUARANTINE_CHECKS)} if self.quarantine else None
+
+    def issue_params(self) -> dict:
+        """Parameters that change the issues found; part of the cache key of each ticker's issues."""
+        return {"validation": "issues", "max_gap_days": self.max_gap_days, "spike_z": self.spike_z, "checks": list(CHECKS)}
+
+    @profiled("validation")
+    def check(self, long_df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Validate a frame without recording the issues; returns (frame to aggregate, issues)."""
+        issues = validate_prices(long_df, self.max_gap_days, self.spike_z)
+        return (quarantine_rows(long_df, issues) if self.quarantine else long_df), issues
+
+    def record(self, issues: pd.DataFrame) -> None:
+        if not issues.empty:
+            self._found.append(issues)
+
+    def __call__(self, long_df: pd.DataFrame) -> pd.DataFrame:
+        long_df, issues = self.check(long_df)
+        self.record(issues)
+        return long_df
+
+    @property
+    def issues(self) -> pd.DataFrame:
+        return pd.concat(self._found, ignore_index=True) if self._found else validate_prices(pd.DataFrame(columns=['ticker', 'Date', 'Close']))
+
+    def report(self) -> str:
+        return issue_report(self.issues)
@@ -0,0 +1,295 @@
+import argparse
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import pandas as pd
+
+from util_data import PERIOD_LABELS, _aggregate_periods, _build_period_contents, _read_close_frame
+from util_profile import profiled, stage
+from util_ui import PDF, render_tables
+
+
+@dataclass
+class Node:
+    name: str
+    deps: List[str]
+    compute: Optional[Callable[..., Any]]  # None for source files
+    path: Optional[str] = None
+    version: Optional[Tuple[int, int]] = None
+    value: Any = None
+    dependents: List[str] = field(default_factory=list)
+
+
+class DependencyGraph:
+    """
+    Incremental recomputation over a graph of source files and derived values.
+
+    Nodes are added after their dependencies, so insertion order is a topological order. poll() compares
+    each source file's mtime and size with the version last seen; update() then recomputes only the
+    nodes downstream of the changed sources, each once, in dependency order. Output nodes (writing a PDF
+    or a workbook) are ordinary nodes whose compute has a side effect, so an output is re-emitted only
+    when one of its inputs changed.
+
+    A node whose compute raises (e.g. a price file deleted or caught half-written) keeps its previous value
+    and stays dirty, together with everything downstream of it, so the next update retries it even if the
+    file has not changed since. The last error of each failing node is kept in `errors`.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, Node] = {}
+        self.errors: Dict[str, Exception] = {}
+        self._order: List[str] = []
+        # Derived nodes to recompute on the next update; every node downstream of a dirty node is dirty too
+        self._dirty: Set[str] = set()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.nodes
+
+    def _add(self, node: Node) -> None:
+        if node.name in self.nodes:
+            raise ValueError(f"Node '{node.name}' already exists")
+        for dep in node.deps:
+            if dep not in self.nodes:
+                raise ValueError(f"Node '{node.name}' depends on unknown node '{dep}'")
+            self.nodes[dep].dependents.append(node.name)
+        self.nodes[node.name] = node
+        self._order.append(node.name)
+
+    def add_source(self, name: str, path: str) -> None:
+        """Add a file whose changes trigger recomputation; its value is its path."""
+        self._add(Node(name, [], None, path=path, value=path))
+
+    def add_node(self, name: str, deps: Sequence[str], compute: Callable[..., Any]) -> None:
+        """Add a derived node; compute receives the values of deps, in order. It is computed on the next update."""
+        self._add(Node(name, list(deps), compute))
+        self._dirty.add(name)
+
+    def value(self, name: str) -> Any:
+        return self.nodes[name].value
+
+    def poll(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """Return the sources (of `names`, default all) whose file changed (or appeared/disappeared) since the last poll, and record their new versions."""
+        changed = []
+        wanted = None if names is None else set(names)
+        for name in self._order:
+            node = self.nodes[name]
+            if node.path is None or (wanted is not None and name not in wanted):
+                continue
+            try:
+                stat = os.stat(node.path)
+                version: Optional[Tuple[int, int]] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                version = None
+            if version != node.version:
+                node.version = version
+                changed.append(name)
+        return changed
+
+    def affected(self, sources: Iterable[str]) -> List[str]:
+        """Derived nodes downstream of `sources`, in topological order."""
+        dirty = set()
+        stack = list(sources)
+        while stack:
+            for dependent in self.nodes[stack.pop()].dependents:
+                if dependent not in dirty:
+                    dirty.add(dependent)
+                    stack.append(dependent)
+        return [name for name in self._order if name in dirty]
+
+    def _upstream(self, name: str) -> Set[str]:
+        """`name` and every node it depends on, directly or not"""
+        upstream = set()
+        stack = [name]
+        while stack:
+            current = stack.pop()
+            if current not in upstream:
+                upstream.add(current)
+                stack.extend(self.nodes[current].deps)
+        return upstream
+
+    def _recompute(self, names: Set[str]) -> List[str]:
+        """Recompute the dirty nodes among `names` in topological order; a node that raises, and its dependents, stay dirty"""
+        recomputed = []
+        for name in [name for name in self._order if name in names and name in self._dirty]:
+            node = self.nodes[name]
+            assert node.compute is not None, "only derived nodes are marked dirty"
+            if any(dep in self._dirty for dep in node.deps):
+                continue  # An input failed to recompute; keep the previous value until it succeeds
+            try:
+                node.value = node.compute(*(self.nodes[dep].value for dep in node.deps))
+            except Exception as e:
+                self.errors[name] = e
+                print(f"Could not recompute {name}, retrying on the next update: {type(e).__name__}: {e}")
+                continue
+            self._dirty.discard(name)
+            self.errors.pop(name, None)
+            recomputed.append(name)
+        return recomputed
+
+    @profiled("incremental_update")
+    def update(self, sources: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Recompute the nodes affected by `sources` (default: poll for changed sources), plus the nodes still
+        dirty from earlier updates: new nodes and those whose compute failed.
+
+        Returns:
+            List[str]: The nodes recomputed successfully, in the order they ran
+        """
+        sources = self.poll() if sources is None else list(sources)
+        self._dirty.update(self.affected(sources))
+        return self._recompute(set(self._dirty))
+
+    def evaluate(self, name: str) -> Any:
+        """
+        Bring a node up to date now and return its value, e.g. to build more of the graph from it.
+
+        Only the sources and nodes upstream of `name` are polled and recomputed; whatever else depends on a
+        changed source is left dirty for the next update.
+        """
+        upstream = self._upstream(name)
+        self._dirty.update(self.affected(self.poll(upstream)))
+        self._recompute(upstream)
+        if name in self._dirty:
+            raise self.errors.get(name) or RuntimeError(f"Node '{name}' could not be computed")
+        return self.nodes[name].value
+
+
+def _ticker_nodes(graph: DependencyGraph, ticker: str, file_path: str, freq: str) -> str:
+    """Add (once) the source, parsed frame and period aggregate nodes of a ticker; return the aggregate node"""
+    source, frame, aggregate = f"source:{ticker}", f"frame:{ticker}", f"aggregate:{ticker}:{freq}"
+    if source not in graph:
+        graph.add_source(source, file_path)
+        graph.add_node(frame, [source], lambda path: _read_close_frame({ticker: path}))
+    if aggregate not in graph:
+        graph.add_node(aggregate, [frame], lambda long_df: _aggregate_periods(long_df, freq))
+    return aggregate
+
+
+def add_report(
+    graph: DependencyGraph, name: str, file_paths: Dict[str, str], descriptions: Dict[str, str], output_path: str, freqs: Sequence[str] = ('W',)
+) -> str:
+    """
+    Add the nodes of one PDF report: per-ticker frames and aggregates (shared with other reports of the
+    graph), one changes/prices content pair per window, and the PDF output.
+
+    Returns:
+        str: Name of the output node
+    """
+    tickers = list(file_paths)
+    content_nodes = []
+    for freq in freqs:
+        if freq not in PERIOD_LABELS:
+            raise ValueError(f"Unsupported aggregation window '{freq}', expected one of {list(PERIOD_LABELS)}")
+        aggregates = [_ticker_nodes(graph, ticker, file_paths[ticker], freq) for ticker in tickers]
+
+        def build(*frames, freq=freq):
+            return _build_period_contents(freq, tickers, descriptions, pd.concat(frames, ignore_index=True))
+
+        graph.add_node(f"content:{name}:{freq}", aggregates, build)
+        content_nodes.append(f"content:{name}:{freq}")
+
+    def write_pdf(*contents):
+        pdf = PDF(orientation="L")
+        pdf.add_page()
+        render_tables(pdf, (table for pair in contents for table in pair))
+        with stage("pdf_output"):
+            pdf.output(output_path)
+        return output_path
+
+    graph.add_node(f"output:{name}", content_nodes, write_pdf)
+    return f"output:{name}"
+
+
+def add_ledger_outputs(
+    graph: DependencyGraph,
+    ledger_path: str,
+    load_ledger: Callable[[str], Any],
+    compute_eom: Callable[[Any, str], Any],
+    accounts: Sequence[str],
+    price_paths: Dict[str, str],
+    output_dir: str,
+) -> List[str]:
+    """
+    Add the ledger workbook, one end-of-month frame per account and its Excel output.
+
+    An account's frame depends on the ledger and on the price files of the securities it held when the
+    graph was built, so a price change only rewrites the workbooks of the accounts holding that security.
+    The holdings are read from the ledger node's own value, so the workbook is parsed once, not again on
+    the first update.
+
+    Args:
+        ledger_path (str): Ledger workbook
+        load_ledger (Callable[[str], Any]): Parses the workbook into a transactions frame
+        compute_eom (Callable[[Any, str], Any]): (transactions, account) -> EOM frame, e.g. compute_eom_position
+        accounts (Sequence[str]): Accounts to report
+        price_paths (Dict[str, str]): Price file of each security
+        output_dir (str): Where eom_positions_<account>.xlsx are written
+
+    Returns:
+        List[str]: Names of the output nodes
+    """
+    graph.add_source("source:ledger", ledger_path)
+    graph.add_node("ledger", ["source:ledger"], load_ledger)
+    transactions = graph.evaluate("ledger")
+    outputs = []
+    for account in accounts:
+        held = transactions.filter(transactions["Account Name"] == account)["Security"].unique().to_list()
+        price_sources = []
+        for security in sorted(held):
+            if security in price_paths:
+                if f"source:{security}" not in graph:
+                    graph.add_source(f"source:{security}", price_paths[security])
+                price_sources.append(f"source:{security}")
+        graph.add_node(f"eom:{account}", ["ledger"] + price_sources, lambda ledger, *prices, account=account: compute_eom(ledger, account))
+        output_path = os.path.join(output_dir, f"eom_positions_{account.replace(' ', '_').lower()}.xlsx")
+
+        def write_excel(eom_df, output_path=output_path):
+            eom_df.write_excel(output_path)
+            return output_path
+
+        graph.add_node(f"output:eom:{account}", [f"eom:{account}"], write_excel)
+        outputs.append(f"output:eom:{account}")
+    return outputs
+
+
+def watch(graph: DependencyGraph, interval: float = 1.0, on_update: Optional[Callable[[List[str]], None]] = None, stop: Optional[Callable[[], bool]] = None) -> None:
+    """
+    Poll the sources every `interval` seconds and recompute what changed, until `stop` returns True.
+
+    The first pass computes everything; later passes only what depends on changed files, plus whatever
+    failed on an earlier pass, which is reported and retried rather than ending the watch.
+    """
+    while not (stop and stop()):
+        recomputed = graph.update()
+        if recomputed and on_update:
+            on_update([name for name in recomputed if name.startswith("output:")])
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Regenerate the report whenever a price file changes')
+    parser.add_argument('tickers', help='Comma separated tickers to report')
+    parser.add_argument('--periods', default='W', help="Comma separated aggregation windows, any of W, M, Q, Y (default: W)")
+    parser.add_argument('--output', default='asset_returns.pdf', help='PDF to (re)write (default: asset_returns.pdf)')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds between polls (default: 1)')
+    args = parser.parse_args()
+
+    from util_data import get_price_dir
+
+    price_dir = get_price_dir()
+    tickers = [ticker.strip() for ticker in args.tickers.split(',') if ticker.strip()]
+    report_graph = DependencyGraph()
+    add_report(
+        report_graph,
+        "report",
+        {ticker: os.path.join(price_dir, f"{ticker}.csv") for ticker in tickers},
+        {ticker: ticker for ticker in tickers},
+        args.output,
+        [freq.strip().upper() for freq in args.periods.split(',') if freq.strip()],
+    )
+    try:
+        watch(report_graph, args.interval, on_update=lambda outputs: print(f"Regenerated: {', '.join(report_graph.value(name) for name in outputs)}"))
+    except KeyboardInterrupt:
+        pass